@@ -10,6 +10,10 @@ import sounddevice as sd
 from scipy import signal
 from scipy.io import wavfile
 
+from convolucion_fir import ConvolucionFIR
+from filtros_sos import diseñar_iir, respuesta_sos
+from registro_diseños import diseñar_fir
+
 class DemoFiltros:
     def __init__(self, fs=8000):
         self.fs = fs  # Frecuencia de muestreo
@@ -43,17 +47,16 @@ class DemoFiltros:
     
     def diseñar_filtro(self):
         fc = 800  # Frecuencia de corte en Hz
-        fc = fc / self.nyquist  # Normalizar la frecuencia de corte
-        h_fir = signal.firwin(41, fc, window='hamming')
+        # Del registro de diseños: no se recalculan en cada corrida
+        h_fir = diseñar_fir(41, fc, self.fs, ventana='hamming')
         print("Diseñando filtro IIR.....")
-        b_iir, a_iir = signal.butter(6, fc, btype='low')
+        sos_iir = diseñar_iir(6, fc, self.fs)  # secciones de segundo orden
 
-        return h_fir, (b_iir, a_iir)
+        return h_fir, sos_iir
     
-    def aplicar_filtro(self, audio, h_fir, iir_coefs):
-        b_iir, a_iir = iir_coefs
-        audio_fir = signal.lfilter(h_fir, 1, audio)
-        audio_iir = signal.lfilter(b_iir, a_iir, audio)
+    def aplicar_filtro(self, audio, h_fir, sos_iir):
+        audio_fir = ConvolucionFIR(h_fir).aplicar(audio)  # directa o FFT según los taps
+        audio_iir = signal.sosfilt(sos_iir, audio)
         return audio_fir, audio_iir
 
     def reproducir_comparacion(self, audio_orig, audio_fir, audio_iir):
@@ -96,8 +99,7 @@ class DemoFiltros:
         except Exception as e:
             print(f"Error al reproducir el audio: {e}")
     
-    def analizar_espectros(self, audio_orig, audio_fir, audio_iir, h_fir, iir_coefs):
-        b_iir, a_iir = iir_coefs
+    def analizar_espectros(self, audio_orig, audio_fir, audio_iir, h_fir, sos_iir):
         f, Pxx_orig = signal.welch(audio_orig, fs=self.fs, nperseg=1024)
         f, Pxx_fir = signal.welch(audio_fir, fs=self.fs, nperseg=1024)
         f, Pxx_iir = signal.welch(audio_iir, fs=self.fs, nperseg=1024)
@@ -124,7 +126,7 @@ class DemoFiltros:
         axes[0, 1].axvline(800, color='k', linestyle='--', label='fc = 800 Hz')
         # Respuestas en frecuencia de los filtros
         w_fir, h_fir = signal.freqz(h_fir, worN=1024, fs = self.fs)
-        w_iir, h_iir = signal.freqz(b_iir, a_iir, worN=1024, fs = self.fs)
+        w_iir, h_iir = respuesta_sos(sos_iir, worN=1024, fs = self.fs)
 
         axes[1, 0].plot(w_fir, 20*np.log10(np.abs(h_fir)),'b-', linewidth=3, label='FIR')
         axes[1, 0].plot(w_iir, 20*np.log10(np.abs(h_iir)), 'r-', linewidth=3, label='IIR')
@@ -160,8 +162,8 @@ class DemoFiltros:
         return snr_orig, snr_fir, snr_iir
     
     def calcular_snr(self, audio):
-        b_suave, a_suave = signal.butter(2, 0.1, btype='low')
-        señal_estimada = signal.filtfilt(b_suave, a_suave, audio)
+        sos_suave = diseñar_iir(2, 0.1 * self.nyquist, self.fs)
+        señal_estimada = signal.sosfiltfilt(sos_suave, audio)
         ruido_estimado = audio - señal_estimada
         potencia_señal = np.var(señal_estimada)  # corregido nombre
         potencia_ruido = np.var(ruido_estimado)
@@ -175,11 +177,11 @@ class DemoFiltros:
         # 1 - Cargar el audio
         audio_orig = self.cargar_audio(archivo)
         # 2 - Diseñar filtros
-        h_fir, iir_coefs = self.diseñar_filtro()
+        h_fir, sos_iir = self.diseñar_filtro()
         # 3 - Aplicar filtos
-        audio_fir, audio_iir = self.aplicar_filtro(audio_orig, h_fir, iir_coefs)
+        audio_fir, audio_iir = self.aplicar_filtro(audio_orig, h_fir, sos_iir)
         # 4 - Analisis visual
-        snr_orig,snr_fir, snr_iir = self.analizar_espectros(audio_orig, audio_fir, audio_iir, h_fir, iir_coefs)
+        snr_orig,snr_fir, snr_iir = self.analizar_espectros(audio_orig, audio_fir, audio_iir, h_fir, sos_iir)
         # 5 - Cinparación auditiva 
         respuesta = input('¿Reproducir comparación auditiva de 5 segundos? (s/n): ')
         if respuesta.lower() == 's':
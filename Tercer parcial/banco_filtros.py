@@ -0,0 +1,253 @@
+#!/usr/bin/env python3
+"""
+BANCO DE FILTROS EN UNA SOLA PASADA
+Aplica muchos diseños FIR e IIR al mismo audio y regresa la salida apilada
+(n_filtros, n_muestras), en lugar de una llamada a signal.lfilter por diseño
+
+Diseños aceptados (igual que carga_coeficientes.py):
+    h          arreglo 1-D de coeficientes FIR
+    (b, a)     función de transferencia (con a = 1 se trata como FIR)
+    sos        arreglo (k, 6) de secciones bicuadráticas
+
+Cómo se comparte el trabajo:
+    FIR   los coeficientes de cada clase de longitud (potencia de 2,
+          rellenados al más largo de la clase) forman una matriz (F, taps)
+          para convolucion_fir.py: un solo producto matricial contra la
+          ventana deslizante del audio o, con filtros largos, overlap-save con
+          la FFT de cada trama de entrada compartida por la clase
+    IIR   cada diseño pasa a espacio de estados (cascada de secciones, mejor
+          condicionada que la forma directa de orden alto) y los del mismo
+          orden se procesan juntos por bloques de L muestras: la parte de
+          entrada de todos los bloques y filtros es un producto matricial;
+          solo el estado avanza bloque a bloque, resuelto con log2(n/L)
+          productos. L crece con el orden (el Toeplitz cuesta L por muestra,
+          la suma prefija k²·log2(n/L)/L con k estados)
+
+En un núcleo la salida de cada IIR sigue costando del orden de un sosfilt;
+la ventaja grande está en los FIR largos y en repartir los productos entre
+los hilos de BLAS.
+"""
+
+import time
+
+import numpy as np
+from scipy import linalg, signal
+
+from convolucion_fir import ConvolucionFIR
+from filtros_sos import diseñar_iir
+from registro_diseños import diseñar_fir
+
+BLOQUE_IIR_MINIMO = 16   # muestras por bloque en el recorrido de estados
+BLOQUE_POR_ESTADO = 5    # L ≈ 5 veces el número de estados
+
+
+def normalizar_diseño(diseño):
+    """('fir', h) o ('iir', sos) para un diseño h, (b, a) o sos"""
+    if isinstance(diseño, tuple):
+        b, a = (np.atleast_1d(np.asarray(c, dtype=float)) for c in diseño)
+        a = np.trim_zeros(a, 'b')
+        if len(a) == 1:
+            return 'fir', b / a[0]
+        return 'iir', signal.tf2sos(b, a)
+    diseño = np.asarray(diseño, dtype=float)
+    if diseño.ndim == 1:
+        return 'fir', diseño
+    if diseño.ndim != 2 or diseño.shape[1] != 6:
+        raise ValueError("Diseño no reconocido: se espera h, (b, a) o secciones sos (k, 6)")
+    return 'iir', diseño
+
+
+def espacio_estados(sos):
+    """(A, B, C, D) de la cascada de secciones bicuadráticas"""
+    A = np.zeros((0, 0))
+    B = np.zeros(0)
+    C = np.zeros(0)
+    D = 1.0
+    for seccion in sos:
+        # Forma directa II transpuesta (la de sosfilt); tf2ss descartaría
+        # numeradores muy pequeños de las secciones con corte bajo
+        b0, b1, b2, a0, a1, a2 = seccion / seccion[3]
+        a_s = np.array([[-a1, 1.0], [-a2, 0.0]])
+        b_s = np.array([b1 - a1 * b0, b2 - a2 * b0])
+        c_s = np.array([1.0, 0.0])
+        d_s = b0
+        k, m = len(A), len(a_s)
+        # La salida acumulada (C s + D x) es la entrada de la nueva sección
+        nueva = np.zeros((k + m, k + m))
+        nueva[:k, :k] = A
+        nueva[k:, :k] = np.outer(b_s, C)
+        nueva[k:, k:] = a_s
+        A = nueva
+        B = np.concatenate([B, b_s * D])
+        C = np.concatenate([d_s * C, c_s])
+        D = d_s * D
+    return A, B, C, D
+
+
+class BloquesIIR:
+    """Diseños IIR del mismo orden procesados juntos por bloques de L muestras
+
+    Para un bloque que empieza con estado s:
+        y = O s + T x        (T: Toeplitz de la respuesta al impulso)
+        s' = A^L s + G x
+    """
+
+    def __init__(self, sistemas, bloque):
+        L = self.bloque = bloque
+        n, k = len(sistemas), len(sistemas[0][0])
+        self.orden = k
+        self.matriz_o = np.zeros((n, L, k))
+        self.matriz_t = np.zeros((n, L, L))
+        self.matriz_g = np.zeros((n, k, L))
+        self.potencia_a = np.zeros((n, k, k))
+
+        for f, (A, B, C, D) in enumerate(sistemas):
+            # C A^i y A^i B para i = 0..L
+            c_a = np.zeros((L + 1, k))
+            a_b = np.zeros((L + 1, k))
+            c_a[0], a_b[0] = C, B
+            for i in range(L):
+                c_a[i + 1] = c_a[i] @ A
+                a_b[i + 1] = A @ a_b[i]
+            respuesta = np.concatenate([[D], c_a[:L - 1] @ B])  # h[0..L-1]
+            self.matriz_o[f] = c_a[:L]
+            self.matriz_t[f] = linalg.toeplitz(respuesta, np.zeros(L))
+            self.matriz_g[f] = a_b[L - 1::-1].T
+            self.potencia_a[f] = np.linalg.matrix_power(A, L)
+
+    def aplicar(self, x):
+        L, n = self.bloque, len(x)
+        bloques = -(-n // L)
+        xb = np.zeros(bloques * L)
+        xb[:n] = x
+        xb = xb.reshape(bloques, L)
+
+        # Aporte de la entrada de cada bloque al estado siguiente: (F, bloques, k)
+        entrada_estado = np.matmul(xb, self.matriz_g.transpose(0, 2, 1))
+
+        # Estado al inicio de cada bloque: s[m] = A^L s[m-1] + u[m-1], resuelto
+        # como suma prefija (log2 de los bloques pasos) en lugar de bloque a bloque
+        estados = np.zeros((len(self.matriz_o), bloques, self.orden))
+        estados[:, 1:] = entrada_estado[:, :-1]
+        potencia = self.potencia_a.transpose(0, 2, 1)
+        salto = 1
+        while salto < bloques:
+            estados[:, salto:] += np.matmul(estados[:, :-salto], potencia)
+            potencia = np.matmul(potencia, potencia)
+            salto *= 2
+
+        y = np.matmul(estados, self.matriz_o.transpose(0, 2, 1))
+        y += np.matmul(xb, self.matriz_t.transpose(0, 2, 1))
+        return y.reshape(len(self.matriz_o), -1)[:, :n]
+
+
+def bloque_para_orden(orden):
+    """L para k estados: el Toeplitz cuesta L por muestra y la suma prefija k²·log/L"""
+    return max(BLOQUE_IIR_MINIMO, 1 << int(np.ceil(np.log2(BLOQUE_POR_ESTADO * max(orden, 1)))))
+
+
+class BancoFiltros:
+    def __init__(self, diseños, bloque_iir=None):
+        # bloque_iir None: L según el orden de cada grupo (bloque_para_orden)
+        self.diseños = [normalizar_diseño(d) for d in diseños]
+        self.bloque_iir = bloque_iir
+        self.indices_fir = [i for i, (tipo, _) in enumerate(self.diseños) if tipo == 'fir']
+        self.indices_iir = [i for i, (tipo, _) in enumerate(self.diseños) if tipo == 'iir']
+        self._preparar_fir()
+        self._preparar_iir()
+
+    def __len__(self):
+        return len(self.diseños)
+
+    def _preparar_fir(self):
+        """Una matriz (F, taps) por clase de longitud (potencia de 2), rellenada con ceros
+
+        Un solo grupo rellenaría los filtros cortos a la longitud del más
+        largo y todos pagarían su costo.
+        """
+        clases = {}
+        for i in self.indices_fir:
+            taps = len(self.diseños[i][1])
+            clases.setdefault(1 << int(np.ceil(np.log2(taps))), []).append(i)
+        self.grupos_fir = []  # (índices, ConvolucionFIR)
+        for indices in clases.values():
+            coeficientes = [self.diseños[i][1] for i in indices]
+            matriz = np.zeros((len(indices), max(len(h) for h in coeficientes)))
+            for fila, h in enumerate(coeficientes):
+                matriz[fila, :len(h)] = h
+            self.grupos_fir.append((indices, ConvolucionFIR(matriz)))
+
+    def _preparar_iir(self):
+        """Un BloquesIIR por orden: el estado no se rellena al mayor orden del banco"""
+        ordenes = {}
+        for i in self.indices_iir:
+            sistema = espacio_estados(self.diseños[i][1])
+            ordenes.setdefault(len(sistema[0]), []).append((i, sistema))
+        self.grupos_iir = []  # (índices, BloquesIIR)
+        for orden, miembros in ordenes.items():
+            bloque = self.bloque_iir or bloque_para_orden(orden)
+            self.grupos_iir.append(([i for i, _ in miembros],
+                                    BloquesIIR([sistema for _, sistema in miembros], bloque)))
+
+    def aplicar(self, audio):
+        """Salida apilada (n_filtros, n_muestras) de todos los diseños"""
+        x = np.asarray(audio, dtype=float)
+        salida = np.empty((len(self.diseños), len(x)))
+        for indices, grupo in self.grupos_fir + self.grupos_iir:
+            salida[indices] = grupo.aplicar(x)
+        return salida
+
+
+def diseños_candidatos(fs=8000):
+    """Familia de diseños pasabajas para comparar (FIR de varias longitudes e IIR)"""
+    diseños = {}
+    for fc in (600, 800, 1000, 1200):
+        for taps in (21, 41, 81, 255):
+            diseños[f"FIR {taps} @ {fc}"] = diseñar_fir(taps, fc, fs)
+        for orden in (2, 4, 6, 10):
+            diseños[f"Butter {orden} @ {fc}"] = diseñar_iir(orden, fc, fs)
+        diseños[f"Cheby1 4 @ {fc}"] = diseñar_iir(4, fc, fs, 'cheby1')
+        diseños[f"Elíptico 8 @ {fc}"] = diseñar_iir(8, fc, fs, 'ellip')
+    return diseños
+
+
+def benchmark_banco(duracion=5.0, fs=8000, repeticiones=5):
+    """Compara el banco contra un lfilter/sosfilt por diseño sobre el mismo audio"""
+    rng = np.random.default_rng(0)
+    audio = rng.standard_normal(int(duracion * fs)).astype(np.float32)
+    diseños = diseños_candidatos(fs)
+
+    def medir(funcion):
+        tiempos = []
+        for _ in range(repeticiones):
+            inicio = time.perf_counter()
+            resultado = funcion()
+            tiempos.append(time.perf_counter() - inicio)
+        return min(tiempos), resultado
+
+    def por_diseño():
+        return np.array([signal.lfilter(d, 1, audio) if np.ndim(d) == 1 else signal.sosfilt(d, audio)
+                         for d in diseños.values()])
+
+    t_uno, _ = medir(lambda: signal.sosfilt(diseños['Butter 6 @ 800'], audio))
+    t_lfilter, referencia = medir(por_diseño)
+    banco = BancoFiltros(list(diseños.values()))
+    t_banco, salida = medir(lambda: banco.aplicar(audio))
+    error = np.max(np.abs(salida - referencia))
+
+    print(f"\nBANCO DE {len(diseños)} FILTROS ({duracion:.0f}s de audio a {fs} Hz):")
+    print(f"{'MÉTODO':^22} | {'TIEMPO ms':^9} | {'x UN FILTRO':^11}")
+    print("-" * 48)
+    for nombre, t in (('un sosfilt', t_uno), ('uno por diseño', t_lfilter), ('banco', t_banco)):
+        print(f"{nombre:^22} | {t*1000:^9.2f} | {t / t_uno:^11.1f}")
+    print(f"   Banco contra uno por diseño: {t_lfilter / t_banco:.1f}x")
+    print(f"   Error máximo contra lfilter/sosfilt: {error:.2e}")
+    return t_lfilter, t_banco, error
+
+
+def main():
+    benchmark_banco()
+
+
+if __name__ == "__main__":
+    main()
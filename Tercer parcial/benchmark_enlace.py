@@ -0,0 +1,93 @@
+#!/usr/bin/env python3
+"""
+BENCHMARK DEL ENLACE ARDUINO SIN PLACA
+Ejecuta la ruta completa de sistema_completo_clase.py contra el emulador
+y reporta el tiempo y las muestras/s de cada modo de protocolo
+"""
+
+import os
+import tempfile
+import time
+
+import numpy as np
+from scipy.io import wavfile
+
+import protocolo_binario
+from sistema_completo_clase import SistemaCompletoClase
+
+MODOS = {
+    'ASCII': dict(protocolo='ascii'),
+    'BINARIO': dict(protocolo='binario'),
+    'DELTA': dict(protocolo='binario', formato_binario=protocolo_binario.FORMATO_DELTA),
+    'PIPELINE': dict(protocolo='binario', pipeline=True),
+    'PIPE-1M': dict(protocolo='binario', pipeline=True, negociar_baudios=True),
+}
+
+
+def crear_audio_prueba(directorio, duracion=1.0, fs=8000):
+    """Genera un WAV corto con tonos dentro y fuera de la banda de paso"""
+    t = np.arange(int(fs * duracion)) / fs
+    audio = 0.5 * np.sin(2*np.pi*300*t) + 0.3 * np.sin(2*np.pi*2500*t)
+    archivo = os.path.join(directorio, 'benchmark_enlace.wav')
+    wavfile.write(archivo, fs, np.int16(audio * 32767 * 0.8))
+    return archivo
+
+
+def benchmark_sistema(modos=None, duracion=1.0, tipo_filtro=1):
+    """Mide la ruta conectar + procesar para cada modo usando el emulador"""
+
+    modos = modos or list(MODOS)
+    resultados = {}
+
+    with tempfile.TemporaryDirectory() as directorio:
+        archivo = crear_audio_prueba(directorio, duracion)
+
+        for nombre in modos:
+            print(f"\n{'='*50}")
+            print(f"MODO {nombre}")
+            print(f"{'='*50}")
+            sistema = SistemaCompletoClase('EMULADOR', **MODOS[nombre])
+
+            inicio = time.perf_counter()
+            if not sistema.conectar_arduino():
+                continue
+            t_conexion = time.perf_counter() - inicio
+
+            inicio = time.perf_counter()
+            entrada, salida = sistema.procesar_con_arduino_optimizado(archivo, tipo_filtro)
+            t_proceso = time.perf_counter() - inicio
+            sistema.arduino.close()
+
+            muestras = 0 if entrada is None else len(entrada)
+            telemetria = sistema.telemetria.resumen() if sistema.telemetria else {}
+            resultados[nombre] = {
+                'conexion_s': t_conexion,
+                'proceso_s': t_proceso,
+                'muestras': muestras,
+                'muestras_s': muestras / t_proceso if t_proceso > 0 else 0.0,
+                'latencia_p50_ms': telemetria.get('latencia_p50_ms') or 0.0,
+                'latencia_p95_ms': telemetria.get('latencia_p95_ms') or 0.0,
+                'uso_tx': telemetria.get('uso_tx', 0.0),
+            }
+
+    print(f"\n{'='*60}")
+    print(f"RESULTADOS ({duracion:.1f}s de audio, filtro tipo {tipo_filtro})")
+    print(f"{'='*60}")
+    print(f"{'MODO':^10} | {'CONEXIÓN':^9} | {'PROCESO':^9} | {'MUESTRAS/S':^11} | "
+          f"{'P50 LOTE':^9} | {'P95 LOTE':^9} | {'USO TX':^6}")
+    print("-" * 80)
+    for nombre, datos in resultados.items():
+        print(f"{nombre:^10} | {datos['conexion_s']:>8.2f}s | {datos['proceso_s']:>8.2f}s | "
+              f"{datos['muestras_s']:^11.0f} | {datos['latencia_p50_ms']:>6.1f} ms | "
+              f"{datos['latencia_p95_ms']:>6.1f} ms | {datos['uso_tx']*100:>5.0f}%")
+
+    return resultados
+
+
+def main():
+    """Ejecuta el benchmark completo del enlace"""
+    benchmark_sistema()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,125 @@
+#!/usr/bin/env python3
+"""
+CAPA DE COMANDOS CON CONFIRMACIÓN (ACK/READY)
+Sustituye las esperas fijas por la respuesta real del Arduino
+
+Tokens del sketch:
+    READY         Al terminar el arranque (después del bootloader)
+    ACK:<cmd>     Al terminar cada comando de control (t, r, c, b, p, 0, 1, 2)
+    ERR:<cmd>     Comando rechazado
+
+Con sketches antiguos que no envían ACK se usan las esperas originales.
+"""
+
+import time
+from contextlib import contextmanager
+
+# Tiempo máximo de espera por comando (s)
+TIMEOUTS = {'t': 2.0, 'r': 1.0, 'c': 1.0, 'b': 1.0, 'p': 1.0, '0': 1.0, '1': 1.0, '2': 1.0}
+TIMEOUT_DEFECTO = 1.0
+
+# Esperas fijas del código original, solo para sketches sin ACK
+RETARDOS_LEGADOS = {'t': 2.0, 'r': 2.0, 'c': 0.5, 'b': 0.5, 'p': 0.1, '0': 1.0, '1': 1.0, '2': 1.0}
+
+
+class CapaComandos:
+    def __init__(self, puerto):
+        self.puerto = puerto
+        self.soporta_ack = None  # None = aún no se sabe (se detecta con 't')
+        self.latencias = {}      # comando -> lista de latencias (s)
+        self.fallos = {}         # comando -> número de timeouts
+
+    @contextmanager
+    def _plazo(self, timeout):
+        """Fija el timeout del puerto una vez por comando; entrega el tiempo límite
+
+        Cambiar el timeout reconfigura el puerto (una llamada al sistema en
+        pyserial), por eso no se ajusta línea por línea.
+        """
+        timeout_original = self.puerto.timeout
+        self.puerto.timeout = timeout
+        try:
+            yield time.perf_counter() + timeout
+        finally:
+            self.puerto.timeout = timeout_original
+
+    def _leer_linea(self, limite):
+        """Lee una línea si aún no se pasó el tiempo límite del comando"""
+        if time.perf_counter() >= limite:
+            return None
+        linea = self.puerto.readline()
+        if not linea:
+            return None
+        return linea.decode(errors='replace').strip()
+
+    def esperar_listo(self, timeout=3.5):
+        """Espera el fin del arranque del Arduino
+
+        Regresa al recibir READY o, con sketches antiguos, la primera línea
+        del banner. Si no llega nada se asume que el arranque ya terminó.
+        """
+        inicio = time.perf_counter()
+        with self._plazo(timeout) as limite:
+            linea = self._leer_linea(limite)
+            while linea == '':
+                linea = self._leer_linea(limite)
+        self._registrar('READY', time.perf_counter() - inicio)
+        return linea is not None and 'READY' in linea
+
+    def enviar(self, comando, timeout=None):
+        """Envía un comando de control y espera su ACK
+
+        Regresa (ok, lineas) con las líneas informativas recibidas antes del ACK.
+        """
+        timeout = timeout or TIMEOUTS.get(comando, TIMEOUT_DEFECTO)
+        lineas = []
+        inicio = time.perf_counter()
+        self.puerto.write(f"{comando}\n".encode())
+
+        if self.soporta_ack is False:
+            # Sketch antiguo: espera fija y se lee lo que haya llegado
+            time.sleep(RETARDOS_LEGADOS.get(comando, TIMEOUT_DEFECTO))
+            while self.puerto.in_waiting:
+                linea = self.puerto.readline().decode(errors='replace').strip()
+                if linea:
+                    lineas.append(linea)
+            return True, lineas
+
+        # El límite cuenta desde que el comando salió (la escritura puede
+        # incluir una reconexión de la sesión)
+        with self._plazo(timeout) as limite:
+            while True:
+                linea = self._leer_linea(limite)
+                if linea is None:
+                    break
+                if linea == f"ACK:{comando}":
+                    self.soporta_ack = True
+                    self._registrar(comando, time.perf_counter() - inicio)
+                    return True, lineas
+                if linea == f"ERR:{comando}":
+                    return False, lineas
+                if linea and linea != 'READY':
+                    lineas.append(linea)
+
+        if self.soporta_ack is None:
+            # Primer comando sin ACK: sketch antiguo, se usan esperas fijas en adelante
+            self.soporta_ack = False
+            return True, lineas
+
+        self.fallos[comando] = self.fallos.get(comando, 0) + 1
+        return False, lineas
+
+    def _registrar(self, comando, latencia):
+        self.latencias.setdefault(comando, []).append(latencia)
+
+    def reporte_latencias(self):
+        """Imprime la latencia medida por comando"""
+        print(f"\nLATENCIA POR COMANDO ({'ACK' if self.soporta_ack else 'esperas fijas'}):")
+        print(f"{'CMD':^7} | {'N':^4} | {'MÍN ms':^8} | {'MEDIA ms':^9} | {'MÁX ms':^8} | {'TIMEOUTS':^8}")
+        print("-" * 58)
+        comandos = list(self.latencias) + [c for c in self.fallos if c not in self.latencias]
+        for comando in comandos:
+            ms = [v * 1000 for v in self.latencias.get(comando, [])] or [float('nan')]
+            print(f"{comando:^7} | {len(self.latencias.get(comando, [])):^4} | {min(ms):^8.1f} | "
+                  f"{sum(ms)/len(ms):^9.1f} | {max(ms):^8.1f} | {self.fallos.get(comando, 0):^8}")
+        return self.latencias
@@ -0,0 +1,383 @@
+#!/usr/bin/env python3
+"""
+CAPTURA Y REPRODUCCIÓN DEL TRÁFICO SERIAL
+Graba cada byte que cruza el puerto (en ambos sentidos, con su instante)
+en un archivo binario compacto y lo sirve de vuelta como un dispositivo
+tipo serial.Serial, a la velocidad grabada o tan rápido como se pueda
+
+Formato del archivo (little-endian):
+    MAGIA | eventos: tipo (1) | t en s desde el inicio (8) | largo (4) | datos
+
+    TX   host -> placa (se registra antes de escribir)
+    RX   placa -> host (lo que regresó cada read/readline)
+    PING_TX / PING_RX   keep-alive de SesionArduino: se graban aparte y la
+         reproducción los omite, porque no forman parte de la corrida
+
+Solo se graba lo que el host leyó: lo que descartó reset_input_buffer
+nunca llega a la captura. Al reproducir, un evento RX se entrega cuando el
+host ya escribió todos los bytes que se habían escrito antes de él, así
+una respuesta nunca sale antes de su comando aunque no se espere el tiempo.
+"""
+
+import os
+import struct
+import sys
+import threading
+import time
+from contextlib import contextmanager
+
+MAGIA = b'SERCAP1\n'
+EVENTO = struct.Struct('<BdI')  # tipo, t, largo
+TIPO_TX = 0
+TIPO_RX = 1
+TIPO_PING_TX = 2
+TIPO_PING_RX = 3
+
+
+class GrabadorCaptura:
+    def __init__(self, ruta):
+        directorio = os.path.dirname(ruta)
+        if directorio:
+            os.makedirs(directorio, exist_ok=True)
+        self.ruta = ruta
+        self._archivo = open(ruta, 'wb')
+        self._archivo.write(MAGIA)
+        self._bloqueo = threading.Lock()
+        self.inicio = time.perf_counter()
+        self.eventos = 0
+
+    def registrar(self, tipo, datos):
+        with self._bloqueo:
+            if self._archivo is None:
+                return
+            self._archivo.write(EVENTO.pack(tipo, time.perf_counter() - self.inicio, len(datos)))
+            self._archivo.write(datos)
+            self.eventos += 1
+
+    def cerrar(self):
+        with self._bloqueo:
+            if self._archivo is not None:
+                self._archivo.close()
+                self._archivo = None
+
+
+class PuertoGrabador:
+    """Envuelve un puerto tipo serial.Serial y registra su tráfico"""
+
+    def __init__(self, puerto, grabador):
+        self.puerto = puerto
+        self.grabador = grabador
+        self._hilo_ping = None  # hilo cuyo tráfico se graba como ping
+
+    @property
+    def port(self):
+        return self.puerto.port
+
+    @property
+    def timeout(self):
+        return self.puerto.timeout
+
+    @timeout.setter
+    def timeout(self, valor):
+        self.puerto.timeout = valor
+
+    @property
+    def baudrate(self):
+        return self.puerto.baudrate
+
+    @baudrate.setter
+    def baudrate(self, valor):
+        self.puerto.baudrate = valor
+
+    @property
+    def is_open(self):
+        return self.puerto.is_open
+
+    @property
+    def in_waiting(self):
+        return self.puerto.in_waiting
+
+    @contextmanager
+    def grabar_como_ping(self):
+        """Lo que este hilo escriba y lea dentro del bloque se graba como ping"""
+        self._hilo_ping = threading.get_ident()
+        try:
+            yield self
+        finally:
+            self._hilo_ping = None
+
+    def _es_ping(self):
+        return self._hilo_ping == threading.get_ident()
+
+    def write(self, datos):
+        self.grabador.registrar(TIPO_PING_TX if self._es_ping() else TIPO_TX, bytes(datos))
+        return self.puerto.write(datos)
+
+    def read(self, size=1):
+        datos = self.puerto.read(size)
+        if datos:
+            self.grabador.registrar(TIPO_PING_RX if self._es_ping() else TIPO_RX, datos)
+        return datos
+
+    def readline(self):
+        datos = self.puerto.readline()
+        if datos:
+            self.grabador.registrar(TIPO_PING_RX if self._es_ping() else TIPO_RX, datos)
+        return datos
+
+    def reset_input_buffer(self):
+        return self.puerto.reset_input_buffer()
+
+    def flush(self):
+        return self.puerto.flush()
+
+    def close(self):
+        return self.puerto.close()
+
+
+def leer_captura(ruta):
+    """Regresa la lista de eventos (tipo, t, datos) de un archivo de captura"""
+    with open(ruta, 'rb') as archivo:
+        contenido = archivo.read()
+    if not contenido.startswith(MAGIA):
+        raise ValueError(f"{ruta} no es una captura serial")
+    eventos = []
+    posicion = len(MAGIA)
+    while posicion + EVENTO.size <= len(contenido):
+        tipo, t, largo = EVENTO.unpack_from(contenido, posicion)
+        posicion += EVENTO.size
+        datos = contenido[posicion:posicion + largo]
+        if len(datos) < largo:
+            break  # captura cortada a la mitad de un evento
+        eventos.append((tipo, t, datos))
+        posicion += largo
+    return eventos
+
+
+class ReproductorCaptura:
+    """Dispositivo tipo serial.Serial que sirve una captura grabada
+
+    velocidad=None entrega cada respuesta en cuanto el host escribió lo que
+    la precedía; con un número se respetan los tiempos grabados (1.0 =
+    tiempo real, 2.0 = el doble de rápido). Los bytes escritos que no
+    coinciden con la captura se cuentan en 'divergencias'. Los pings
+    grabados se omiten: el reproductor no los espera ni los contesta.
+    """
+
+    def __init__(self, ruta, velocidad=None, port=None, baudrate=115200, timeout=3):
+        self.port = port or f"CAPTURA:{ruta}"
+        self.baudrate = baudrate
+        self.timeout = timeout
+        self.velocidad = velocidad
+        self.is_open = True
+
+        self._tx = bytearray()       # lo que el host escribió al grabar
+        self._fin_tx = []            # bytes de TX acumulados al final de cada escritura grabada
+        self._t_tx = []              # instante grabado de cada escritura
+        self._rx = bytearray()
+        self._fin_rx = []            # fin de cada evento RX dentro de self._rx
+        self._requiere_tx = []       # bytes que el host debe haber escrito antes del evento
+        self._escritura_previa = []  # índice de la última escritura grabada antes del evento
+        self._t_rx = []
+        for tipo, t, datos in leer_captura(ruta):
+            if tipo == TIPO_TX:
+                self._tx.extend(datos)
+                self._fin_tx.append(len(self._tx))
+                self._t_tx.append(t)
+            elif tipo == TIPO_RX:
+                self._rx.extend(datos)
+                self._fin_rx.append(len(self._rx))
+                self._requiere_tx.append(len(self._tx))
+                self._escritura_previa.append(len(self._t_tx) - 1)
+                self._t_rx.append(t)
+
+        self._condicion = threading.Condition()
+        self._inicio = time.perf_counter()
+        self._escritos = 0
+        self._t_escritura = []    # instante de reproducción en que se completó cada escritura grabada
+        self._siguiente = 0       # próximo evento RX aún no liberado
+        self._disponible = 0      # bytes de self._rx liberados
+        self._posicion = 0        # bytes de self._rx ya leídos
+        self.divergencias = 0
+
+    def _hora_evento(self, k):
+        """Instante de reproducción en que el evento RX k puede salir"""
+        previa = self._escritura_previa[k]
+        if previa < 0:
+            base, grabado = self._inicio, 0.0
+        else:
+            base, grabado = self._t_escritura[previa], self._t_tx[previa]
+        return base + (self._t_rx[k] - grabado) / self.velocidad
+
+    def _liberar(self):
+        """Libera los eventos RX cuyo comando ya se escribió (y cuyo tiempo llegó)
+
+        Regresa el instante del siguiente evento pendiente por tiempo, o None.
+        """
+        ahora = time.perf_counter()
+        while self._siguiente < len(self._fin_rx):
+            k = self._siguiente
+            if self._requiere_tx[k] > self._escritos:
+                return None
+            if self.velocidad:
+                hora = self._hora_evento(k)
+                if hora > ahora:
+                    return hora
+            self._disponible = self._fin_rx[k]
+            self._siguiente += 1
+        return None
+
+    def _esperar(self, limite):
+        """Espera con la condición tomada a que se libere algo o venza el límite"""
+        proximo = self._liberar()
+        ahora = time.perf_counter()
+        if limite is not None and ahora >= limite:
+            return False
+        espera = [t - ahora for t in (proximo, limite) if t is not None]
+        self._condicion.wait(max(0.0, min(espera)) if espera else None)
+        return True
+
+    def _verificar_abierto(self):
+        if not self.is_open:
+            raise OSError(f"Puerto {self.port} cerrado")
+
+    @property
+    def in_waiting(self):
+        with self._condicion:
+            self._liberar()
+            return self._disponible - self._posicion
+
+    def write(self, datos):
+        self._verificar_abierto()
+        datos = bytes(datos)
+        with self._condicion:
+            esperado = self._tx[self._escritos:self._escritos + len(datos)]
+            self.divergencias += sum(a != b for a, b in zip(datos, esperado))
+            self.divergencias += len(datos) - len(esperado)
+            self._escritos += len(datos)
+            ahora = time.perf_counter()
+            while (len(self._t_escritura) < len(self._fin_tx) and
+                   self._fin_tx[len(self._t_escritura)] <= self._escritos):
+                self._t_escritura.append(ahora)
+            self._liberar()
+            self._condicion.notify_all()
+        return len(datos)
+
+    def read(self, size=1):
+        self._verificar_abierto()
+        limite = None if self.timeout is None else time.perf_counter() + self.timeout
+        with self._condicion:
+            while True:
+                self._liberar()
+                if self._disponible - self._posicion >= size:
+                    break
+                if not self._esperar(limite) or not self.is_open:
+                    break
+            fin = min(self._disponible, self._posicion + size)
+            datos = bytes(self._rx[self._posicion:fin])
+            self._posicion = fin
+        return datos
+
+    def readline(self):
+        self._verificar_abierto()
+        limite = None if self.timeout is None else time.perf_counter() + self.timeout
+        with self._condicion:
+            while True:
+                self._liberar()
+                fin = self._rx.find(b'\n', self._posicion, self._disponible)
+                if fin >= 0:
+                    fin += 1
+                    break
+                if not self._esperar(limite) or not self.is_open:
+                    fin = self._disponible
+                    break
+            datos = bytes(self._rx[self._posicion:fin])
+            self._posicion = fin
+        return datos
+
+    def reset_input_buffer(self):
+        # Lo descartado al grabar no está en la captura: no hay nada que tirar
+        pass
+
+    def flush(self):
+        pass
+
+    def close(self):
+        self.is_open = False
+        with self._condicion:
+            self._condicion.notify_all()
+
+    @property
+    def terminada(self):
+        """True si ya se entregó toda la captura"""
+        return self._posicion >= len(self._rx)
+
+
+def resumen_captura(ruta):
+    """Imprime el contenido de una captura"""
+    eventos = leer_captura(ruta)
+    tx = sum(len(d) for tipo, _, d in eventos if tipo == TIPO_TX)
+    rx = sum(len(d) for tipo, _, d in eventos if tipo == TIPO_RX)
+    pings = sum(1 for tipo, _, _ in eventos if tipo == TIPO_PING_TX)
+    duracion = eventos[-1][1] if eventos else 0.0
+    print(f"\nCAPTURA {os.path.basename(ruta)} ({os.path.getsize(ruta)} bytes):")
+    print(f"   Eventos: {len(eventos)}, duración {duracion:.2f}s")
+    print(f"   Host -> placa: {tx} bytes, placa -> host: {rx} bytes, pings omitidos: {pings}")
+    return eventos
+
+
+def benchmark_reproduccion(protocolo='binario', pipeline=False, duracion=2.0, tipo_filtro=1):
+    """Graba una corrida contra el emulador y la reproduce a toda velocidad"""
+    import tempfile
+
+    import numpy as np
+    from scipy.io import wavfile
+
+    from sistema_completo_clase import SistemaCompletoClase
+
+    with tempfile.TemporaryDirectory() as directorio:
+        fs = 8000
+        t = np.arange(int(fs * duracion)) / fs
+        archivo = os.path.join(directorio, 'captura.wav')
+        wavfile.write(archivo, fs, np.int16(0.6 * np.sin(2*np.pi*300*t) * 32767))
+        opciones = dict(protocolo=protocolo, pipeline=pipeline, verificar_referencia=False, puntos_control=False)
+
+        sistema = SistemaCompletoClase('EMULADOR', ruta_captura=directorio, **opciones)
+        sistema.conectar_arduino()
+        inicio = time.perf_counter()
+        grabada = sistema.procesar_con_arduino_optimizado(archivo, tipo_filtro)
+        t_grabada = time.perf_counter() - inicio
+        ruta = sistema.grabador_captura.ruta
+        sistema.desconectar_arduino(forzar=True)
+        resumen_captura(ruta)
+
+        sistema = SistemaCompletoClase(f"CAPTURA:{ruta}", **opciones)
+        sistema.conectar_arduino()
+        inicio = time.perf_counter()
+        reproducida = sistema.procesar_con_arduino_optimizado(archivo, tipo_filtro)
+        t_reproducida = time.perf_counter() - inicio
+        divergencias = sistema.arduino.puerto.divergencias
+        sistema.desconectar_arduino(forzar=True)
+
+    lotes = len(sistema.telemetria.lotes)
+    iguales = all(np.array_equal(a, b) for a, b in zip(grabada, reproducida))
+    modo = protocolo + (' pipeline' if pipeline else '')
+    print(f"\nREPRODUCCIÓN ({modo}, {lotes} lotes):")
+    print(f"   Grabada:     {t_grabada:8.3f}s ({lotes / t_grabada:8.0f} lotes/s)")
+    print(f"   Reproducida: {t_reproducida:8.3f}s ({lotes / t_reproducida:8.0f} lotes/s)")
+    print(f"   Salida idéntica: {'sí' if iguales else 'NO'}, bytes divergentes: {divergencias}")
+    return t_grabada, t_reproducida, iguales
+
+
+def main():
+    """Resume una captura dada o corre el benchmark de reproducción"""
+    if len(sys.argv) > 1:
+        resumen_captura(sys.argv[1])
+        return
+    # ASCII queda limitado por la pausa por muestra del host, no por la placa
+    benchmark_reproduccion('binario')
+    benchmark_reproduccion('binario', pipeline=True)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,143 @@
+#!/usr/bin/env python3
+"""
+CARGA DE COEFICIENTES EN TIEMPO DE EJECUCIÓN
+Cuantiza un diseño (FIR o IIR) al punto fijo del sketch y lo sube a la
+placa en una sola trama binaria con CRC, sin recompilar ni volver a
+grabar el Arduino
+
+Diseños aceptados:
+    h          arreglo 1-D de coeficientes FIR (p. ej. signal.firwin)
+    (b, a)     función de transferencia IIR (se convierte a secciones)
+    sos        arreglo (k, 6) de secciones bicuadráticas de scipy
+
+La placa contesta TIPO_CONFIRMACION y deja activo el filtro cargado
+(FILTRO_CARGADO, comando '3'), con su estado en cero.
+"""
+
+import hashlib
+import time
+
+import numpy as np
+from scipy import signal
+
+import protocolo_binario
+from filtros_punto_fijo import (BITS_FIR, BITS_IIR, MAXIMO_TAPS_FIR, MAXIMO_SECCIONES_IIR,
+                                cuantizar_fir, cuantizar_sos, repartir_ganancia)
+
+TIMEOUT_CARGA = 1.0
+REINTENTOS_CARGA = 2
+
+
+def cuantizar_diseño(diseño):
+    """Convierte un diseño a (es_fir, bits, coeficientes enteros) del sketch"""
+    if isinstance(diseño, tuple):
+        b, a = diseño
+        diseño = signal.tf2sos(b, a)
+    diseño = np.asarray(diseño, dtype=float)
+
+    if diseño.ndim == 1:
+        if len(diseño) > MAXIMO_TAPS_FIR:
+            raise ValueError(f"FIR de {len(diseño)} coeficientes; la placa admite {MAXIMO_TAPS_FIR}")
+        return True, BITS_FIR, cuantizar_fir(diseño)
+
+    if diseño.ndim != 2 or diseño.shape[1] != 6:
+        raise ValueError("Diseño no reconocido: se espera h, (b, a) o secciones sos (k, 6)")
+    if len(diseño) > MAXIMO_SECCIONES_IIR:
+        raise ValueError(f"IIR de {len(diseño)} secciones; la placa admite {MAXIMO_SECCIONES_IIR}")
+    return False, BITS_IIR, cuantizar_sos(repartir_ganancia(diseño)).ravel()
+
+
+def trama_coeficientes(coeficientes, secuencia=0):
+    """Trama binaria para (es_fir, bits, valores)"""
+    es_fir, bits, valores = coeficientes
+    formato = (protocolo_binario.COEF_FIR if es_fir else protocolo_binario.COEF_IIR) | bits
+    return protocolo_binario.codificar_coeficientes(valores, secuencia, formato)
+
+
+def huella_coeficientes(coeficientes):
+    """SHA-1 de la trama completa (tipo, bits y todos los valores)"""
+    return hashlib.sha1(trama_coeficientes(coeficientes)).hexdigest()
+
+
+class CargadorCoeficientes:
+    def __init__(self, puerto, timeout=TIMEOUT_CARGA, reintentos=REINTENTOS_CARGA):
+        # puerto: tipo serial.Serial (o SesionArduino)
+        self.puerto = puerto
+        self.timeout = timeout
+        self.reintentos = reintentos
+        self.secuencia = 0
+        self.latencias = []  # s desde el envío hasta la confirmación
+
+    def cargar(self, diseño):
+        """Cuantiza y sube un diseño; regresa los coeficientes cargados o None"""
+        coeficientes = cuantizar_diseño(diseño)
+        return coeficientes if self.cargar_cuantizados(coeficientes) else None
+
+    def cargar_cuantizados(self, coeficientes):
+        """Sube coeficientes ya cuantizados y espera la confirmación
+
+        Cargar el mismo filtro dos veces no tiene efectos extra, así que si
+        la confirmación se pierde se reenvía la trama.
+        """
+        self.secuencia = (self.secuencia + 1) & 0xFFFF
+        trama = trama_coeficientes(coeficientes, self.secuencia)
+        for _ in range(1 + self.reintentos):
+            inicio = time.perf_counter()
+            self.puerto.write(trama)
+            limite = time.time() + self.timeout
+            while True:
+                respuesta = protocolo_binario.leer_trama(self.puerto, timeout=limite - time.time())
+                if respuesta is None or respuesta[1] == self.secuencia:
+                    break
+            if respuesta is not None and respuesta[0] == protocolo_binario.TIPO_CONFIRMACION:
+                self.latencias.append(time.perf_counter() - inicio)
+                return True
+        return False
+
+
+def main():
+    """Sube los diseños de DemoFiltrosSimple al emulador y compara contra el modelo"""
+    from capa_comandos import CapaComandos
+    from emulador_arduino import EmuladorArduino
+    from filtros_punto_fijo import crear_filtro, FILTRO_CARGADO
+    from filtros_sos import diseñar_iir
+    from registro_diseños import diseñar_fir
+    from procesador_demo_mejorado import DemoFiltrosSimple
+
+    h_fir, sos_iir = DemoFiltrosSimple().diseñar_filtros()
+    diseños = {
+        'FIR demo (41)': h_fir,
+        'IIR demo (sos)': sos_iir,
+        'IIR demo (b, a)': signal.sos2tf(sos_iir),
+        'Pasaaltas 1 kHz': diseñar_iir(4, 1000, 8000, btype='high'),
+        'FIR 101 coef.': diseñar_fir(101, (500, 1500), 8000, btype='band'),
+    }
+
+    puerto = EmuladorArduino(timeout=1)
+    comandos = CapaComandos(puerto)
+    comandos.esperar_listo()
+    comandos.enviar('t')
+    cargador = CargadorCoeficientes(puerto)
+
+    rng = np.random.default_rng(0)
+    muestras = rng.integers(0, 1024, 600)
+    print(f"\n{'DISEÑO':^18} | {'COEF.':^5} | {'BYTES':^5} | {'CARGA ms':^8} | MODELO")
+    print("-" * 56)
+    for nombre, diseño in diseños.items():
+        coeficientes = cargador.cargar(diseño)
+        if coeficientes is None:
+            print(f"{nombre:^18} | rechazado")
+            continue
+        # La salida de la placa con el filtro nuevo contra el modelo bit a bit
+        puerto.write(protocolo_binario.codificar_lote(muestras, 0))
+        respuesta = protocolo_binario.leer_trama(puerto)
+        _, salida = protocolo_binario.decodificar_respuesta(respuesta[2], respuesta[4], respuesta[3])
+        esperada = crear_filtro(FILTRO_CARGADO, coeficientes).procesar_lote(muestras)
+        comandos.enviar('r')
+        print(f"{nombre:^18} | {len(coeficientes[2]):^5} | {len(trama_coeficientes(coeficientes)):^5} | "
+              f"{cargador.latencias[-1]*1000:^8.1f} | {'idéntica' if np.array_equal(salida, esperada) else 'DISTINTA'}")
+    puerto.close()
+
+
+if __name__ == "__main__":
+    main()
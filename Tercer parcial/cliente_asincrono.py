@@ -0,0 +1,173 @@
+#!/usr/bin/env python3
+"""
+CLIENTE ASÍNCRONO PARA ARDUINO MEGA
+Corrutinas asyncio para el conjunto de comandos (t, r, c, filtro, lotes)
+Los trabajos corren en un event loop en segundo plano, así el menú,
+las gráficas y la reproducción siguen disponibles mientras la placa trabaja
+
+La E/S serial sigue siendo bloqueante (pyserial), por eso se ejecuta en un
+único hilo dedicado: las corrutinas nunca bloquean el event loop.
+"""
+
+import asyncio
+import itertools
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+TIMEOUT_LOTE = 20.0  # incluye las retransmisiones del lote
+
+
+class ClienteArduinoAsync:
+    def __init__(self, sistema):
+        # sistema: SistemaCompletoClase (aporta puerto, protocolo y comandos)
+        self.sistema = sistema
+        self._ejecutor = ThreadPoolExecutor(max_workers=1, thread_name_prefix='serial')
+
+    async def _en_hilo(self, funcion, *args, timeout=None):
+        """Ejecuta una llamada bloqueante en el hilo serial, con timeout opcional"""
+        loop = asyncio.get_running_loop()
+        futuro = loop.run_in_executor(self._ejecutor, funcion, *args)
+        if timeout is None:
+            return await futuro
+        return await asyncio.wait_for(futuro, timeout)
+
+    async def conectar(self):
+        """Conecta la placa si aún no lo está"""
+        if self.sistema.conectado:
+            return True
+        return await self._en_hilo(self.sistema.conectar_arduino)
+
+    async def comando(self, comando, timeout=None):
+        """Envía un comando de control y espera su ACK"""
+        ok, lineas = await self._en_hilo(self.sistema.comandos.enviar, comando, timeout)
+        if not ok:
+            raise asyncio.TimeoutError(f"Sin confirmación para '{comando}'")
+        return lineas
+
+    async def test(self):
+        return await self.comando('t')
+
+    async def reset(self):
+        return await self.comando('r')
+
+    async def seleccionar_filtro(self, tipo_filtro):
+        return await self.comando(str(tipo_filtro))
+
+    async def iniciar_captura(self):
+        return await self.comando('c')
+
+    async def procesar_lote(self, lote, timeout=TIMEOUT_LOTE):
+        """Procesa un lote con el protocolo configurado (ASCII o binario)"""
+        entrada, salida = await self._en_hilo(
+            self.sistema.procesar_lote_confiable, lote, timeout=timeout)
+        if entrada is None or salida is None:
+            raise IOError("Lote sin respuesta válida")
+        return entrada, salida
+
+    async def _corrida(self, funcion, *args, progreso=None):
+        """Ejecuta una corrida síncrona del sistema en el hilo serial
+
+        Es el mismo camino que el menú (lote adaptativo, pipeline, puntos de
+        control, telemetría y verificación). La cancelación se atiende entre
+        lotes: el lote en curso termina y la corrida se detiene ahí.
+        """
+        cancelacion = threading.Event()
+
+        def ejecutar():
+            self.sistema.cancelacion = cancelacion
+            self.sistema.al_progresar = progreso
+            try:
+                return funcion(*args)
+            finally:
+                self.sistema.cancelacion = None
+                self.sistema.al_progresar = None
+
+        try:
+            entrada, salida = await self._en_hilo(ejecutar)
+        except asyncio.CancelledError:
+            cancelacion.set()
+            raise
+        if entrada is None or salida is None:
+            raise IOError("Corrida abortada (detalle en la consola)")
+        return entrada, salida
+
+    async def procesar_audio(self, audio_adc, tipo_filtro, progreso=None):
+        """Procesa todas las muestras ADC con procesar_muestras_adc"""
+        return await self._corrida(self.sistema.procesar_muestras_adc, audio_adc, tipo_filtro,
+                                   progreso=progreso)
+
+    async def procesar_archivo(self, archivo, tipo_filtro, progreso=None):
+        """Conecta y procesa el WAV completo con procesar_con_arduino_optimizado"""
+        if not await self.conectar():
+            raise IOError("No se pudo conectar con el Arduino")
+        return await self._corrida(self.sistema.procesar_con_arduino_optimizado, archivo, tipo_filtro,
+                                   progreso=progreso)
+
+    def cerrar(self):
+        self._ejecutor.shutdown(wait=False)
+
+
+class GestorTrabajos:
+    def __init__(self):
+        self.loop = asyncio.new_event_loop()
+        self._hilo = threading.Thread(target=self.loop.run_forever, daemon=True)
+        self._hilo.start()
+        self._ids = itertools.count(1)
+        self.trabajos = {}  # id -> dict(nombre, futuro, progreso, inicio)
+
+    def enviar(self, nombre, corrutina_fabrica):
+        """Lanza un trabajo; corrutina_fabrica recibe la función de progreso"""
+        id_trabajo = next(self._ids)
+        trabajo = {'nombre': nombre, 'progreso': 0.0, 'inicio': time.time(), 'fin': None}
+
+        def progreso(fraccion):
+            trabajo['progreso'] = fraccion
+
+        async def ejecutar():
+            try:
+                return await corrutina_fabrica(progreso)
+            finally:
+                trabajo['fin'] = time.time()
+
+        trabajo['futuro'] = asyncio.run_coroutine_threadsafe(ejecutar(), self.loop)
+        self.trabajos[id_trabajo] = trabajo
+        return id_trabajo
+
+    def estado(self, id_trabajo):
+        """'en curso', 'terminado', 'cancelado' o 'error: ...'"""
+        futuro = self.trabajos[id_trabajo]['futuro']
+        if not futuro.done():
+            return 'en curso'
+        if futuro.cancelled():
+            return 'cancelado'
+        if futuro.exception() is not None:
+            return f"error: {futuro.exception()!r}"
+        return 'terminado'
+
+    def ocupado(self):
+        """True si hay algún trabajo en curso"""
+        return any(not t['futuro'].done() for t in self.trabajos.values())
+
+    def cancelar(self, id_trabajo):
+        return self.trabajos[id_trabajo]['futuro'].cancel()
+
+    def resultado(self, id_trabajo):
+        return self.trabajos[id_trabajo]['futuro'].result()
+
+    def mostrar(self):
+        """Imprime el estado de todos los trabajos"""
+        if not self.trabajos:
+            print("No hay trabajos en segundo plano")
+            return
+        print(f"\n{'ID':^4} | {'TRABAJO':^30} | {'PROGRESO':^9} | {'TIEMPO':^8} | ESTADO")
+        print("-" * 72)
+        for id_trabajo, trabajo in self.trabajos.items():
+            duracion = (trabajo['fin'] or time.time()) - trabajo['inicio']
+            print(f"{id_trabajo:^4} | {trabajo['nombre'][:30]:^30} | {trabajo['progreso']*100:>8.0f}% | "
+                  f"{duracion:>7.1f}s | {self.estado(id_trabajo)}")
+
+    def cerrar(self):
+        for trabajo in self.trabajos.values():
+            trabajo['futuro'].cancel()
+        self.loop.call_soon_threadsafe(self.loop.stop)
@@ -0,0 +1,181 @@
+#!/usr/bin/env python3
+"""
+CONVOLUCIÓN FIR DIRECTA O POR FFT (OVERLAP-SAVE)
+Misma salida que signal.lfilter(h, 1, x) con estado inicial en cero
+(incluido el transitorio del inicio), eligiendo el método más barato según
+el número de coeficientes y el tamaño de bloque
+
+Métodos:
+    directo   lfilter para un filtro; con varios, un producto matricial
+              contra la ventana deslizante del audio (costo ∝ coeficientes)
+    fft       overlap-save: la FFT de los coeficientes se calcula una vez
+              y se guarda; el audio se corta en tramas de N muestras que se
+              traslapan taps-1, todas se transforman en una sola llamada y
+              cada filtro solo multiplica y antitransforma (costo ∝ log N)
+
+Con varios filtros (matriz (F, taps)) la FFT de cada trama de entrada se
+comparte entre todos.
+"""
+
+import time
+
+import numpy as np
+from scipy import signal
+
+COSTO_MAC = 1.0          # multiplicación-acumulación del método directo
+COSTO_FFT = 2.5          # por N·log2(N) de cada transformada real (medido)
+FFT_MINIMA = 64
+FFT_MAXIMA = 1 << 16
+ELEMENTOS_POR_GRUPO = 1 << 22  # tamaño de los productos intermedios (memoria)
+BLOQUE_DIRECTO = 1 << 14       # muestras por producto en el método directo
+
+
+def _costo_fft(n_fft, taps, filtros, bloque=None, muestras=None):
+    """Costo estimado por muestra de salida con overlap-save de tamaño n_fft
+
+    Con muestras se cobran las tramas completas que hacen falta: una señal
+    más corta que la trama paga la transformada entera.
+    """
+    avance = n_fft - taps + 1 if bloque is None else bloque
+    transformadas = (1 + filtros) * COSTO_FFT * n_fft * np.log2(n_fft)
+    productos = filtros * (n_fft // 2 + 1) * 4  # multiplicación compleja
+    if bloque is None and muestras:
+        return -(-muestras // avance) * (transformadas + productos) / muestras
+    return (transformadas + productos) / avance
+
+
+def elegir_metodo(taps, bloque=None, filtros=1, muestras=None):
+    """('directo', None) o ('fft', N) según el costo estimado por muestra
+
+    bloque: muestras nuevas por llamada (p. ej. lotes de 600 en streaming);
+    None para procesar la señal completa, donde N se elige libremente.
+    """
+    costo_directo = filtros * taps * COSTO_MAC
+    if muestras is not None and muestras < 1:
+        return 'directo', None
+    minima = max(FFT_MINIMA, 1 << int(np.ceil(np.log2(2 * taps))))
+    if bloque is not None:
+        # La trama debe cubrir el bloque nuevo más la historia del filtro
+        tamaños = [1 << int(np.ceil(np.log2(bloque + taps - 1)))]
+    else:
+        maxima = FFT_MAXIMA
+        if muestras is not None:
+            maxima = min(maxima, max(minima, 1 << int(np.ceil(np.log2(muestras + taps - 1)))))
+        tamaños = [1 << e for e in range(int(np.log2(minima)), int(np.log2(maxima)) + 1)]
+    n_fft = min(tamaños, key=lambda n: _costo_fft(n, taps, filtros, bloque, muestras))
+    if _costo_fft(n_fft, taps, filtros, bloque, muestras) < costo_directo:
+        return 'fft', n_fft
+    return 'directo', None
+
+
+class ConvolucionFIR:
+    def __init__(self, coeficientes, bloque=None, metodo='auto'):
+        # coeficientes: h (taps,) o matriz (F, taps) de un banco
+        self.coeficientes = np.asarray(coeficientes, dtype=float)
+        self.un_filtro = self.coeficientes.ndim == 1
+        self.matriz = np.atleast_2d(self.coeficientes)
+        self.taps = self.matriz.shape[1]
+        self.bloque = bloque
+        self.metodo = metodo
+        self._espectros = {}  # N -> FFT de los coeficientes (F, N/2+1)
+
+    def espectro(self, n_fft):
+        """FFT de los coeficientes a tamaño N (se calcula una sola vez)"""
+        if n_fft not in self._espectros:
+            self._espectros[n_fft] = np.fft.rfft(self.matriz, n_fft, axis=1)
+        return self._espectros[n_fft]
+
+    def elegir(self, muestras=None):
+        if self.metodo == 'auto':
+            return elegir_metodo(self.taps, self.bloque, len(self.matriz), muestras)
+        if self.metodo == 'fft':
+            _, n_fft = elegir_metodo(self.taps, self.bloque, len(self.matriz), muestras)
+            return 'fft', n_fft or max(FFT_MINIMA, 1 << int(np.ceil(np.log2(2 * self.taps))))
+        return 'directo', None
+
+    def aplicar(self, x):
+        """Igual que lfilter(h, 1, x) (o una fila por filtro si hay matriz)"""
+        x = np.asarray(x, dtype=float)
+        if not len(x):
+            return np.zeros(0) if self.un_filtro else np.zeros((len(self.matriz), 0))
+        metodo, n_fft = self.elegir(len(x))
+        if metodo == 'fft':
+            y = self._overlap_save(x, n_fft)
+        elif self.un_filtro:
+            return signal.lfilter(self.coeficientes, 1, x)
+        else:
+            y = self._directo(x)
+        return y[0] if self.un_filtro else y
+
+    def _directo(self, x):
+        relleno = np.concatenate([np.zeros(self.taps - 1), x])
+        ventanas = np.lib.stride_tricks.sliding_window_view(relleno, self.taps)
+        invertida = self.matriz[:, ::-1]
+        salida = np.empty((len(self.matriz), len(x)))
+        for inicio in range(0, len(x), BLOQUE_DIRECTO):
+            fin = min(inicio + BLOQUE_DIRECTO, len(x))
+            salida[:, inicio:fin] = invertida @ np.ascontiguousarray(ventanas[inicio:fin]).T
+        return salida
+
+    def _overlap_save(self, x, n_fft):
+        n, taps = len(x), self.taps
+        avance = n_fft - taps + 1
+        tramas = -(-n // avance)
+        # taps-1 ceros al inicio: el mismo transitorio que lfilter con estado cero
+        relleno = np.zeros((tramas - 1) * avance + n_fft)
+        relleno[taps - 1:taps - 1 + n] = x
+        ventanas = np.lib.stride_tricks.sliding_window_view(relleno, n_fft)[::avance]
+
+        espectro = self.espectro(n_fft)
+        filtros = len(espectro)
+        salida = np.empty((filtros, tramas * avance))
+        grupo = max(1, ELEMENTOS_POR_GRUPO // (filtros * n_fft))
+        for inicio in range(0, tramas, grupo):
+            fin = min(inicio + grupo, tramas)
+            entrada = np.fft.rfft(ventanas[inicio:fin], axis=1)  # compartida por los filtros
+            y = np.fft.irfft(entrada[None] * espectro[:, None], n_fft, axis=2)
+            # Solo las últimas 'avance' muestras de cada trama son convolución lineal
+            salida[:, inicio * avance:fin * avance] = y[:, :, taps - 1:].reshape(filtros, -1)
+        return salida[:, :n]
+
+
+def benchmark_convolucion(duracion=5.0, fs=8000, repeticiones=5):
+    """lfilter contra el método elegido para FIR de distintas longitudes"""
+    rng = np.random.default_rng(0)
+    audio = rng.standard_normal(int(duracion * fs))
+
+    def medir(funcion):
+        tiempos = []
+        for _ in range(repeticiones):
+            inicio = time.perf_counter()
+            resultado = funcion()
+            tiempos.append(time.perf_counter() - inicio)
+        return min(tiempos), resultado
+
+    print(f"\nCONVOLUCIÓN FIR ({duracion:.0f}s de audio a {fs} Hz):")
+    print(f"{'TAPS':^6} | {'LFILTER ms':^10} | {'ELEGIDO':^10} | {'ms':^7} | {'FFT ms':^7} | {'ERROR':^8}")
+    print("-" * 63)
+    for taps in (11, 41, 101, 255, 511, 1023, 2047):
+        h = signal.firwin(taps, 800 / (fs / 2), window='hamming')
+        t_lfilter, referencia = medir(lambda: signal.lfilter(h, 1, audio))
+        convolucion = ConvolucionFIR(h)
+        metodo, n_fft = convolucion.elegir(len(audio))
+        t_auto, salida = medir(lambda: convolucion.aplicar(audio))
+        t_fft, _ = medir(lambda: ConvolucionFIR(h, metodo='fft').aplicar(audio))
+        elegido = f"fft {n_fft}" if metodo == 'fft' else metodo
+        print(f"{taps:^6} | {t_lfilter*1000:^10.2f} | {elegido:^10} | {t_auto*1000:^7.2f} | "
+              f"{t_fft*1000:^7.2f} | {np.max(np.abs(salida - referencia)):^8.1e}")
+
+    # Streaming en lotes de 600 muestras (los del Arduino)
+    print(f"\nElección con lotes de 600 muestras:")
+    for taps in (41, 101, 255, 1023):
+        metodo, n_fft = elegir_metodo(taps, bloque=600)
+        print(f"   {taps:>5} taps: {metodo}{f' (N = {n_fft})' if n_fft else ''}")
+
+
+def main():
+    benchmark_convolucion()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,274 @@
+#!/usr/bin/env python3
+"""
+DESCUBRIMIENTO DE PUERTOS ARDUINO
+Prueba todos los puertos serie al mismo tiempo, reconoce el sketch por su
+respuesta a 't' y guarda una huella de cada dispositivo entre corridas
+
+Huella por dispositivo (archivo JSON, clave = huella de hardware):
+    puerto       nombre actual (COM4, /dev/ttyACM0, ...)
+    baudios      velocidad a la que respondió
+    version      primera línea de la respuesta a 't' (banner del sketch)
+    ack          si el sketch confirma comandos (READY/ACK)
+    es_arduino   False para dispositivos que respondieron otra cosa que el sketch
+    expira       (solo descartados) momento en que se vuelve a probar
+
+La huella de hardware es VID:PID y número de serie del USB, así una placa
+conocida se reconoce aunque cambie de COM y un dispositivo ajeno ya
+descartado no se vuelve a abrir hasta que vence su descarte (VIGENCIA_DESCARTE,
+por si se le carga el sketch). Un puerto que no contesta nada no se descarta:
+puede ser un Arduino que tardó en arrancar, y se prueba en cada búsqueda. Los clones sin número de serie (CH340 y
+similares) comparten VID:PID: se distinguen por su ubicación en el bus USB
+o, si no se conoce, por el nombre del puerto. Con la caché al día no se
+abre ningún puerto: el arranque solo lista los puertos del sistema.
+
+Abrir un Arduino lo reinicia; el puerto que se identificó en una prueba se
+entrega abierto y ya listo para no volver a esperar el bootloader.
+"""
+
+import json
+import os
+import queue
+import threading
+import time
+
+from capa_comandos import CapaComandos
+from negociacion_baudios import BAUDIOS_BASE
+
+ARCHIVO_CACHE = 'puertos_arduino.json'
+TIMEOUT_ARRANQUE = 2.0        # s, bootloader tras el reinicio al abrir
+TIMEOUT_IDENTIFICACION = 2.5  # s para la respuesta a 't' (más que el reinicio del bootloader)
+VIGENCIA_DESCARTE = 24 * 3600  # s que un dispositivo ajeno queda fuera de las pruebas
+MARCA_SKETCH = 'COMUNICACIÓN OK'
+
+
+def huella_hardware(info):
+    """Identificador estable de un puerto de serial.tools.list_ports"""
+    if info.vid is None:
+        return info.device  # puertos sin USB: solo se conoce el nombre
+    if info.serial_number:
+        return f"USB {info.vid:04X}:{info.pid:04X} {info.serial_number}"
+    # Sin número de serie dos clones darían la misma huella
+    return f"USB {info.vid:04X}:{info.pid:04X} @{info.location or info.device}"
+
+
+def listar_puertos():
+    """(puerto, huella de hardware) de los puertos serie del sistema"""
+    from serial.tools import list_ports
+    return [(info.device, huella_hardware(info)) for info in list_ports.comports()]
+
+
+def abrir_serial(puerto, baudios, timeout):
+    import serial
+    return serial.Serial(puerto, baudios, timeout=timeout)
+
+
+class Dispositivo:
+    def __init__(self, puerto, huella, baudios=BAUDIOS_BASE, version='', ack=False,
+                 conexion=None, desde_cache=False):
+        self.puerto = puerto
+        self.huella = huella
+        self.baudios = baudios
+        self.version = version
+        self.ack = ack
+        self.conexion = conexion  # puerto abierto y listo (solo si se probó)
+        self.desde_cache = desde_cache
+
+    def huella_cache(self):
+        return {'puerto': self.puerto, 'baudios': self.baudios, 'version': self.version,
+                'ack': self.ack, 'es_arduino': True, 'visto': time.strftime('%Y-%m-%d %H:%M:%S')}
+
+
+class DescubridorPuertos:
+    def __init__(self, archivo_cache=ARCHIVO_CACHE, baudios=BAUDIOS_BASE,
+                 listar=listar_puertos, abrir=abrir_serial,
+                 timeout_arranque=TIMEOUT_ARRANQUE, timeout_identificacion=TIMEOUT_IDENTIFICACION):
+        # listar: función sin argumentos -> [(puerto, huella)]
+        # abrir: función (puerto, baudios, timeout) -> puerto tipo serial.Serial
+        self.archivo_cache = archivo_cache
+        self.baudios = baudios
+        self.listar = listar
+        self.abrir = abrir
+        self.timeout_arranque = timeout_arranque
+        self.timeout_identificacion = timeout_identificacion
+        self.cache = self._leer_cache()
+        self.probados = 0   # puertos abiertos en la última búsqueda
+        self.duracion = 0.0
+
+    def _leer_cache(self):
+        try:
+            with open(self.archivo_cache) as archivo:
+                return json.load(archivo)
+        except (OSError, ValueError):
+            return {}
+
+    def _guardar_cache(self):
+        temporal = self.archivo_cache + '.tmp'
+        with open(temporal, 'w') as archivo:
+            json.dump(self.cache, archivo, indent=2, ensure_ascii=False)
+        os.replace(temporal, self.archivo_cache)
+
+    def olvidar(self, puerto=None):
+        """Borra de la caché un puerto (o todos) para volver a probarlo"""
+        if puerto is None:
+            self.cache = {}
+        else:
+            self.cache = {h: d for h, d in self.cache.items() if d.get('puerto') != puerto}
+        self._guardar_cache()
+
+    def probar(self, puerto, huella):
+        """Abre un puerto y lo identifica; regresa Dispositivo (abierto), False o None
+
+        False: respondió otra cosa (no es el sketch); None: no se pudo abrir
+        (ocupado o desconectado) o no contestó nada, no se guarda en la caché.
+        """
+        try:
+            conexion = self.abrir(puerto, self.baudios, self.timeout_identificacion)
+        except (OSError, ValueError):
+            return None
+        resultado = None
+        try:
+            comandos = CapaComandos(conexion)
+            comandos.esperar_listo(self.timeout_arranque)
+            conexion.reset_input_buffer()
+            ok, lineas = comandos.enviar('t', timeout=self.timeout_identificacion)
+            if ok and any(MARCA_SKETCH in linea for linea in lineas):
+                return Dispositivo(puerto, huella, self.baudios, lineas[0],
+                                   bool(comandos.soporta_ack), conexion=conexion)
+            if lineas:
+                resultado = False
+        except OSError:
+            pass
+        try:
+            conexion.close()
+        except OSError:
+            pass
+        return resultado
+
+    def descubrir(self, todas=False):
+        """Regresa los Arduino encontrados (el primero si todas=False)
+
+        Los puertos conocidos por su huella no se abren; los desconocidos se
+        prueban en paralelo y, sin todas, se regresa con el primero que
+        responde. Las pruebas que siguen en curso terminan en segundo plano:
+        un hilo recoge sus resultados y cierra los Arduino que respondan
+        tarde (no se guardan en la caché).
+        """
+        inicio = time.perf_counter()
+        encontrados, desconocidos = [], []
+        for puerto, huella in self.listar():
+            conocido = self.cache.get(huella)
+            if conocido is None or conocido.get('expira', float('inf')) < time.time():
+                desconocidos.append((puerto, huella))
+            elif conocido.get('es_arduino'):
+                encontrados.append(Dispositivo(puerto, huella, conocido.get('baudios', self.baudios),
+                                               conocido.get('version', ''), conocido.get('ack', False),
+                                               desde_cache=True))
+
+        self.probados = 0
+        if desconocidos and (todas or not encontrados):
+            encontrados += self._probar_en_paralelo(desconocidos, todas)
+
+        self.duracion = time.perf_counter() - inicio
+        return encontrados if todas else encontrados[:1]
+
+    def _probar_en_paralelo(self, puertos, todas):
+        resultados = queue.Queue()
+
+        def probar(puerto, huella):
+            resultados.put((puerto, huella, self.probar(puerto, huella)))
+
+        for puerto, huella in puertos:
+            threading.Thread(target=probar, args=(puerto, huella), daemon=True).start()
+        self.probados = len(puertos)
+
+        encontrados = []
+        pendientes = len(puertos)
+        while pendientes:
+            puerto, huella, dispositivo = resultados.get()
+            pendientes -= 1
+            if dispositivo is None:
+                continue
+            if dispositivo:
+                self.cache[huella] = dispositivo.huella_cache()
+                encontrados.append(dispositivo)
+            else:
+                self.cache[huella] = {'puerto': puerto, 'es_arduino': False,
+                                      'visto': time.strftime('%Y-%m-%d %H:%M:%S'),
+                                      'expira': time.time() + VIGENCIA_DESCARTE}
+            if encontrados and not todas:
+                break
+        if pendientes:
+            threading.Thread(target=self._cerrar_sobrantes, args=(resultados, pendientes),
+                             daemon=True).start()
+        self._guardar_cache()
+        return encontrados
+
+    @staticmethod
+    def _cerrar_sobrantes(resultados, pendientes):
+        """Espera las pruebas que quedaron en curso y cierra los puertos que abrieron"""
+        for _ in range(pendientes):
+            dispositivo = resultados.get()[2]
+            if dispositivo and dispositivo.conexion:
+                try:
+                    dispositivo.conexion.close()
+                except OSError:
+                    pass
+
+
+def main():
+    """Descubre placas emuladas entre puertos ajenos y mudos, con y sin caché"""
+    import tempfile
+
+    from emulador_arduino import EmuladorArduino
+
+    class PuertoAjeno:
+        """Dispositivo serie que no es el sketch: GPS (emite NMEA) o mudo"""
+        def __init__(self, port, linea=b''):
+            self.port, self.timeout, self.is_open, self.linea = port, None, True, linea
+        def read(self, size=1):
+            time.sleep(self.timeout or 0)
+            return b''
+        def readline(self):
+            if self.linea:
+                time.sleep(0.05)
+                return self.linea
+            return self.read()
+        def write(self, datos):
+            return len(datos)
+        def reset_input_buffer(self):
+            pass
+        def close(self):
+            self.is_open = False
+
+    mudos = [(f"/dev/ttyUSB{i}", f"USB 0403:6001 MUDO{i}") for i in range(8, 12)]
+    puertos = [(f"/dev/ttyUSB{i}", f"USB 0403:6001 GPS{i}") for i in range(8)] + mudos
+    puertos += [('EMULADOR-1', 'USB 2341:0042 EMU1'), ('EMULADOR-2', 'USB 2341:0042 EMU2')]
+
+    huellas = dict(puertos)
+
+    def abrir(puerto, baudios, timeout):
+        if puerto.startswith('EMULADOR'):
+            return EmuladorArduino(puerto, baudrate=baudios, timeout=timeout)
+        if (puerto, huellas[puerto]) in mudos:
+            return PuertoAjeno(puerto)
+        return PuertoAjeno(puerto, b'$GPGGA,,,,,,0,00,,,M,,M,,*66\r\n')
+
+    with tempfile.TemporaryDirectory() as directorio:
+        cache = os.path.join(directorio, ARCHIVO_CACHE)
+        print(f"\n{'CORRIDA':^16} | {'TODAS':^5} | {'PROBADOS':^8} | {'ENCONTRADOS':^11} | {'TIEMPO s':^8}")
+        print("-" * 60)
+        for nombre, todas in (('sin caché', True), ('con caché', True), ('con caché', False)):
+            descubridor = DescubridorPuertos(cache, listar=lambda: puertos, abrir=abrir)
+            dispositivos = descubridor.descubrir(todas)
+            print(f"{nombre:^16} | {'sí' if todas else 'no':^5} | {descubridor.probados:^8} | "
+                  f"{len(dispositivos):^11} | {descubridor.duracion:^8.3f}")
+            for dispositivo in dispositivos:
+                if dispositivo.conexion:
+                    dispositivo.conexion.close()
+        print(f"\nHuella guardada de {puertos[-1][0]}: {descubridor.cache[puertos[-1][1]]}")
+        print(f"Descartados: {sum(not d['es_arduino'] for d in descubridor.cache.values())} "
+              f"(los {len(mudos)} mudos se vuelven a probar)")
+
+
+if __name__ == "__main__":
+    main()
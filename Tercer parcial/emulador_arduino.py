@@ -0,0 +1,467 @@
+#!/usr/bin/env python3
+"""
+EMULADOR DE ARDUINO MEGA
+Dispositivo serial simulado con la misma interfaz que serial.Serial
+Permite ejecutar y medir sistema_completo_clase.py sin placa conectada
+
+Comandos soportados (igual que el sketch):
+    t          Test de comunicación
+    r          Reset de filtros
+    0 / 1 / 2  Selección de filtro (directo / FIR / IIR)
+    3          Vuelve a activar el último filtro cargado por trama (ERR si no hay)
+    c          Iniciar captura
+    b          Capacidad del buffer (BUFFER:<n>)
+    p          Ping de keep-alive (solo ACK)
+    B:<baud>   Cambia de velocidad tras el ACK; vuelve a la anterior si no
+               llega B:OK a la nueva velocidad antes de TIEMPO_CONFIRMACION
+    ECO:<txt>  Loopback: regresa la misma línea (sin ACK)
+    DATA:<v>   Muestra ADC (0-1023)
+    s          Enviar datos capturados en CSV
+    Tramas binarias de protocolo_binario.py (en orden de secuencia: un lote
+               fuera de orden se rechaza con TIPO_ERROR y un lote repetido
+               se contesta con la respuesta guardada, sin volver a filtrarlo;
+               una trama de coeficientes reemplaza el filtro activo)
+
+Con con_ack=True envía READY al arrancar y ACK:<cmd> al terminar cada
+comando de control (ver capa_comandos.py).
+
+La UART del ATmega2560 (16 MHz, U2X) no genera todas las velocidades con
+exactitud: con error de divisor mayor al 2.5 % los bytes se corrompen, igual
+que por encima de baudios_maximos (límite del puente USB/cable).
+"""
+
+import threading
+import time
+
+import numpy as np
+
+import protocolo_binario
+from filtros_punto_fijo import (crear_filtro, NOMBRES_FILTRO, FILTRO_DIRECTO, FILTRO_CARGADO,
+                                MAXIMO_TAPS_FIR, MAXIMO_SECCIONES_IIR)
+
+BITS_POR_BYTE = 10  # 8N1: inicio + 8 datos + parada
+F_CPU = 16_000_000
+ERROR_DIVISOR_TOLERADO = 0.025
+TIEMPO_CONFIRMACION = 1.0  # s para recibir B:OK tras un cambio de velocidad
+RESPUESTAS_GUARDADAS = 4   # últimas respuestas binarias disponibles para reenvío
+
+
+def error_divisor(baudios):
+    """Error relativo de la velocidad real de la UART (modo U2X) contra la pedida"""
+    ubrr = max(0, round(F_CPU / (8 * baudios)) - 1)
+    real = F_CPU / (8 * (ubrr + 1))
+    return abs(real / baudios - 1)
+
+
+class EmuladorArduino:
+    def __init__(self, port='EMULADOR', baudrate=115200, timeout=3,
+                 retardo_arranque=1.6, retardo_comando=1e-4, retardo_muestra=1e-4,
+                 capacidad_buffer=600, tiempo_real=True, con_ack=True,
+                 baudios_maximos=1_000_000, semilla=None, perdida_respuestas=0.0):
+        self.port = port
+        self.baudrate = baudrate
+        self.timeout = timeout
+        self.retardo_comando = retardo_comando   # s por comando interpretado
+        self.retardo_muestra = retardo_muestra   # s de cálculo por muestra filtrada
+        self.capacidad_buffer = capacidad_buffer
+        self.tiempo_real = tiempo_real
+        self.con_ack = con_ack
+        self.baudios_maximos = baudios_maximos
+        self.perdida_respuestas = perdida_respuestas  # fracción de respuestas de datos perdidas
+        self.is_open = True
+
+        # Velocidad de la UART de la placa (self.baudrate es la del host)
+        self.baudios_placa = baudrate
+        self._baudios_previos = None
+        self._confirmar_antes = None
+        self._rng = np.random.default_rng(semilla)
+
+        self._condicion = threading.Condition()
+        self._recibido = bytearray()   # bytes del host aún sin interpretar
+        self._pendiente = []           # [t_disponible, bytearray, baudios] hacia el host
+        ahora = self._reloj()
+        self._listo_desde = ahora + (retardo_arranque if tiempo_real else 0)
+        self._rx_libre = ahora         # canal host -> Arduino
+        self._tx_libre = ahora         # canal Arduino -> host
+        self._cpu_libre = self._listo_desde
+
+        self.tipo_filtro = FILTRO_DIRECTO
+        self.filtro = crear_filtro(self.tipo_filtro)
+        self.coeficientes = None  # último filtro cargado: (es_fir, bits, valores)
+        self.capturando = False
+        self.entrada = []
+        self.salida = []
+        self._secuencia_esperada = None  # None: se acepta cualquiera (tras 'r')
+        self._respuestas = {}            # secuencia -> trama de respuesta
+        if con_ack:
+            self._emitir("READY\n", self._listo_desde)
+
+    # ------------------------------------------------------------------
+    # Interfaz tipo serial.Serial
+    # ------------------------------------------------------------------
+
+    def _reloj(self):
+        return time.monotonic()
+
+    def _duracion_bytes(self, n, baudios=None):
+        if not self.tiempo_real:
+            return 0.0
+        return n * BITS_POR_BYTE / (baudios or self.baudios_placa)
+
+    def _disponibles(self, ahora):
+        """Bytes que ya 'llegaron' al host a la hora indicada"""
+        total = 0
+        for t_inicio, datos, baudios in self._pendiente:
+            if not self.tiempo_real:
+                total += len(datos)
+                continue
+            if ahora < t_inicio:
+                break
+            llegados = int((ahora - t_inicio) * baudios / BITS_POR_BYTE)
+            total += min(len(datos), llegados)
+            if llegados < len(datos):
+                break
+        return total
+
+    def _tomar(self, n):
+        """Extrae n bytes del inicio de la cola de salida"""
+        extraido = bytearray()
+        while n > 0 and self._pendiente:
+            bloque = self._pendiente[0]
+            parte = bloque[1][:n]
+            if bloque[2] != self.baudrate:
+                # Host a otra velocidad: solo llega basura
+                parte = bytearray(b ^ 0xA5 for b in parte)
+            extraido.extend(parte)
+            del bloque[1][:len(parte)]
+            bloque[0] += self._duracion_bytes(len(parte), bloque[2])
+            n -= len(parte)
+            if not bloque[1]:
+                self._pendiente.pop(0)
+        return bytes(extraido)
+
+    def _proximo_byte(self):
+        """Hora a la que llega el siguiente byte pendiente"""
+        if not self._pendiente:
+            return None
+        return self._pendiente[0][0] + self._duracion_bytes(1, self._pendiente[0][2])
+
+    def _esperar(self, limite):
+        """Espera sin consumir CPU hasta el siguiente byte o el límite"""
+        candidatos = [t for t in (self._proximo_byte(), limite) if t is not None]
+        espera = max(0.0, min(candidatos) - self._reloj()) if candidatos else None
+        self._condicion.wait(espera)
+
+    @property
+    def in_waiting(self):
+        with self._condicion:
+            return self._disponibles(self._reloj())
+
+    def read(self, size=1):
+        self._verificar_abierto()
+        limite = None if self.timeout is None else self._reloj() + self.timeout
+        datos = bytearray()
+        with self._condicion:
+            while len(datos) < size:
+                n = min(size - len(datos), self._disponibles(self._reloj()))
+                if n:
+                    datos.extend(self._tomar(n))
+                    continue
+                if limite is not None and self._reloj() >= limite:
+                    break
+                self._esperar(limite)
+        return bytes(datos)
+
+    def readline(self):
+        self._verificar_abierto()
+        limite = None if self.timeout is None else self._reloj() + self.timeout
+        linea = bytearray()
+        with self._condicion:
+            while True:
+                n = self._disponibles(self._reloj())
+                if n:
+                    bloque = bytes(self._pendiente[0][1][:n])
+                    fin = bloque.find(b'\n')
+                    linea.extend(self._tomar(len(bloque) if fin < 0 else fin + 1))
+                    if fin >= 0:
+                        break
+                    continue
+                if limite is not None and self._reloj() >= limite:
+                    break
+                self._esperar(limite)
+        return bytes(linea)
+
+    def _verificar_abierto(self):
+        if not self.is_open:
+            raise OSError(f"Puerto {self.port} cerrado")
+
+    def simular_desconexion(self):
+        """Simula que el cable USB se desconecta"""
+        self.close()
+
+    def write(self, datos):
+        self._verificar_abierto()
+        datos = bytes(datos)
+        with self._condicion:
+            self._revisar_confirmacion(self._reloj())
+            llegada = max(self._reloj(), self._rx_libre) + self._duracion_bytes(len(datos))
+            self._rx_libre = llegada
+            # Lo que llega durante el arranque (bootloader) o a otra velocidad
+            # (errores de trama) se pierde
+            if llegada >= self._listo_desde and self.baudrate == self.baudios_placa:
+                self._recibido.extend(self._corromper(datos))
+                self._interpretar(llegada)
+            self._condicion.notify_all()
+        return len(datos)
+
+    def reset_input_buffer(self):
+        with self._condicion:
+            self._tomar(self._disponibles(self._reloj()))
+
+    def reset_output_buffer(self):
+        pass
+
+    def flush(self):
+        pass
+
+    def close(self):
+        self.is_open = False
+        with self._condicion:
+            self._condicion.notify_all()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
+
+    # ------------------------------------------------------------------
+    # Lógica del sketch
+    # ------------------------------------------------------------------
+
+    def _emitir(self, datos, listo):
+        """Programa bytes de respuesta a partir del instante 'listo'"""
+        if isinstance(datos, str):
+            datos = datos.encode()
+        inicio = max(listo, self._tx_libre)
+        self._pendiente.append([inicio, bytearray(self._corromper(datos)), self.baudios_placa])
+        self._tx_libre = inicio + self._duracion_bytes(len(datos))
+
+    def probabilidad_error(self, baudios=None):
+        """Probabilidad de corromper un byte a la velocidad actual de la placa"""
+        baudios = baudios or self.baudios_placa
+        if baudios > self.baudios_maximos:
+            return 0.02
+        error = error_divisor(baudios)
+        if error <= ERROR_DIVISOR_TOLERADO:
+            return 0.0
+        return min(1.0, 10 * error)
+
+    def _corromper(self, datos):
+        """Invierte bits al azar según la probabilidad de error del enlace"""
+        probabilidad = self.probabilidad_error()
+        if not probabilidad or not datos:
+            return datos
+        valores = np.frombuffer(datos, dtype=np.uint8).copy()
+        errores = self._rng.random(len(valores)) < probabilidad
+        valores[errores] ^= self._rng.integers(1, 256, int(errores.sum()), dtype=np.uint8)
+        return valores.tobytes()
+
+    def _revisar_confirmacion(self, ahora):
+        """Sin B:OK a tiempo la placa regresa a la velocidad anterior"""
+        if self._confirmar_antes is not None and ahora > self._confirmar_antes:
+            self.baudios_placa = self._baudios_previos
+            self._confirmar_antes = None
+
+    def _cambiar_baudios(self, argumento, listo):
+        if argumento == 'OK':
+            self._confirmar_antes = None
+            self._emitir("ACK:B:OK\n", listo)
+            return
+        try:
+            baudios = int(argumento)
+        except ValueError:
+            baudios = 0
+        if baudios <= 0:
+            self._emitir(f"ERR:B:{argumento}\n", listo)
+            return
+        # El ACK sale a la velocidad actual; después cambia la UART
+        self._emitir(f"ACK:B:{baudios}\n", listo)
+        self._baudios_previos = self.baudios_placa
+        self.baudios_placa = baudios
+        self._confirmar_antes = self._tx_libre + TIEMPO_CONFIRMACION
+
+    def _procesar(self, llegada, muestras=0):
+        """Reserva la CPU del Arduino y regresa cuándo termina de procesar"""
+        costo = self.retardo_comando + muestras * self.retardo_muestra
+        if not self.tiempo_real:
+            costo = 0.0
+        self._cpu_libre = max(llegada, self._cpu_libre) + costo
+        return self._cpu_libre
+
+    def _interpretar(self, llegada):
+        """Consume comandos completos del buffer de recepción"""
+        while self._recibido:
+            if self._recibido[0] == protocolo_binario.SINCRONIA[0]:
+                if len(self._recibido) < 2:
+                    return
+                if self._recibido[:2] != protocolo_binario.SINCRONIA:
+                    del self._recibido[0]
+                    continue
+                if not self._atender_trama(llegada):
+                    return
+                continue
+
+            fin = self._recibido.find(b'\n')
+            if fin < 0:
+                return
+            linea = self._recibido[:fin].decode(errors='replace').strip()
+            del self._recibido[:fin + 1]
+            if linea:
+                self._atender_linea(linea, llegada)
+
+    def _atender_linea(self, linea, llegada):
+        if linea.startswith('DATA:'):
+            try:
+                muestra = int(linea[5:])
+            except ValueError:
+                return
+            listo = self._procesar(llegada, 1)
+            if self.capturando and len(self.entrada) < self.capacidad_buffer:
+                self.entrada.append(muestra)
+                self.salida.append(self.filtro.procesar_muestra(muestra))
+            return
+
+        listo = self._procesar(llegada)
+        if linea.startswith('ECO:'):
+            self._emitir(linea + "\n", listo)
+            return
+        if linea.startswith('B:'):
+            self._cambiar_baudios(linea[2:], listo)
+            return
+        if linea == 't':
+            self._emitir("ARDUINO MEGA - FILTROS DIGITALES\n"
+                         "COMUNICACIÓN OK\n"
+                         f"Filtro actual: {NOMBRES_FILTRO[self.tipo_filtro]}\n"
+                         f"Buffer: {self.capacidad_buffer} muestras\n", listo)
+        elif linea == 'r':
+            self.filtro.reiniciar()
+            self.entrada, self.salida = [], []
+            self.capturando = False
+            self._secuencia_esperada = None
+            self._respuestas = {}
+            self._emitir("RESET OK\n", listo)
+        elif linea in ('0', '1', '2'):
+            self.tipo_filtro = int(linea)
+            self.filtro = crear_filtro(self.tipo_filtro)
+            self._emitir(f"Filtro seleccionado: {NOMBRES_FILTRO[self.tipo_filtro]}\n", listo)
+        elif linea == '3' and self.coeficientes is not None:
+            self.tipo_filtro = FILTRO_CARGADO
+            self.filtro = crear_filtro(FILTRO_CARGADO, self.coeficientes)
+            self._emitir(f"Filtro seleccionado: {NOMBRES_FILTRO[self.tipo_filtro]}\n", listo)
+        elif linea == 'c':
+            self.entrada, self.salida = [], []
+            self.capturando = True
+            self._emitir("CAPTURA INICIADA\n", listo)
+        elif linea == 'p':
+            pass
+        elif linea == 'b':
+            self._emitir(f"BUFFER:{self.capacidad_buffer}\n", listo)
+        elif linea == 's':
+            self.capturando = False
+            if not self.perdida_respuestas or self._rng.random() >= self.perdida_respuestas:
+                self._emitir(protocolo_binario.codificar_respuesta_ascii(self.entrada, self.salida), listo)
+        else:
+            self._emitir(f"COMANDO DESCONOCIDO: {linea}\n", listo)
+            if self.con_ack:
+                self._emitir(f"ERR:{linea}\n", listo)
+            return
+
+        if self.con_ack and linea != 's':
+            self._emitir(f"ACK:{linea}\n", listo)
+
+    def _atender_trama(self, llegada):
+        """Procesa una trama binaria completa; False si aún no llega entera"""
+        buffer = self._recibido
+        if len(buffer) < protocolo_binario.TAMAÑO_CABECERA:
+            return False
+        tipo, secuencia, n, formato = protocolo_binario.CABECERA.unpack_from(buffer, 2)
+        largo = (protocolo_binario.TAMAÑO_CABECERA +
+                 protocolo_binario.longitud_datos(tipo, n, formato) +
+                 protocolo_binario.TAMAÑO_CRC)
+        if len(buffer) < largo:
+            return False
+
+        trama = bytes(buffer[:largo])
+        del buffer[:largo]
+        campos = protocolo_binario.analizar_trama(trama)
+        if campos is None:
+            listo = self._procesar(llegada)
+            self._emitir(protocolo_binario.construir_trama(
+                protocolo_binario.TIPO_ERROR, secuencia, 0, 0), listo)
+            return True
+
+        if tipo == protocolo_binario.TIPO_COEFICIENTES:
+            self._cargar_coeficientes(campos, llegada)
+            return True
+
+        if tipo == protocolo_binario.TIPO_DATOS:
+            if secuencia in self._respuestas:
+                # Retransmisión: el lote ya se filtró, se reenvía la respuesta
+                respuesta = self._respuestas[secuencia]
+                listo = self._procesar(llegada)
+            elif self._secuencia_esperada not in (None, secuencia):
+                # Falta un lote anterior: se rechaza para no desordenar el filtro
+                listo = self._procesar(llegada)
+                self._emitir(protocolo_binario.construir_trama(
+                    protocolo_binario.TIPO_ERROR, secuencia, 0, 0), listo)
+                return True
+            else:
+                muestras = protocolo_binario.decodificar_lote(formato, n, campos[4])
+                muestras = muestras[:self.capacidad_buffer]
+                salida = self.filtro.procesar_lote(muestras)
+                listo = self._procesar(llegada, len(muestras))
+                respuesta = protocolo_binario.codificar_respuesta(
+                    secuencia, muestras, salida, protocolo_binario.formato_respuesta(formato))
+                self._secuencia_esperada = (secuencia + 1) & 0xFFFF
+                self._respuestas[secuencia] = respuesta
+                if len(self._respuestas) > RESPUESTAS_GUARDADAS:
+                    del self._respuestas[next(iter(self._respuestas))]
+            if not self.perdida_respuestas or self._rng.random() >= self.perdida_respuestas:
+                self._emitir(respuesta, listo)
+        return True
+
+    def _cargar_coeficientes(self, campos, llegada):
+        """Reemplaza el filtro activo por los coeficientes de la trama"""
+        _, secuencia, n, formato, datos = campos
+        tipo, bits, valores = protocolo_binario.decodificar_coeficientes(formato, n, datos)
+        es_fir = tipo == protocolo_binario.COEF_FIR
+        valido = (bits > 0 and n > 0 and
+                  (n <= MAXIMO_TAPS_FIR if es_fir else
+                   tipo == protocolo_binario.COEF_IIR and n % 5 == 0 and n // 5 <= MAXIMO_SECCIONES_IIR))
+        listo = self._procesar(llegada, n)
+        if not valido:
+            self._emitir(protocolo_binario.construir_trama(
+                protocolo_binario.TIPO_ERROR, secuencia, n, formato), listo)
+            return
+        self.coeficientes = (es_fir, bits, valores)
+        self.tipo_filtro = FILTRO_CARGADO
+        self.filtro = crear_filtro(FILTRO_CARGADO, self.coeficientes)
+        self._emitir(protocolo_binario.construir_trama(
+            protocolo_binario.TIPO_CONFIRMACION, secuencia, n, formato), listo)
+
+
+def main():
+    """Ejecuta el sistema completo usando el emulador en lugar de la placa"""
+    from sistema_completo_clase import SistemaCompletoClase
+
+    sistema = SistemaCompletoClase('EMULADOR')
+    try:
+        sistema.menu_principal_clase()
+    finally:
+        if sistema.arduino and sistema.arduino.is_open:
+            sistema.arduino.close()
+
+
+if __name__ == "__main__":
+    main()
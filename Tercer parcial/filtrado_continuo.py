@@ -0,0 +1,212 @@
+#!/usr/bin/env python3
+"""
+FILTRADO CONTINUO POR BLOQUES
+Filtros FIR e IIR que conservan su estado entre bloques de cualquier tamaño,
+para filtrar grabaciones de cualquier duración con memoria constante
+
+    FiltroFIR   guarda las últimas taps-1 muestras de entrada (el equivalente
+                a zi de lfilter) y las antepone al bloque siguiente
+    FiltroSOS   (filtros_sos.py) sosfilt con zi por sección
+
+La salida concatenada es idéntica bit a bit a una sola llamada sobre la
+señal completa (signal.lfilter(h, 1, x) o signal.sosfilt(sos, x)), sin
+importar cómo se corte la entrada. Excepción: en FIR largos ConvolucionFIR
+convoluciona por FFT los bloques grandes, y ahí la salida coincide con
+lfilter solo hasta el redondeo (~1e-15).
+
+El WAV se lee por bloques desde un mapa en memoria del archivo (no se carga
+completo) y la salida se escribe bloque a bloque con EscritorWAV.
+"""
+
+import os
+import time
+import wave
+
+import numpy as np
+from scipy import signal
+from scipy.io import wavfile
+
+from banco_filtros import normalizar_diseño
+from convolucion_fir import ConvolucionFIR
+from filtros_sos import FiltroSOS
+
+BLOQUE_LECTURA = 8192  # muestras por bloque leído del WAV
+
+
+class FiltroFIR:
+    def __init__(self, h):
+        self.h = np.asarray(h, dtype=float)
+        self.convolucion = ConvolucionFIR(self.h)  # directa o FFT según taps y bloque
+        self.historia = np.zeros(0)  # últimas taps-1 muestras de entrada
+
+    def procesar(self, bloque):
+        """Filtra un bloque continuando la historia del anterior"""
+        bloque = np.asarray(bloque, dtype=float)
+        if not len(bloque):
+            return np.zeros(0)
+        taps = len(self.h)
+        entrada = np.concatenate([self.historia, bloque])
+        # Método directo: lfilter(h, 1, x) es np.convolve(h, x), y con la
+        # historia delante cada salida suma los mismos productos en el mismo
+        # orden que la llamada completa. Con taps muestras o menos np.convolve
+        # intercambia los operandos (y el orden de la suma); los ceros al final
+        # no tocan las salidas que se regresan.
+        relleno = max(0, taps + 1 - len(entrada))
+        salida = self.convolucion.aplicar(np.concatenate([entrada, np.zeros(relleno)]))
+        self.historia = entrada[max(0, len(entrada) - (taps - 1)):].copy()
+        return salida[len(entrada) - len(bloque):len(entrada)]
+
+    def reiniciar(self):
+        self.historia = np.zeros(0)
+
+
+def filtro_continuo(diseño):
+    """FiltroFIR o FiltroSOS para un diseño h, (b, a) o sos"""
+    tipo, coeficientes = normalizar_diseño(diseño)
+    return FiltroFIR(coeficientes) if tipo == 'fir' else FiltroSOS(coeficientes)
+
+
+def a_flotante(datos):
+    """Muestras del WAV a float en [-1, 1), mono (promedio de canales)"""
+    if datos.dtype == np.uint8:
+        audio = (datos.astype(float) - 128) / 128
+    elif np.issubdtype(datos.dtype, np.integer):
+        audio = datos.astype(float) / -np.iinfo(datos.dtype).min
+    else:
+        audio = datos.astype(float)
+    return audio.mean(axis=1) if audio.ndim > 1 else audio
+
+
+def info_wav(archivo):
+    """(fs, muestras, canales) sin leer el audio"""
+    fs, datos = wavfile.read(archivo, mmap=True)
+    return fs, len(datos), 1 if datos.ndim == 1 else datos.shape[1]
+
+
+def bloques_wav(archivo, bloque=BLOQUE_LECTURA):
+    """Genera el audio del WAV en bloques de 'bloque' muestras (float, mono)"""
+    _, datos = wavfile.read(archivo, mmap=True)
+    for inicio in range(0, len(datos), bloque):
+        yield a_flotante(datos[inicio:inicio + bloque])
+
+
+def filtrar_bloques(bloques, filtros):
+    """Por cada bloque de entrada genera las salidas apiladas (n_filtros, n)"""
+    for bloque in bloques:
+        yield np.array([filtro.procesar(bloque) for filtro in filtros])
+
+
+def filtrar_wav(archivo, diseños, bloque=BLOQUE_LECTURA):
+    """Genera (entrada, salidas) por bloque del WAV; diseños a la fs del archivo"""
+    filtros = [filtro_continuo(diseño) for diseño in diseños]
+    for entrada in bloques_wav(archivo, bloque):
+        yield entrada, np.array([filtro.procesar(entrada) for filtro in filtros])
+
+
+class EscritorWAV:
+    """WAV mono de 16 bits escrito bloque a bloque"""
+
+    def __init__(self, ruta, fs):
+        self.ruta = ruta
+        self.archivo = wave.open(ruta, 'wb')
+        self.archivo.setnchannels(1)
+        self.archivo.setsampwidth(2)
+        self.archivo.setframerate(int(fs))
+        self.muestras = 0
+
+    def escribir(self, bloque):
+        muestras = np.int16(np.clip(bloque, -1, 1) * 32767)
+        self.archivo.writeframes(muestras.astype('<i2').tobytes())
+        self.muestras += len(muestras)
+
+    def cerrar(self):
+        self.archivo.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *excepcion):
+        self.cerrar()
+
+
+def benchmark_continuo(minutos=10, fs=8000, bloque=BLOQUE_LECTURA):
+    """Grabación larga: carga completa + una llamada contra filtrado por bloques"""
+    import tempfile
+    import tracemalloc
+
+    from filtros_sos import diseñar_iir
+    from registro_diseños import diseñar_fir
+
+    h = diseñar_fir(41, 800, fs)
+    sos = diseñar_iir(6, 800, fs)
+    muestras = int(minutos * 60 * fs)
+
+    def medir(funcion):
+        tracemalloc.start()
+        inicio = time.perf_counter()
+        resultado = funcion()
+        duracion = time.perf_counter() - inicio
+        pico = tracemalloc.get_traced_memory()[1]
+        tracemalloc.stop()
+        return duracion, pico, resultado
+
+    with tempfile.TemporaryDirectory() as directorio:
+        archivo = os.path.join(directorio, 'larga.wav')
+        rng = np.random.default_rng(0)
+        with EscritorWAV(archivo, fs) as escritor:
+            for inicio in range(0, muestras, fs):
+                n = min(fs, muestras - inicio)
+                t = (inicio + np.arange(n)) / fs
+                escritor.escribir(0.4 * np.sin(2*np.pi*300*t) + 0.1 * rng.standard_normal(n))
+
+        def completa():
+            _, datos = wavfile.read(archivo)
+            x = a_flotante(datos)
+            y_fir, y_iir = signal.lfilter(h, 1, x), signal.sosfilt(sos, x)
+            # Resumen por bloques para comparar sin guardar la salida por bloques
+            return [np.concatenate([y_fir[i:i + bloque], y_iir[i:i + bloque]]).sum()
+                    for i in range(0, len(x), bloque)], y_fir, y_iir
+
+        def por_bloques():
+            with EscritorWAV(os.path.join(directorio, 'fir.wav'), fs) as salida:
+                resumen = []
+                for _, (y_fir, y_iir) in filtrar_wav(archivo, [h, sos], bloque):
+                    salida.escribir(y_fir)
+                    resumen.append(np.concatenate([y_fir, y_iir]).sum())
+            return resumen
+
+        t_completa, pico_completa, (resumen_completa, y_fir, y_iir) = medir(completa)
+        t_bloques, pico_bloques, resumen_bloques = medir(por_bloques)
+
+        # Cortes irregulares (incluye bloques de 1 muestra): misma salida exacta
+        x = a_flotante(wavfile.read(archivo)[1][:fs * 30])
+        cortes = np.unique(np.concatenate([[0, 1, 2, 3, 50, len(x)],
+                                           rng.integers(0, len(x), 400)]))
+        filtros = [FiltroFIR(h), FiltroSOS(sos)]
+        salidas = np.concatenate(list(filtrar_bloques((x[a:b] for a, b in zip(cortes[:-1], cortes[1:])),
+                                                      filtros)), axis=1)
+        identica = (np.array_equal(salidas[0], y_fir[:len(x)]) and
+                    np.array_equal(salidas[1], y_iir[:len(x)]) and resumen_bloques == resumen_completa)
+
+        # FIR largo: los bloques grandes van por FFT, igual salvo redondeo
+        h_largo = diseñar_fir(1023, 800, fs)
+        filtro_largo = FiltroFIR(h_largo)
+        largo = np.concatenate([filtro_largo.procesar(x[a:b]) for a, b in zip(cortes[:-1], cortes[1:])])
+        error_largo = np.max(np.abs(largo - signal.lfilter(h_largo, 1, x)))
+
+    print(f"\nFILTRADO CONTINUO ({minutos} min a {fs} Hz, FIR 41 + Butterworth 6 en sos):")
+    print(f"{'MÉTODO':^22} | {'TIEMPO s':^8} | {'MEMORIA PICO MiB':^16}")
+    print("-" * 52)
+    print(f"{'archivo completo':^22} | {t_completa:^8.2f} | {pico_completa / 2**20:^16.1f}")
+    print(f"{f'bloques de {bloque}':^22} | {t_bloques:^8.2f} | {pico_bloques / 2**20:^16.1f}")
+    print(f"   Salida idéntica bit a bit (también con cortes irregulares): {'sí' if identica else 'NO'}")
+    print(f"   FIR de 1023 taps (FFT en bloques grandes): error máximo {error_largo:.1e}")
+    return identica
+
+
+def main():
+    benchmark_continuo()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,198 @@
+#!/usr/bin/env python3
+"""
+FILTROS EN PUNTO FIJO DEL SKETCH ARDUINO
+Réplica en Python de la aritmética entera del Arduino Mega
+Usado por emulador_arduino.py para reproducir la salida de la placa y por
+verificacion_referencia.py como modelo de referencia bit a bit
+
+Convenciones del sketch:
+    • Entrada ADC de 10 bits (0-1023), centrada restando 512
+    • FIR: 41 coeficientes Q15 (Hamming, fc = 800 Hz @ 8 kHz), acumulador de 32 bits
+    • IIR: Butterworth orden 6 como 3 secciones bicuadráticas Q14 (forma directa I)
+    • Salida recentrada en 512 y saturada a 0-1023
+"""
+
+import numpy as np
+from scipy import signal
+
+FS_SKETCH = 8000
+FC_SKETCH = 800
+CENTRO_ADC = 512
+MAXIMO_ADC = 1023
+
+BITS_FIR = 15   # Q15
+BITS_IIR = 14   # Q14 (los coeficientes a1 llegan a ±2)
+
+FILTRO_DIRECTO = 0
+FILTRO_FIR = 1
+FILTRO_IIR = 2
+FILTRO_CARGADO = 3  # coeficientes subidos en tiempo de ejecución (carga_coeficientes.py)
+NOMBRES_FILTRO = {FILTRO_DIRECTO: 'SIN FILTRO', FILTRO_FIR: 'FIR', FILTRO_IIR: 'IIR',
+                  FILTRO_CARGADO: 'CARGADO'}
+
+MAXIMO_TAPS_FIR = 128      # RAM reservada en el sketch para un FIR cargado
+MAXIMO_SECCIONES_IIR = 8
+
+
+def cuantizar_fir(h, bits=BITS_FIR):
+    """Cuantiza coeficientes FIR al formato Q15 del sketch"""
+    escala = 1 << bits
+    return np.clip(np.round(np.asarray(h) * escala), -32768, 32767).astype(np.int32)
+
+
+def cuantizar_sos(sos, bits=BITS_IIR):
+    """Cuantiza secciones bicuadráticas [b0 b1 b2 1 a1 a2] a Q14 (sin a0)"""
+    sos = np.asarray(sos, dtype=float)
+    escala = 1 << bits
+    coefs = np.column_stack([sos[:, 0], sos[:, 1], sos[:, 2], sos[:, 4], sos[:, 5]])
+    return np.clip(np.round(coefs * escala), -32768, 32767).astype(np.int32)
+
+
+def repartir_ganancia(sos):
+    """Reparte la ganancia global entre secciones para no perder resolución en b"""
+    sos = np.array(sos, dtype=float)
+    ganancia = np.prod(sos[:, 0])
+    sos[:, :3] /= sos[:, [0]]
+    sos[:, :3] *= np.abs(ganancia) ** (1.0 / len(sos))
+    sos[0, :3] *= np.sign(ganancia)
+    return sos
+
+
+def coeficientes_fir_sketch():
+    """Coeficientes FIR Q15 que usa el sketch (filtro tipo 1)"""
+    h = signal.firwin(41, FC_SKETCH / (FS_SKETCH / 2), window='hamming')
+    return cuantizar_fir(h)
+
+
+def coeficientes_iir_sketch():
+    """Secciones IIR Q14 que usa el sketch (filtro tipo 2)"""
+    sos = signal.butter(6, FC_SKETCH / (FS_SKETCH / 2), btype='low', output='sos')
+    return cuantizar_sos(repartir_ganancia(sos))
+
+
+def _saturar(valor):
+    """Recentra en 512 y satura al rango del ADC"""
+    valor += CENTRO_ADC
+    if valor < 0:
+        return 0
+    if valor > MAXIMO_ADC:
+        return MAXIMO_ADC
+    return valor
+
+
+def _saturar_lote(valores):
+    """_saturar para un arreglo completo"""
+    return np.clip(valores + CENTRO_ADC, 0, MAXIMO_ADC).astype(np.int16)
+
+
+class FiltroFIRPuntoFijo:
+    def __init__(self, coeficientes=None, bits=BITS_FIR):
+        self.h = [int(c) for c in (coeficientes_fir_sketch() if coeficientes is None else coeficientes)]
+        self.bits = bits
+        self.reiniciar()
+
+    def reiniciar(self):
+        """Limpia la línea de retardo (comando 'r')"""
+        self.historia = [0] * len(self.h)
+        self.indice = 0
+
+    def procesar_muestra(self, muestra_adc):
+        """Filtra una muestra ADC igual que el sketch (buffer circular)"""
+        n = len(self.h)
+        self.historia[self.indice] = int(muestra_adc) - CENTRO_ADC
+        acumulador = 0
+        j = self.indice
+        for c in self.h:
+            acumulador += c * self.historia[j]
+            j = j - 1 if j > 0 else n - 1
+        self.indice = self.indice + 1 if self.indice < n - 1 else 0
+        return _saturar((acumulador + (1 << (self.bits - 1))) >> self.bits)
+
+    def procesar_lote(self, muestras_adc):
+        """Filtra un lote completo con una convolución entera (mismo resultado)"""
+        x = np.asarray(muestras_adc, dtype=np.int64) - CENTRO_ADC
+        if not len(x):
+            return np.zeros(0, dtype=np.int16)
+        n = len(self.h)
+        # Línea de retardo ordenada de la más antigua a la más reciente
+        historia = np.array(self.historia[self.indice:] + self.historia[:self.indice], dtype=np.int64)
+        extendida = np.concatenate([historia[1:], x])
+        acumulador = np.convolve(extendida, np.array(self.h, dtype=np.int64), mode='valid')
+        self.historia = extendida[-n:].tolist()
+        self.indice = 0
+        return _saturar_lote((acumulador + (1 << (self.bits - 1))) >> self.bits)
+
+
+class FiltroIIRPuntoFijo:
+    def __init__(self, secciones=None, bits=BITS_IIR):
+        secciones = coeficientes_iir_sketch() if secciones is None else secciones
+        self.secciones = [[int(c) for c in fila] for fila in secciones]
+        self.bits = bits
+        self.reiniciar()
+
+    def reiniciar(self):
+        """Limpia los estados x1, x2, y1, y2 de cada sección"""
+        self.estados = [[0, 0, 0, 0] for _ in self.secciones]
+
+    def procesar_muestra(self, muestra_adc):
+        """Filtra una muestra ADC por la cascada de bicuadráticas"""
+        x = int(muestra_adc) - CENTRO_ADC
+        redondeo = 1 << (self.bits - 1)
+        for (b0, b1, b2, a1, a2), estado in zip(self.secciones, self.estados):
+            x1, x2, y1, y2 = estado
+            acumulador = b0 * x + b1 * x1 + b2 * x2 - a1 * y1 - a2 * y2
+            y = (acumulador + redondeo) >> self.bits
+            estado[:] = [x, x1, y, y1]
+            x = y
+        return _saturar(x)
+
+    def procesar_lote(self, muestras_adc):
+        """Filtra un lote completo sección por sección
+
+        Los términos b se calculan vectorizados; la realimentación con
+        redondeo es recursiva y se resuelve muestra a muestra.
+        """
+        x = np.asarray(muestras_adc, dtype=np.int64) - CENTRO_ADC
+        redondeo = 1 << (self.bits - 1)
+        for (b0, b1, b2, a1, a2), estado in zip(self.secciones, self.estados):
+            x1, x2, y1, y2 = estado
+            if not len(x):
+                break
+            previas = np.concatenate([[x2, x1], x])
+            directa = (b0 * previas[2:] + b1 * previas[1:-1] + b2 * previas[:-2] + redondeo).tolist()
+            y = [0] * len(directa)
+            for k, d in enumerate(directa):
+                y[k] = (d - a1 * y1 - a2 * y2) >> self.bits
+                y1, y2 = y[k], y1
+            estado[:] = [int(previas[-1]), int(previas[-2]), y1, y2]
+            x = np.array(y, dtype=np.int64)
+        return _saturar_lote(x)
+
+
+class FiltroDirecto:
+    def reiniciar(self):
+        pass
+
+    def procesar_muestra(self, muestra_adc):
+        return int(muestra_adc)
+
+    def procesar_lote(self, muestras_adc):
+        return np.asarray(muestras_adc).astype(np.int16)
+
+
+def crear_filtro(tipo_filtro, coeficientes=None):
+    """Crea el filtro del sketch para el tipo 0/1/2
+
+    Para FILTRO_CARGADO, 'coeficientes' es (es_fir, bits, valores) con los
+    valores enteros tal como se subieron a la placa.
+    """
+    if tipo_filtro == FILTRO_CARGADO and coeficientes is not None:
+        es_fir, bits, valores = coeficientes
+        if es_fir:
+            return FiltroFIRPuntoFijo(valores, bits)
+        return FiltroIIRPuntoFijo(np.reshape(valores, (-1, 5)), bits)
+    if tipo_filtro == FILTRO_FIR:
+        return FiltroFIRPuntoFijo()
+    if tipo_filtro == FILTRO_IIR:
+        return FiltroIIRPuntoFijo()
+    return FiltroDirecto()
@@ -0,0 +1,109 @@
+#!/usr/bin/env python3
+"""
+RUTA IIR EN SECCIONES DE SEGUNDO ORDEN (SOS)
+Diseño, filtrado por bloques con estado y respuesta en frecuencia de filtros
+IIR como cascada de bicuadráticas, sin pasar nunca por (b, a)
+
+Con (b, a) los coeficientes de orden alto se vuelven polinomios con raíces
+amontonadas cerca de z = 1: el redondeo en a[] mueve los polos y, con cortes
+bajos, los saca del círculo unitario (el filtro diverge). Cada sección de
+segundo orden solo tiene dos polos, así que la cascada conserva la
+estabilidad del diseño a cualquier orden.
+
+Los diseños salen de registro_diseños.py (memoria y disco, por sus
+parámetros): pedir de nuevo el mismo filtro no vuelve a calcularlo.
+"""
+
+import time
+
+import numpy as np
+from scipy import signal
+
+from registro_diseños import ATENUACION_RECHAZO, RIZADO_PASO, TIPOS_IIR, registro
+
+
+def diseñar_iir(orden=6, fc=800, fs=8000, tipo='butter', btype='low',
+                rp=RIZADO_PASO, rs=ATENUACION_RECHAZO):
+    """Secciones (k, 6) del diseño; fc en Hz (par de valores para banda)"""
+    if tipo not in TIPOS_IIR:
+        raise ValueError(f"Tipo IIR '{tipo}' no soportado ({', '.join(TIPOS_IIR)})")
+    # Copia: quien la reciba puede modificarla sin tocar el diseño guardado
+    return registro().diseño(tipo, orden, fc, fs, btype=btype, rp=rp, rs=rs)
+
+
+def polos_sos(sos):
+    """Polos de todas las secciones"""
+    sos = np.asarray(sos, dtype=float)
+    return np.concatenate([np.roots(seccion[3:]) for seccion in sos])
+
+
+def es_estable(sos):
+    """True si todos los polos están dentro del círculo unitario"""
+    return bool(np.all(np.abs(polos_sos(sos)) < 1))
+
+
+def respuesta_sos(sos, worN=1024, fs=8000):
+    """Equivalente a signal.freqz(b, a) evaluado sección por sección"""
+    return signal.sosfreqz(sos, worN=worN, fs=fs)
+
+
+class FiltroSOS:
+    def __init__(self, sos):
+        self.sos = np.asarray(sos, dtype=float)
+        self.zi = np.zeros((len(self.sos), 2))  # estado en cero, como lfilter
+
+    def procesar(self, bloque):
+        """Filtra un bloque continuando el estado del anterior"""
+        if not len(bloque):
+            return np.zeros(0)
+        salida, self.zi = signal.sosfilt(self.sos, bloque, zi=self.zi)
+        return salida
+
+    def reiniciar(self):
+        self.zi[:] = 0
+
+
+def benchmark_sos(duracion=5.0, fs=8000, repeticiones=5):
+    """(b, a) + lfilter contra SOS + sosfilt en diseños de orden alto y corte bajo"""
+    rng = np.random.default_rng(0)
+    audio = rng.standard_normal(int(duracion * fs))
+
+    def medir(funcion):
+        tiempos = []
+        for _ in range(repeticiones):
+            inicio = time.perf_counter()
+            resultado = funcion()
+            tiempos.append(time.perf_counter() - inicio)
+        return min(tiempos), resultado
+
+    print(f"\nIIR (b, a) CONTRA SECCIONES ({duracion:.0f}s de audio a {fs} Hz):")
+    print(f"{'DISEÑO':^20} | {'|POLO| (b,a)':^12} | {'|POLO| SOS':^10} | {'ERROR (b,a)':^11} | "
+          f"{'LFILTER ms':^10} | {'SOSFILT ms':^10}")
+    print("-" * 88)
+    for tipo, orden, fc in (('butter', 6, 800), ('butter', 10, 100), ('cheby1', 8, 150),
+                            ('ellip', 10, 100), ('butter', 16, 60)):
+        sos = diseñar_iir(orden, fc, fs, tipo)
+        b, a = signal.sos2tf(sos)
+        t_sos, y_sos = medir(lambda: signal.sosfilt(sos, audio))
+        t_tf, y_tf = medir(lambda: signal.lfilter(b, a, audio))
+        error = np.max(np.abs(y_tf - y_sos)) / np.max(np.abs(y_sos))
+        print(f"{f'{tipo} {orden} @ {fc} Hz':^20} | {np.max(np.abs(np.roots(a))):^12.6f} | "
+              f"{np.max(np.abs(polos_sos(sos))):^10.6f} | {error:^11.1e} | "
+              f"{t_tf*1000:^10.2f} | {t_sos*1000:^10.2f}")
+
+    # Por bloques con estado: igual que de una sola vez
+    sos = diseñar_iir(10, 100, fs, 'ellip')
+    filtro = FiltroSOS(sos)
+    por_bloques = np.concatenate([filtro.procesar(audio[i:i + 600]) for i in range(0, len(audio), 600)])
+    print(f"\nPor bloques de 600 contra una pasada: error {np.max(np.abs(por_bloques - signal.sosfilt(sos, audio))):.1e}")
+    inicio = time.perf_counter()
+    diseñar_iir(10, 100, fs, 'ellip')
+    print(f"Diseño repetido (registro en memoria): {(time.perf_counter() - inicio)*1e6:.1f} µs")
+
+
+def main():
+    benchmark_sos()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,100 @@
+#!/usr/bin/env python3
+"""
+CONTROL ADAPTATIVO DEL TAMAÑO DE LOTE
+Ajusta el tamaño de lote según el buffer del Arduino, el throughput medido
+y la tasa de fallos de procesar_lote_individual
+
+Política:
+    • Se sondea la capacidad del buffer con el comando 'b' (BUFFER:<n>)
+    • Se arranca como máximo en 1/4 de la capacidad, para tener por dónde crecer
+    • Lote exitoso sin pérdida de throughput: crece ×1.5 hasta el techo
+    • Lote exitoso con menos throughput que el mejor: regresa al mejor tamaño
+    • Lote fallido: se reduce a la mitad, ese tamaño queda como techo y el
+      mismo tramo se repite con el lote reducido (se aborta en el mínimo)
+    • LOTES_RECUPERACION lotes seguidos sin fallos: el techo sube ×1.5 (hasta
+      la capacidad), así un fallo aislado no limita el resto de la corrida
+
+Solo para el modo secuencial: en pipeline hay varios lotes en vuelo y el
+tamaño no puede cambiar lote a lote.
+"""
+
+CAPACIDAD_DEFECTO = 600   # buffer del sketch original
+TAMAÑO_MINIMO = 50
+FACTOR_CRECIMIENTO = 1.5
+FRACCION_INICIAL = 4       # arranque: capacidad / 4
+TOLERANCIA = 0.95          # fracción del mejor throughput que aún se acepta
+LOTES_RECUPERACION = 8     # lotes seguidos sin fallos para volver a subir el techo
+
+
+class ControladorLote:
+    def __init__(self, comandos=None, tamaño_inicial=None, minimo=TAMAÑO_MINIMO):
+        self.comandos = comandos
+        self.minimo = minimo
+        self.capacidad = CAPACIDAD_DEFECTO
+        self.techo = CAPACIDAD_DEFECTO
+        self.tamaño = tamaño_inicial or CAPACIDAD_DEFECTO
+
+        self.mejor_tamaño = self.tamaño
+        self.mejor_tasa = 0.0
+        self.muestras_ok = 0
+        self.tiempo_total = 0.0
+        self.lotes = 0
+        self.fallos = 0
+        self.seguidos_ok = 0  # lotes exitosos desde el último fallo
+        self.historial = []  # (tamaño, muestras/s, exito)
+
+    def sondear_capacidad(self):
+        """Pregunta al Arduino el tamaño de su buffer de captura"""
+        if self.comandos is not None:
+            ok, lineas = self.comandos.enviar('b')
+            for linea in lineas:
+                if linea.startswith('BUFFER:'):
+                    try:
+                        self.capacidad = int(linea.split(':')[1])
+                    except ValueError:
+                        pass
+        self.techo = self.capacidad
+        self.tamaño = min(self.tamaño, max(self.minimo, self.capacidad // FRACCION_INICIAL))
+        self.mejor_tamaño = self.tamaño
+        print(f"   Capacidad del buffer: {self.capacidad} muestras")
+        return self.tamaño
+
+    def registrar(self, muestras, duracion, exito):
+        """Actualiza el tamaño de lote con el resultado del último lote"""
+        self.lotes += 1
+        self.tiempo_total += duracion
+        tasa = muestras / duracion if exito and duracion > 0 else 0.0
+        self.historial.append((self.tamaño, tasa, exito))
+
+        if not exito:
+            self.fallos += 1
+            self.seguidos_ok = 0
+            self.techo = max(self.minimo, self.tamaño - 1)
+            self.tamaño = max(self.minimo, self.tamaño // 2)
+            return self.tamaño
+
+        self.muestras_ok += muestras
+        self.seguidos_ok += 1
+        if self.seguidos_ok >= LOTES_RECUPERACION and self.techo < self.capacidad:
+            self.techo = min(self.capacidad, int(self.techo * FACTOR_CRECIMIENTO))
+            self.seguidos_ok = 0
+        if tasa >= self.mejor_tasa * TOLERANCIA:
+            if tasa > self.mejor_tasa:
+                self.mejor_tasa = tasa
+                self.mejor_tamaño = self.tamaño
+            self.tamaño = min(self.techo, int(self.tamaño * FACTOR_CRECIMIENTO))
+        else:
+            self.tamaño = min(self.techo, self.mejor_tamaño)
+        return self.tamaño
+
+    def reporte(self):
+        """Imprime el tamaño elegido y el throughput observado"""
+        tasa_global = self.muestras_ok / self.tiempo_total if self.tiempo_total > 0 else 0.0
+        print(f"\nLOTE ADAPTATIVO:")
+        print(f"   Capacidad del buffer: {self.capacidad} muestras")
+        print(f"   Tamaño elegido: {self.mejor_tamaño} muestras")
+        print(f"   Mejor throughput: {self.mejor_tasa:.0f} muestras/s")
+        print(f"   Throughput global: {tasa_global:.0f} muestras/s")
+        print(f"   Lotes fallidos: {self.fallos}/{self.lotes}")
+        return {'tamaño': self.mejor_tamaño, 'muestras_s': tasa_global,
+                'mejor_muestras_s': self.mejor_tasa, 'fallos': self.fallos}
@@ -0,0 +1,268 @@
+#!/usr/bin/env python3
+"""
+MEDICIÓN DE LATENCIA Y JITTER DEL ENLACE ARDUINO
+Envía N pings con marca de tiempo y cargas de M tamaños, mide el tiempo de
+ida y vuelta de cada uno y encuentra la carga más grande que pasa sin
+pérdidas; el reporte JSON permite comparar protocolos, baudios y lotes
+
+Pings:
+    ECO:<n>:<ns>   el sketch regresa la línea; el RTT sale de la marca de
+                   tiempo que vuelve
+    p              sketches sin ECO: tiempo hasta el ACK del comando 'p'.
+                   Se elige con una sonda ECO antes de la primera serie
+
+Cargas:
+    binario   lote de k muestras (protocolo_binario); pasa si la respuesta
+              llega con CRC válido y la entrada reflejada es idéntica
+    ascii     línea ECO de k bytes; pasa si regresa idéntica
+
+Jitter = media de |RTT[i] - RTT[i-1]| (variación entre pings consecutivos).
+"""
+
+import json
+import os
+import time
+
+import numpy as np
+
+import protocolo_binario
+from negociacion_baudios import ALFABETO
+
+BITS_POR_BYTE = 10  # 8N1
+PINGS = 50
+REPETICIONES_CARGA = 5
+TAMAÑOS_BINARIO = [16, 64, 150, 300, 600, 1200, 2400]  # muestras por lote
+TAMAÑOS_ASCII = [16, 64, 128, 256, 512, 1024]          # bytes por línea
+HOLGURA_TIMEOUT = 0.5  # s sobre 4x el tiempo teórico en el cable
+
+
+def estadisticas_rtt(rtts):
+    """Mínimo, percentiles, máximo y jitter en ms de una serie de RTT (s)"""
+    if not len(rtts):
+        return {'rtt_min_ms': None, 'rtt_p50_ms': None, 'rtt_p95_ms': None,
+                'rtt_max_ms': None, 'rtt_media_ms': None, 'jitter_ms': None, 'desviacion_ms': None}
+    ms = np.asarray(rtts) * 1000
+    return {
+        'rtt_min_ms': float(ms.min()),
+        'rtt_p50_ms': float(np.percentile(ms, 50)),
+        'rtt_p95_ms': float(np.percentile(ms, 95)),
+        'rtt_max_ms': float(ms.max()),
+        'rtt_media_ms': float(ms.mean()),
+        'jitter_ms': float(np.abs(np.diff(ms)).mean()) if len(ms) > 1 else 0.0,
+        'desviacion_ms': float(ms.std()),
+    }
+
+
+class MedidorEnlace:
+    def __init__(self, puerto, comandos, protocolo='binario',
+                 formato=protocolo_binario.FORMATO_10BITS):
+        # puerto: tipo serial.Serial (o SesionArduino); comandos: CapaComandos
+        self.puerto = puerto
+        self.comandos = comandos
+        self.protocolo = protocolo
+        self.formato = formato
+        self.secuencia = 0  # de lotes binarios, continua entre tamaños
+        self.eco = None     # el sketch regresa ECO (None = aún no se sondea)
+        self.reporte_actual = None
+
+    def _timeout(self, bytes_ida_vuelta):
+        return HOLGURA_TIMEOUT + 4 * bytes_ida_vuelta * BITS_POR_BYTE / self.puerto.baudrate
+
+    def _leer_linea(self, timeout):
+        timeout_original = self.puerto.timeout
+        self.puerto.timeout = timeout
+        try:
+            return self.puerto.readline()
+        finally:
+            self.puerto.timeout = timeout_original
+
+    # ------------------------------------------------------------------
+    # Pings
+    # ------------------------------------------------------------------
+
+    def soporta_eco(self):
+        """Sonda ECO (una vez por medidor): True si el sketch regresa la línea"""
+        if self.eco is None:
+            sonda = b"ECO:sonda"
+            self.puerto.reset_input_buffer()
+            self.puerto.write(sonda + b"\n")
+            self.eco = self._leer_linea(self._timeout(2 * len(sonda))).strip() == sonda
+            self.puerto.reset_input_buffer()
+        return self.eco
+
+    def medir_pings(self, n=PINGS):
+        """Envía n pings con marca de tiempo; regresa (RTT en s, perdidos)"""
+        if not self.soporta_eco():
+            return self._pings_comando(n)
+        rtts, perdidos = [], 0
+        self.puerto.reset_input_buffer()
+        for i in range(n):
+            linea = f"ECO:{i}:{time.perf_counter_ns()}".encode()
+            self.puerto.write(linea + b"\n")
+            respuesta = self._leer_linea(self._timeout(2 * len(linea)))
+            llegada = time.perf_counter_ns()
+            try:
+                indice, marca = respuesta.strip()[4:].split(b':')
+                if int(indice) != i:
+                    raise ValueError
+            except ValueError:
+                perdidos += 1
+                self.puerto.reset_input_buffer()
+                continue
+            rtts.append((llegada - int(marca)) / 1e9)
+        return rtts, perdidos
+
+    def _pings_comando(self, n):
+        """Sketch sin ECO: tiempo hasta el ACK del comando 'p'"""
+        rtts, perdidos = [], 0
+        for _ in range(n):
+            inicio = time.perf_counter()
+            ok, _ = self.comandos.enviar('p')
+            if ok:
+                rtts.append(time.perf_counter() - inicio)
+            else:
+                perdidos += 1
+        return rtts, perdidos
+
+    # ------------------------------------------------------------------
+    # Cargas
+    # ------------------------------------------------------------------
+
+    def medir_carga(self, tamaño, repeticiones=REPETICIONES_CARGA):
+        """Envía 'repeticiones' cargas de un tamaño; regresa el registro del tamaño"""
+        rtts, perdidas = [], 0
+        bytes_tx = bytes_rx = 0
+        for repeticion in range(repeticiones):
+            if self.protocolo == 'binario':
+                rtt, tx, rx = self._carga_binaria(tamaño, self.secuencia)
+                self.secuencia = (self.secuencia + 1) & 0xFFFF
+            else:
+                rtt, tx, rx = self._carga_ascii(tamaño, repeticion)
+            bytes_tx, bytes_rx = tx, rx
+            if rtt is None:
+                perdidas += 1
+            else:
+                rtts.append(rtt)
+        registro = {'tamaño': tamaño, 'bytes_tx': bytes_tx, 'bytes_rx': bytes_rx,
+                    'repeticiones': repeticiones, 'perdidas': perdidas,
+                    'bytes_s': (bytes_tx + bytes_rx) / np.mean(rtts) if rtts else 0.0}
+        registro.update(estadisticas_rtt(rtts))
+        return registro
+
+    def _carga_binaria(self, tamaño, secuencia):
+        muestras = np.random.default_rng(secuencia).integers(0, 1024, tamaño)
+        trama = protocolo_binario.codificar_lote(muestras, secuencia, self.formato)
+        formato_rx = protocolo_binario.formato_respuesta(self.formato)
+        largo_rx = (protocolo_binario.TAMAÑO_CABECERA + protocolo_binario.TAMAÑO_CRC +
+                    protocolo_binario.longitud_datos(protocolo_binario.TIPO_RESPUESTA, tamaño, formato_rx))
+
+        inicio = time.perf_counter()
+        self.puerto.write(trama)
+        respuesta = protocolo_binario.leer_trama(self.puerto, timeout=self._timeout(len(trama) + largo_rx))
+        rtt = time.perf_counter() - inicio
+        if (respuesta is None or respuesta[0] != protocolo_binario.TIPO_RESPUESTA
+                or respuesta[1] != secuencia or respuesta[2] != tamaño):
+            # Lo que quede en el cable no debe contaminar la siguiente carga
+            time.sleep(HOLGURA_TIMEOUT)
+            self.puerto.reset_input_buffer()
+            return None, len(trama), largo_rx
+        entrada, _ = protocolo_binario.decodificar_respuesta(respuesta[2], respuesta[4], respuesta[3])
+        return (rtt if np.array_equal(entrada, muestras) else None), len(trama), largo_rx
+
+    def _carga_ascii(self, tamaño, semilla):
+        rng = np.random.default_rng(semilla)
+        linea = b"ECO:" + ALFABETO[rng.integers(0, len(ALFABETO), tamaño)].tobytes()
+
+        inicio = time.perf_counter()
+        self.puerto.write(linea + b"\n")
+        respuesta = self._leer_linea(self._timeout(2 * len(linea) + 2))
+        rtt = time.perf_counter() - inicio
+        if respuesta.rstrip(b"\r\n") != linea:
+            time.sleep(HOLGURA_TIMEOUT)
+            self.puerto.reset_input_buffer()
+            return None, len(linea) + 1, len(linea) + 1
+        return rtt, len(linea) + 1, len(respuesta)
+
+    # ------------------------------------------------------------------
+    # Corrida completa y reporte
+    # ------------------------------------------------------------------
+
+    def medir(self, pings=PINGS, tamaños=None, repeticiones=REPETICIONES_CARGA, etiqueta=''):
+        """Pings + barrido de tamaños; regresa el reporte (dict serializable)"""
+        tamaños = tamaños or (TAMAÑOS_BINARIO if self.protocolo == 'binario' else TAMAÑOS_ASCII)
+        rtts, perdidos = self.medir_pings(pings)
+
+        # 'r' reinicia la secuencia esperada por la placa antes de los lotes
+        if self.protocolo == 'binario':
+            self.comandos.enviar('r')
+            self.secuencia = 0
+        cargas = [self.medir_carga(tamaño, repeticiones) for tamaño in tamaños]
+        sin_perdida = [c['tamaño'] for c in cargas if c['perdidas'] == 0]
+
+        self.reporte_actual = {
+            'etiqueta': etiqueta,
+            'fecha': time.strftime('%Y-%m-%d %H:%M:%S'),
+            'puerto': getattr(self.puerto, 'port', ''),
+            'protocolo': self.protocolo,
+            'formato': self.formato if self.protocolo == 'binario' else None,
+            'baudios': self.puerto.baudrate,
+            'unidad_carga': 'muestras' if self.protocolo == 'binario' else 'bytes',
+            'ping': dict(metodo='eco' if self.eco else 'p', enviados=pings, perdidos=perdidos,
+                         **estadisticas_rtt(rtts)),
+            'cargas': cargas,
+            'carga_maxima_sin_perdida': max(sin_perdida) if sin_perdida else None,
+        }
+        return self.reporte_actual
+
+    def reporte(self, reporte=None):
+        """Imprime un reporte de medir()"""
+        r = reporte or self.reporte_actual
+        p = r['ping']
+        print(f"\nENLACE {r['protocolo'].upper()} a {r['baudios']} baudios {r['etiqueta']}".rstrip())
+        if p['rtt_p50_ms'] is not None:
+            print(f"   Ping ({p['metodo']}): p50 {p['rtt_p50_ms']:.2f} ms, p95 {p['rtt_p95_ms']:.2f} ms, "
+                  f"jitter {p['jitter_ms']:.3f} ms, perdidos {p['perdidos']}/{p['enviados']}")
+        print(f"{'TAMAÑO':^7} | {'BYTES TX':^8} | {'BYTES RX':^8} | {'P50 ms':^8} | "
+              f"{'JITTER ms':^9} | {'BYTES/S':^8} | PÉRDIDAS")
+        print("-" * 72)
+        for c in r['cargas']:
+            p50 = f"{c['rtt_p50_ms']:.1f}" if c['rtt_p50_ms'] is not None else '-'
+            jitter = f"{c['jitter_ms']:.2f}" if c['jitter_ms'] is not None else '-'
+            print(f"{c['tamaño']:^7} | {c['bytes_tx']:^8} | {c['bytes_rx']:^8} | {p50:^8} | "
+                  f"{jitter:^9} | {c['bytes_s']:^8.0f} | {c['perdidas']}/{c['repeticiones']}")
+        print(f"   Carga máxima sin pérdida: {r['carga_maxima_sin_perdida']} {r['unidad_carga']}")
+        return r
+
+
+def guardar_reportes(reportes, ruta):
+    """Escribe una lista de reportes de medir() como JSON"""
+    directorio = os.path.dirname(ruta)
+    if directorio:
+        os.makedirs(directorio, exist_ok=True)
+    with open(ruta, 'w') as archivo:
+        json.dump(reportes, archivo, indent=2, ensure_ascii=False)
+    print(f"   Reporte del enlace guardado: {ruta}")
+    return ruta
+
+
+def main():
+    """Compara protocolos y baudios contra el emulador y guarda el reporte"""
+    from capa_comandos import CapaComandos
+    from emulador_arduino import EmuladorArduino
+
+    reportes = []
+    for protocolo in ('ascii', 'binario'):
+        for baudios in (115200, 1000000):
+            puerto = EmuladorArduino(baudrate=baudios, timeout=1, retardo_arranque=0)
+            comandos = CapaComandos(puerto)
+            comandos.esperar_listo()
+            comandos.enviar('t')
+            medidor = MedidorEnlace(puerto, comandos, protocolo)
+            medidor.reporte(medidor.medir(pings=20, repeticiones=3))
+            reportes.append(medidor.reporte_actual)
+            puerto.close()
+    guardar_reportes(reportes, os.path.join('telemetria', 'enlace_emulador.json'))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,173 @@
+#!/usr/bin/env python3
+"""
+NEGOCIACIÓN DE VELOCIDAD DEL ENLACE SERIAL
+Sube la velocidad del puerto paso a paso, verifica cada una con un patrón
+de loopback y se queda con la más rápida que no presenta errores
+
+Comandos del sketch:
+    B:<baud>   Responde ACK:B:<baud> a la velocidad actual y cambia la UART
+    B:OK       Confirma la nueva velocidad; sin confirmación en
+               TIEMPO_CONFIRMACION s la placa regresa a la anterior
+    ECO:<txt>  Regresa la misma línea
+
+La velocidad que se pide no siempre es la que sale: el ATmega2560 a 16 MHz
+genera 250000, 500000 y 1000000 baudios exactos, pero 230400 o 921600 con
+más de 3 % de error, por eso se prueban todas en lugar de parar en la primera
+que falla.
+"""
+
+import time
+
+import numpy as np
+
+BAUDIOS_BASE = 115200
+BAUDIOS_CANDIDATOS = [230400, 250000, 460800, 500000, 921600, 1000000, 2000000]
+TIEMPO_CONFIRMACION = 1.0  # s, igual que en el sketch
+LINEAS_PRUEBA = 32
+LARGO_LINEA = 60
+TASA_ERROR_MAXIMA = 0.0    # fracción de líneas de eco dañadas que se acepta
+
+ALFABETO = np.frombuffer(b"0123456789ABCDEFGHIJKLMNOPQRSTUVWXYZabcdefghijklmnopqrstuvwxyz",
+                         dtype=np.uint8)
+
+
+def patron_eco(lineas=LINEAS_PRUEBA, largo=LARGO_LINEA, semilla=0):
+    """Líneas ECO:<texto> con caracteres imprimibles pseudoaleatorios"""
+    rng = np.random.default_rng(semilla)
+    return [b"ECO:" + ALFABETO[rng.integers(0, len(ALFABETO), largo)].tobytes()
+            for _ in range(lineas)]
+
+
+class NegociadorBaudios:
+    def __init__(self, puerto, comandos, tasa_maxima=TASA_ERROR_MAXIMA):
+        # puerto: tipo serial.Serial (o SesionArduino); comandos: CapaComandos
+        self.puerto = puerto
+        self.comandos = comandos
+        self.tasa_maxima = tasa_maxima
+        self.resultados = {}  # baudios -> (bytes/s, tasa de error, aceptada)
+
+    def probar_eco(self, lineas=LINEAS_PRUEBA):
+        """Envía el patrón de loopback a la velocidad actual
+
+        Regresa (bytes/s, tasa de error): bytes de eco intactos (ida y vuelta)
+        por segundo y fracción de líneas que no regresaron idénticas.
+        """
+        patron = patron_eco(lineas)
+        esperadas = set(patron)
+        total_bytes = sum(len(linea) + 1 for linea in patron)
+        # Tiempo teórico de ida y vuelta con margen amplio
+        timeout = max(0.5, 4 * 2 * total_bytes * 10 / self.puerto.baudrate)
+
+        self.puerto.reset_input_buffer()
+        inicio = time.perf_counter()
+        limite = inicio + timeout
+        self.puerto.write(b"".join(linea + b"\n" for linea in patron))
+
+        correctas = 0
+        recibidas = 0
+        timeout_original = self.puerto.timeout
+        try:
+            while recibidas < lineas:
+                restante = limite - time.perf_counter()
+                if restante <= 0:
+                    break
+                self.puerto.timeout = restante
+                linea = self.puerto.readline()
+                if not linea:
+                    break
+                recibidas += 1
+                if linea.rstrip(b"\r\n") in esperadas:
+                    correctas += 1
+        finally:
+            self.puerto.timeout = timeout_original
+        duracion = time.perf_counter() - inicio
+
+        bytes_ok = 2 * correctas * (LARGO_LINEA + 5)
+        return bytes_ok / duracion, 1 - correctas / lineas
+
+    def _esperar_vencimiento(self, desde):
+        """Espera a que la placa regrese sola a la velocidad anterior"""
+        restante = desde + TIEMPO_CONFIRMACION + 0.1 - time.perf_counter()
+        if restante > 0:
+            time.sleep(restante)
+        # Un salto de línea termina la basura que haya quedado a medio recibir
+        self.puerto.write(b"\n")
+        time.sleep(0.05)
+        self.puerto.reset_input_buffer()
+
+    def probar(self, baudios):
+        """Cambia a 'baudios', mide el loopback y confirma o regresa
+
+        Regresa True si la placa quedó en la nueva velocidad.
+        """
+        previos = self.puerto.baudrate
+        ok, _ = self.comandos.enviar(f"B:{baudios}")
+        if not ok:
+            self.resultados[baudios] = (0.0, 1.0, False)
+            return False
+        cambio = time.perf_counter()
+        self.puerto.baudrate = baudios
+
+        bytes_s, error = self.probar_eco()
+        aceptada = error <= self.tasa_maxima and self.comandos.enviar("B:OK")[0]
+        self.resultados[baudios] = (bytes_s, error, aceptada)
+        if aceptada:
+            return True
+
+        self.puerto.baudrate = previos
+        self._esperar_vencimiento(cambio)
+        if not self.comandos.enviar("p")[0]:
+            # El B:OK llegó aunque su ACK no: la placa se quedó en 'baudios'
+            self.puerto.baudrate = baudios
+            if self.comandos.enviar(f"B:{previos}")[0]:
+                self.puerto.baudrate = previos
+                self.comandos.enviar("B:OK")
+        return False
+
+    def negociar(self, candidatos=BAUDIOS_CANDIDATOS):
+        """Prueba las velocidades mayores a la actual y deja la más rápida confiable"""
+        if not self.comandos.soporta_ack:
+            print("   Sketch sin ACK: se conserva la velocidad actual")
+            return self.puerto.baudrate
+
+        actual = self.puerto.baudrate
+        bytes_s, error = self.probar_eco()
+        self.resultados[actual] = (bytes_s, error, error <= self.tasa_maxima)
+
+        for baudios in sorted(candidatos):
+            if baudios <= self.puerto.baudrate:
+                continue
+            self.probar(baudios)
+        return self.puerto.baudrate
+
+    def reporte(self):
+        """Imprime bytes/s y tasa de error medidos en cada velocidad"""
+        print(f"\nVELOCIDAD DEL ENLACE (loopback de {LINEAS_PRUEBA} líneas):")
+        print(f"{'BAUDIOS':^9} | {'BYTES/S':^9} | {'ERROR':^7} | ESTADO")
+        print("-" * 42)
+        for baudios in sorted(self.resultados):
+            bytes_s, error, aceptada = self.resultados[baudios]
+            estado = "en uso" if baudios == self.puerto.baudrate else ("confiable" if aceptada else "rechazada")
+            print(f"{baudios:^9} | {bytes_s:^9.0f} | {error*100:^6.1f}% | {estado}")
+        return self.resultados
+
+
+def main():
+    """Negocia la velocidad con el emulador y muestra el benchmark"""
+    from capa_comandos import CapaComandos
+    from emulador_arduino import EmuladorArduino
+
+    puerto = EmuladorArduino(timeout=1, semilla=0)
+    comandos = CapaComandos(puerto)
+    comandos.esperar_listo()
+    comandos.enviar('t')
+
+    negociador = NegociadorBaudios(puerto, comandos)
+    baudios = negociador.negociar()
+    negociador.reporte()
+    print(f"\nVelocidad elegida: {baudios} baudios")
+    puerto.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -1,6 +1,7 @@
 import matplotlib.pyplot as plt
 import numpy as np
-from scipy import signal
+
+from registro_diseños import diseñar_fir, respuesta_diseño
 
 #datos calculados
 M = 27
@@ -11,12 +12,11 @@ n = np.arange(-(M-1)//2, (M-1)//2 + 1)
 h_ideal = (wc/np.pi) * np.sinc(wc*n /np.pi)
 
 #paso 3: APlicar la ventana seleccionada (hanning) 
-window = np.hanning(M)
-h_truncada = h_ideal * window
+#(igual a h_ideal * np.hanning(M); firwin sin escalar, con fs = 2 el corte es wc/pi)
+h_truncada = diseñar_fir(M, wc/np.pi, fs = 2, ventana = 'hann', escalar = False)
 
-#calcular la respuesta en frecuencia 
-w, H = signal.freqz(h_truncada, 1, worN = 1024)
-w_normalizada = w/ np.pi
+#calcular la respuesta en frecuencia (guardada en el registro de diseños)
+w_normalizada, H = respuesta_diseño('fir', M, wc/np.pi, fs = 2, worN = 1024, ventana = 'hann', escalar = False)
 H_magnitud = np.abs(H)
 H_db = 20 * np.log10(H_magnitud + 1e-10)
 
@@ -4,8 +4,15 @@ import matplotlib.pyplot as plt
 from scipy import signal
 from scipy.io import wavfile
 import sounddevice as sd
+import os
 import time
 
+from banco_filtros import BancoFiltros, diseños_candidatos
+from convolucion_fir import ConvolucionFIR
+from filtrado_continuo import BLOQUE_LECTURA, EscritorWAV, filtrar_wav, info_wav
+from filtros_sos import diseñar_iir, respuesta_sos
+from registro_diseños import diseñar_fir
+
 class DemoFiltrosSimple:
     def __init__(self, fs=8000):
         self.fs = fs
@@ -57,41 +64,60 @@ class DemoFiltrosSimple:
         """Diseña filtros optimizados para diferencias audibles claras"""
         
         # Frecuencia de corte más baja para diferencias más evidentes
-        fc = 800 / self.nyquist  # 800 Hz en lugar de 1000 Hz
+        fc = 800  # Hz, en lugar de 1000 Hz
         
         # Filtro FIR - Orden mayor para mejor selectividad
+        # (los diseños salen del registro: no se recalculan en cada demo)
         print("Diseñando filtro FIR...")
-        h_fir = signal.firwin(41, fc, window='hamming')  # Orden 40
+        h_fir = diseñar_fir(41, fc, self.fs, ventana='hamming')  # Orden 40
         print(f"   Orden: {len(h_fir)-1}")
         print(f"   Frecuencia de corte: 800 Hz")
         
         # Filtro IIR - Butterworth orden mayor para corte más abrupto
+        # (secciones de segundo orden: estable a cualquier orden)
         print("Diseñando filtro IIR...")
-        b_iir, a_iir = signal.butter(6, fc, btype='low')  # Orden 6
-        print(f"   Orden: {len(b_iir)-1}")
+        sos_iir = diseñar_iir(6, fc, self.fs)  # Orden 6
+        print(f"   Orden: {2 * len(sos_iir)} ({len(sos_iir)} secciones)")
         print(f"   Frecuencia de corte: 800 Hz")
         
-        return h_fir, (b_iir, a_iir)
+        return h_fir, sos_iir
     
-    def aplicar_filtros(self, audio, h_fir, iir_coeffs):
+    def aplicar_filtros(self, audio, h_fir, sos_iir):
         """Aplica filtros FIR e IIR al audio de 5 segundos"""
         
-        b_iir, a_iir = iir_coeffs
-        
         print("Aplicando filtros a audio de 5 segundos...")
         
         # Aplicar FIR
         print("   Procesando con FIR...")
-        audio_fir = signal.lfilter(h_fir, 1, audio)
+        audio_fir = ConvolucionFIR(h_fir).aplicar(audio)  # directa o FFT según los taps
         
-        # Aplicar IIR  
+        # Aplicar IIR (secciones de segundo orden)
         print("   Procesando con IIR...")
-        audio_iir = signal.lfilter(b_iir, a_iir, audio)
+        audio_iir = signal.sosfilt(sos_iir, audio)
         
         print("Filtrado completado - 5 segundos cada señal")
         
         return audio_fir, audio_iir
     
+    def comparar_diseños(self, audio, diseños=None):
+        """Compara muchos diseños candidatos sobre el mismo audio en una pasada"""
+        
+        diseños = diseños or diseños_candidatos(self.fs)
+        inicio = time.perf_counter()
+        salidas = BancoFiltros(list(diseños.values())).aplicar(audio)
+        duracion = time.perf_counter() - inicio
+        
+        potencia_orig = np.var(audio)
+        print(f"\nCOMPARACIÓN DE {len(diseños)} DISEÑOS ({duracion*1000:.1f} ms en total):")
+        print(f"{'DISEÑO':^20} | {'SNR dB':^7} | {'REDUCCIÓN dB':^12}")
+        print("-" * 45)
+        for nombre, salida in zip(diseños, salidas):
+            potencia = np.var(salida)
+            reduccion = 10 * np.log10(potencia_orig / potencia) if potencia > 0 else 0
+            print(f"{nombre:^20} | {self.calcular_snr(salida):^7.1f} | {reduccion:^12.1f}")
+        
+        return dict(zip(diseños, salidas))
+    
     def reproducir_comparacion(self, audio_orig, audio_fir, audio_iir):
         """Reproduce audio completo de 5 segundos para comparación clara"""
         
@@ -167,13 +193,11 @@ class DemoFiltrosSimple:
             print(f"Error en reproducción: {e}")
             print("   Verifica configuración de audio del sistema")
     
-    def analizar_espectros(self, audio_orig, audio_fir, audio_iir, h_fir, iir_coeffs):
+    def analizar_espectros(self, audio_orig, audio_fir, audio_iir, h_fir, sos_iir):
         """Muestra análisis espectral comparativo de audio de 5 segundos"""
         
         print("Generando análisis espectral de 5 segundos...")
         
-        b_iir, a_iir = iir_coeffs
-        
         # Calcular espectros con mayor resolución
         f, Pxx_orig = signal.welch(audio_orig, self.fs, nperseg=1024)
         f, Pxx_fir = signal.welch(audio_fir, self.fs, nperseg=1024)
@@ -209,7 +233,7 @@ class DemoFiltrosSimple:
         
         # Respuesta en frecuencia de los filtros
         w_fir, H_fir = signal.freqz(h_fir, 1, worN=1024, fs=self.fs)
-        w_iir, H_iir = signal.freqz(b_iir, a_iir, worN=1024, fs=self.fs)
+        w_iir, H_iir = respuesta_sos(sos_iir, worN=1024, fs=self.fs)
         
         axes[1, 0].plot(w_fir, 20*np.log10(np.abs(H_fir)), 'g-', linewidth=3, label='FIR')
         axes[1, 0].plot(w_iir, 20*np.log10(np.abs(H_iir)), 'r-', linewidth=3, label='IIR')
@@ -282,8 +306,8 @@ DURACIÓN PROCESADA: 5.0 segundos
         """Calcula SNR estimado para audio de 5 segundos"""
         try:
             # Filtro paso-bajas muy suave para separar señal de ruido
-            b_smooth, a_smooth = signal.butter(2, 0.1, btype='low')
-            señal_estimada = signal.filtfilt(b_smooth, a_smooth, audio)
+            sos_suave = diseñar_iir(2, 0.1 * self.nyquist, self.fs)
+            señal_estimada = signal.sosfiltfilt(sos_suave, audio)
             ruido_estimado = audio - señal_estimada
             
             potencia_señal = np.var(señal_estimada)
@@ -296,6 +320,30 @@ DURACIÓN PROCESADA: 5.0 segundos
         except:
             return 20.0  # Valor por defecto
     
+    def filtrar_archivo(self, archivo, bloque=BLOQUE_LECTURA):
+        """Filtra la grabación completa por bloques (cualquier duración)
+        
+        Sin recortar a 5 segundos ni remuestrear: los filtros se diseñan a la
+        fs del archivo y la salida se escribe en <nombre>_fir.wav y
+        <nombre>_iir.wav mientras se lee, con memoria constante.
+        """
+        fs, muestras, _ = info_wav(archivo)
+        h_fir = diseñar_fir(41, 800, fs, ventana='hamming')
+        sos_iir = diseñar_iir(6, 800, fs)
+        base = os.path.splitext(archivo)[0]
+        rutas = (f"{base}_fir.wav", f"{base}_iir.wav")
+        
+        print(f"Filtrando {archivo} completo ({muestras / fs:.1f} s) en bloques de {bloque}...")
+        inicio = time.time()
+        with EscritorWAV(rutas[0], fs) as salida_fir, EscritorWAV(rutas[1], fs) as salida_iir:
+            for _, (audio_fir, audio_iir) in filtrar_wav(archivo, [h_fir, sos_iir], bloque):
+                salida_fir.escribir(audio_fir)
+                salida_iir.escribir(audio_iir)
+        duracion = time.time() - inicio
+        print(f"   {muestras} muestras en {duracion:.2f} s ({muestras / fs / max(duracion, 1e-9):.0f}x tiempo real)")
+        print(f"   Guardados: {rutas[0]}, {rutas[1]}")
+        return rutas
+    
     def demo_completa(self, archivo):
         """Ejecuta demostración completa con audio de 5 segundos"""
         
@@ -309,20 +357,25 @@ DURACIÓN PROCESADA: 5.0 segundos
             return
         
         # 2. Diseñar filtros
-        h_fir, iir_coeffs = self.diseñar_filtros()
+        h_fir, sos_iir = self.diseñar_filtros()
         
         # 3. Aplicar filtros
-        audio_fir, audio_iir = self.aplicar_filtros(audio_orig, h_fir, iir_coeffs)
+        audio_fir, audio_iir = self.aplicar_filtros(audio_orig, h_fir, sos_iir)
         
         # 4. Análisis visual
-        snr_orig, snr_fir, snr_iir = self.analizar_espectros(audio_orig, audio_fir, audio_iir, h_fir, iir_coeffs)
+        snr_orig, snr_fir, snr_iir = self.analizar_espectros(audio_orig, audio_fir, audio_iir, h_fir, sos_iir)
         
-        # 5. Comparación auditiva
+        # 5. Otros diseños candidatos, todos en una pasada del banco de filtros
+        respuesta = input("\n¿Comparar otros diseños FIR/IIR candidatos? (s/n): ")
+        if respuesta.lower() in ['s', 'si', 'y', 'yes', '']:
+            self.comparar_diseños(audio_orig)
+        
+        # 6. Comparación auditiva
         respuesta = input("\n¿Reproducir comparación auditiva de 5 segundos? (s/n): ")
         if respuesta.lower() in ['s', 'si', 'y', 'yes', '']:
             self.reproducir_comparacion(audio_orig, audio_fir, audio_iir)
         
-        # 6. Resumen final detallado
+        # 7. Resumen final detallado
         print("\nRESUMEN DETALLADO DE LA DEMOSTRACIÓN:")
         print("=" * 65)
         print(f"Archivo procesado: {archivo}")
@@ -367,7 +420,6 @@ def main():
     demo = DemoFiltrosSimple()
     
     # Verificar archivos disponibles
-    import os
     archivos_disponibles = [f for f in os.listdir('.') if f.endswith('.wav')]
     
     if not archivos_disponibles:
@@ -379,11 +431,11 @@ def main():
         return
     
     print("Archivos de audio disponibles:")
+    duraciones = {}
     for i, archivo in enumerate(archivos_disponibles):
         try:
-            from scipy.io import wavfile
-            fs, audio = wavfile.read(archivo)
-            duracion = len(audio) / fs
+            fs, muestras, _ = info_wav(archivo)  # sin cargar el audio
+            duraciones[archivo] = duracion = muestras / fs
             print(f"   {i+1}. {archivo} ({duracion:.1f}s, {fs}Hz)")
         except:
             print(f"   {i+1}. {archivo} (error al leer)")
@@ -408,6 +460,11 @@ def main():
     try:
         demo.demo_completa(archivo_seleccionado)
         
+        if duraciones.get(archivo_seleccionado, 0) > 5:
+            respuesta = input("\n¿Filtrar también la grabación completa por bloques? (s/n): ")
+            if respuesta.lower() in ['s', 'si', 'y', 'yes']:
+                demo.filtrar_archivo(archivo_seleccionado)
+        
         print("\n¡DEMOSTRACIÓN COMPLETADA EXITOSAMENTE!")
         print("=" * 65)
         print("Audio de 5 segundos procesado")
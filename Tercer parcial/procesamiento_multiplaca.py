@@ -0,0 +1,114 @@
+#!/usr/bin/env python3
+"""
+PROCESAMIENTO CON VARIAS PLACAS ARDUINO
+Divide la grabación en segmentos solapados, procesa cada segmento en una
+placa distinta en paralelo y une las salidas descartando el transitorio
+de arranque del filtro en cada segmento
+"""
+
+import threading
+import time
+
+import numpy as np
+from scipy import signal
+
+from filtros_punto_fijo import (FILTRO_FIR, FILTRO_IIR, FILTRO_CARGADO, FS_SKETCH, FC_SKETCH,
+                                MAXIMO_ADC, coeficientes_fir_sketch)
+
+
+def calentamiento_filtro(tipo_filtro, tolerancia=0.5, coeficientes=None):
+    """Muestras necesarias para que el estado del filtro olvide su arranque
+
+    FIR: longitud de la línea de retardo. IIR: muestras tras las cuales la
+    cola de la respuesta al impulso aporta menos de 'tolerancia' LSB con una
+    entrada a escala completa. 'coeficientes' describe el filtro cargado (tipo 3).
+    """
+    if tipo_filtro == FILTRO_CARGADO and coeficientes is not None:
+        es_fir, bits, valores = coeficientes
+        if es_fir:
+            return len(valores) - 1
+        q = np.reshape(valores, (-1, 5)) / (1 << bits)
+        sos = np.column_stack([q[:, :3], np.ones(len(q)), q[:, 3:]])
+    elif tipo_filtro == FILTRO_FIR:
+        return len(coeficientes_fir_sketch()) - 1
+    elif tipo_filtro == FILTRO_IIR:
+        sos = signal.butter(6, FC_SKETCH / (FS_SKETCH / 2), btype='low', output='sos')
+    else:
+        return 0
+    impulso = np.zeros(4096)
+    impulso[0] = 1.0
+    h = np.abs(signal.sosfilt(sos, impulso))
+    cola = np.cumsum(h[::-1])[::-1] * MAXIMO_ADC
+    return int(np.argmax(cola < tolerancia))
+
+
+def dividir_segmentos(num_muestras, num_placas, calentamiento):
+    """Reparte las muestras entre placas
+
+    Regresa una lista de (inicio_envio, inicio_util, fin): cada placa recibe
+    desde inicio_envio, pero solo se conserva la salida desde inicio_util.
+    """
+    limites = np.linspace(0, num_muestras, num_placas + 1).astype(int)
+    segmentos = []
+    for inicio_util, fin in zip(limites[:-1], limites[1:]):
+        if fin <= inicio_util:
+            continue
+        segmentos.append((max(0, inicio_util - calentamiento), inicio_util, fin))
+    return segmentos
+
+
+class ProcesadorMultiplaca:
+    def __init__(self, sistemas):
+        # Cada sistema es un SistemaCompletoClase ya conectado a su placa
+        self.sistemas = sistemas
+
+    def procesar(self, audio_adc, tipo_filtro):
+        """Procesa audio_adc repartido entre todas las placas en paralelo"""
+
+        coeficientes = None
+        if tipo_filtro == FILTRO_CARGADO:
+            # Todas las placas necesitan el filtro que se subió a la principal
+            coeficientes = self.sistemas[0].coeficientes_cargados
+            for sistema in self.sistemas[1:]:
+                if sistema.coeficientes_cargados is not coeficientes and not sistema.subir_coeficientes(coeficientes):
+                    return None, None
+
+        calentamiento = calentamiento_filtro(tipo_filtro, coeficientes=coeficientes)
+        segmentos = dividir_segmentos(len(audio_adc), len(self.sistemas), calentamiento)
+        resultados = [None] * len(segmentos)
+
+        print(f"Procesando con {len(segmentos)} placas "
+              f"(solapamiento de {calentamiento} muestras)...")
+
+        def trabajar(k):
+            inicio_envio, inicio_util, fin = segmentos[k]
+            sistema = self.sistemas[k]
+            entrada, salida = sistema.procesar_muestras_adc(audio_adc[inicio_envio:fin], tipo_filtro,
+                                                            desplazamiento=inicio_envio)
+            if entrada is not None and len(entrada) == fin - inicio_envio:
+                descarte = inicio_util - inicio_envio
+                resultados[k] = (entrada[descarte:], salida[descarte:])
+
+        inicio = time.time()
+        hilos = [threading.Thread(target=trabajar, args=(k,), daemon=True)
+                 for k in range(len(segmentos))]
+        for hilo in hilos:
+            hilo.start()
+        for hilo in hilos:
+            hilo.join()
+        duracion = time.time() - inicio
+
+        fallidos = [self.sistemas[k].puerto for k, r in enumerate(resultados) if r is None]
+        if fallidos:
+            print(f" Falló el procesamiento en: {', '.join(fallidos)}")
+            return None, None
+
+        entrada = np.concatenate([r[0] for r in resultados])
+        salida = np.concatenate([r[1] for r in resultados])
+
+        print(f"\n Procesamiento multiplaca exitoso:")
+        print(f"   Placas: {len(segmentos)}")
+        print(f"   Muestras totales: {len(entrada)}")
+        print(f"   Tiempo: {duracion:.2f}s ({len(entrada)/duracion:.0f} muestras/s)")
+
+        return entrada, salida
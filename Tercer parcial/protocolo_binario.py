@@ -0,0 +1,591 @@
+#!/usr/bin/env python3
+"""
+PROTOCOLO BINARIO PARA ARDUINO MEGA
+Codifica lotes de muestras en tramas binarias con CRC
+Compatible con sistema_completo_clase.py (modo protocolo='binario')
+
+Formato de trama (little-endian):
+    A5 5A | tipo (1) | secuencia (2) | n muestras (2) | formato (1) | datos | CRC16 (2)
+
+El CRC16-CCITT (polinomio 0x1021, valor inicial 0xFFFF) cubre desde el byte
+de tipo hasta el último byte de datos.
+
+Formatos de muestra (en ambos sentidos; el Arduino contesta en el mismo
+formato del lote recibido):
+    16      int16 little-endian
+    10      4 muestras de 10 bits en 5 bytes
+    0xDw    primera muestra en 10 bits y diferencias zigzag de w bits
+
+Tramas de coeficientes (host -> Arduino, ver carga_coeficientes.py):
+    n es el número de coeficientes int16; el formato lleva el tipo de filtro
+    en el nibble alto (0x1 FIR, 0x2 IIR en secciones b0 b1 b2 a1 a2) y los
+    bits fraccionarios Q en el bajo. La placa contesta TIPO_CONFIRMACION con
+    la misma secuencia, o TIPO_ERROR si no caben.
+"""
+
+import binascii
+import struct
+import time
+import warnings
+
+import numpy as np
+
+SINCRONIA = b'\xA5\x5A'
+CABECERA = struct.Struct('<BHHB')  # tipo, secuencia, n, formato
+TAMAÑO_CABECERA = len(SINCRONIA) + CABECERA.size
+TAMAÑO_CRC = 2
+
+# Tipos de trama
+TIPO_DATOS = 0x01       # Host -> Arduino: lote de muestras ADC
+TIPO_RESPUESTA = 0x81   # Arduino -> Host: pares entrada/salida
+TIPO_COEFICIENTES = 0x02  # Host -> Arduino: coeficientes de un filtro nuevo
+TIPO_CONFIRMACION = 0x82  # Arduino -> Host: coeficientes cargados
+TIPO_ERROR = 0xEE       # Arduino -> Host: trama recibida con CRC inválido
+
+# Formatos de muestra
+FORMATO_16BITS = 16     # int16 little-endian, 2 bytes por muestra
+FORMATO_10BITS = 10     # 4 muestras de 10 bits en 5 bytes
+FORMATO_DELTA = 0xD0    # diferencias en zigzag; el nibble bajo es el ancho en bits
+
+# Formatos de coeficientes (el nibble bajo son los bits Q)
+COEF_FIR = 0x10
+COEF_IIR = 0x20
+
+
+def calcular_crc(datos):
+    """CRC16-CCITT (0x1021, inicial 0xFFFF) de los datos"""
+    return binascii.crc_hqx(datos, 0xFFFF)
+
+
+def _a_bits(valores, bits):
+    """Flujo de bits (LSB primero) de enteros sin signo de 'bits' bits"""
+    valores = np.asarray(valores, dtype=np.int64)
+    return ((valores[:, None] >> np.arange(bits)) & 1).astype(np.uint8).ravel()
+
+
+def _de_bits(flujo, n, bits):
+    """Inverso de _a_bits sobre un flujo de bits"""
+    matriz = np.asarray(flujo[:n * bits], dtype=np.int64).reshape(n, bits)
+    return (matriz << np.arange(bits)).sum(axis=1)
+
+
+def empaquetar_bits(valores, bits):
+    """Empaqueta enteros sin signo de 'bits' bits, LSB primero, sin huecos"""
+    return np.packbits(_a_bits(valores, bits), bitorder='little').tobytes()
+
+
+def desempaquetar_bits(datos, n, bits):
+    """Recupera n enteros de 'bits' bits empaquetados con empaquetar_bits"""
+    flujo = np.unpackbits(np.frombuffer(datos, dtype=np.uint8), bitorder='little')
+    return _de_bits(flujo, n, bits)
+
+
+def empaquetar_10bits(muestras):
+    """Empaqueta muestras de 10 bits: 4 muestras en 5 bytes"""
+    valores = np.asarray(muestras, dtype=np.int64) & 0x3FF
+    datos = empaquetar_bits(valores, 10)
+    # Se completa a grupos de 4 muestras (5 bytes)
+    return datos + bytes(bytes_canal(len(valores), FORMATO_10BITS) - len(datos))
+
+
+def desempaquetar_10bits(datos, n):
+    """Recupera n muestras de 10 bits empaquetadas con empaquetar_10bits"""
+    return desempaquetar_bits(datos, n, 10).astype(np.int16)
+
+
+def codificar_delta(muestras, ancho=None):
+    """Primera muestra en 10 bits y diferencias en zigzag de 'ancho' bits
+
+    Sin ancho se usa el mínimo que cabe (0-11 bits). Regresa (ancho, datos);
+    el ancho viaja en el byte de formato.
+    """
+    muestras = np.asarray(muestras, dtype=np.int64)
+    diferencias = np.diff(muestras)
+    zigzag = (diferencias << 1) ^ (diferencias >> 63)
+    if ancho is None:
+        ancho = int(zigzag.max()).bit_length() if len(zigzag) else 0
+    if not len(muestras):
+        return ancho, b''
+    flujo = np.concatenate([_a_bits(muestras[:1] & 0x3FF, 10), _a_bits(zigzag, ancho)])
+    return ancho, np.packbits(flujo, bitorder='little').tobytes()
+
+
+def decodificar_delta(datos, n, ancho):
+    """Inverso de codificar_delta"""
+    if n == 0:
+        return np.zeros(0, dtype=np.int16)
+    flujo = np.unpackbits(np.frombuffer(datos, dtype=np.uint8), bitorder='little')
+    primera = _de_bits(flujo, 1, 10)
+    zigzag = _de_bits(flujo[10:], n - 1, ancho)
+    diferencias = (zigzag >> 1) ^ -(zigzag & 1)
+    return np.concatenate([primera, primera + np.cumsum(diferencias)]).astype(np.int16)
+
+
+def es_delta(formato):
+    return formato & 0xF0 == FORMATO_DELTA
+
+
+def bytes_canal(n, formato):
+    """Bytes que ocupan n muestras de un canal en el formato dado"""
+    if es_delta(formato):
+        return (10 + max(n - 1, 0) * (formato & 0x0F) + 7) // 8 if n else 0
+    if formato == FORMATO_10BITS:
+        return ((n + 3) // 4) * 5
+    return 2 * n
+
+
+def codificar_canal(muestras, formato):
+    """Codifica un canal de muestras; regresa (formato_efectivo, datos)"""
+    muestras = np.asarray(muestras)
+    if es_delta(formato):
+        ancho, datos = codificar_delta(muestras)
+        return FORMATO_DELTA | ancho, datos
+    if formato == FORMATO_10BITS:
+        return formato, empaquetar_10bits(muestras)
+    if formato == FORMATO_16BITS:
+        return formato, muestras.astype('<i2').tobytes()
+    raise ValueError(f"Formato no soportado: {formato}")
+
+
+def decodificar_canal(datos, n, formato):
+    """Inverso de codificar_canal"""
+    if es_delta(formato):
+        return decodificar_delta(datos, n, formato & 0x0F)
+    if formato == FORMATO_10BITS:
+        return desempaquetar_10bits(datos, n)
+    return np.frombuffer(datos, dtype='<i2', count=n).astype(np.int16)
+
+
+def longitud_datos(tipo, n, formato):
+    """Número de bytes de datos que sigue a la cabecera"""
+    if tipo == TIPO_DATOS:
+        return bytes_canal(n, formato)
+    if tipo == TIPO_RESPUESTA:
+        if formato == FORMATO_16BITS:
+            return 4 * n  # pares (entrada, salida) int16
+        return 2 * bytes_canal(n, formato)  # canal de entrada y luego de salida
+    if tipo == TIPO_COEFICIENTES:
+        return 2 * n
+    return 0
+
+
+def construir_trama(tipo, secuencia, n, formato, datos=b''):
+    """Arma una trama completa con cabecera y CRC"""
+    cuerpo = CABECERA.pack(tipo, secuencia & 0xFFFF, n, formato) + datos
+    return SINCRONIA + cuerpo + struct.pack('<H', calcular_crc(cuerpo))
+
+
+def codificar_lote(muestras, secuencia, formato=FORMATO_10BITS):
+    """Codifica un lote de muestras ADC (0-1023) como trama de datos"""
+    formato, datos = codificar_canal(muestras, formato)
+    return construir_trama(TIPO_DATOS, secuencia, len(muestras), formato, datos)
+
+
+def decodificar_lote(formato, n, datos):
+    """Recupera las muestras de una trama de datos (lado Arduino)"""
+    return decodificar_canal(datos, n, formato)
+
+
+def codificar_coeficientes(valores, secuencia, formato):
+    """Trama con coeficientes enteros (int16) para cargar un filtro en la placa"""
+    valores = np.asarray(valores).astype('<i2').ravel()
+    return construir_trama(TIPO_COEFICIENTES, secuencia, len(valores), formato, valores.tobytes())
+
+
+def decodificar_coeficientes(formato, n, datos):
+    """Regresa (COEF_FIR o COEF_IIR, bits Q, coeficientes) de una trama de coeficientes"""
+    return formato & 0xF0, formato & 0x0F, np.frombuffer(datos, dtype='<i2', count=n).astype(np.int32)
+
+
+def formato_respuesta(formato):
+    """Formato con el que el Arduino contesta a un lote en 'formato'"""
+    return FORMATO_DELTA if es_delta(formato) else formato
+
+
+def codificar_respuesta(secuencia, entrada, salida, formato=FORMATO_16BITS):
+    """Codifica los pares entrada/salida como trama de respuesta
+
+    En 16 bits van intercalados; en 10 bits y delta va el canal de entrada
+    completo y después el de salida (delta con un ancho común a ambos).
+    """
+    if formato == FORMATO_16BITS:
+        pares = np.empty((len(entrada), 2), dtype='<i2')
+        pares[:, 0] = entrada
+        pares[:, 1] = salida
+        return construir_trama(TIPO_RESPUESTA, secuencia, len(entrada),
+                               FORMATO_16BITS, pares.tobytes())
+    if es_delta(formato):
+        ancho = max(codificar_delta(entrada)[0], codificar_delta(salida)[0])
+        formato = FORMATO_DELTA | ancho
+        datos = codificar_delta(entrada, ancho)[1] + codificar_delta(salida, ancho)[1]
+    else:
+        datos = codificar_canal(entrada, formato)[1] + codificar_canal(salida, formato)[1]
+    return construir_trama(TIPO_RESPUESTA, secuencia, len(entrada), formato, datos)
+
+
+def decodificar_respuesta(n, datos, formato=FORMATO_16BITS):
+    """Separa los pares entrada/salida de una trama de respuesta"""
+    if formato == FORMATO_16BITS:
+        pares = np.frombuffer(datos, dtype='<i2', count=2 * n).reshape(n, 2)
+        return pares[:, 0].astype(np.int16), pares[:, 1].astype(np.int16)
+    mitad = bytes_canal(n, formato)
+    return (decodificar_canal(datos[:mitad], n, formato),
+            decodificar_canal(datos[mitad:2 * mitad], n, formato))
+
+
+def analizar_trama(trama):
+    """Valida una trama completa en memoria y devuelve sus campos
+
+    Regresa (tipo, secuencia, n, formato, datos) o None si la trama no es válida.
+    """
+    if len(trama) < TAMAÑO_CABECERA + TAMAÑO_CRC or trama[:2] != SINCRONIA:
+        return None
+    tipo, secuencia, n, formato = CABECERA.unpack_from(trama, 2)
+    fin = TAMAÑO_CABECERA + longitud_datos(tipo, n, formato)
+    if len(trama) < fin + TAMAÑO_CRC:
+        return None
+    crc, = struct.unpack_from('<H', trama, fin)
+    if crc != calcular_crc(trama[2:fin]):
+        return None
+    return tipo, secuencia, n, formato, bytes(trama[TAMAÑO_CABECERA:fin])
+
+
+def _ajustar_timeout(puerto, restante, holgura=0.1):
+    """Deja el read() del puerto bloqueante hasta 'restante' segundos
+
+    Con timeout 0 el read() regresa de inmediato y el ciclo que lo llama se
+    vuelve un sondeo activo; con uno mayor al restante se pasa del límite.
+    Solo se reconfigura fuera de la holgura porque en pyserial cambiar el
+    timeout reprograma el puerto.
+    """
+    actual = puerto.timeout
+    if actual is None or actual <= 0 or actual > restante + holgura:
+        puerto.timeout = restante
+
+
+def _leer_exacto(puerto, n, limite):
+    """Lee exactamente n bytes antes del tiempo límite
+
+    Cada read() bloquea (pyserial espera con select) hasta completar los
+    bytes o agotar el tiempo restante, así la espera no consume CPU.
+    """
+    datos = bytearray()
+    while len(datos) < n:
+        restante = limite - time.time()
+        if restante <= 0:
+            return None
+        _ajustar_timeout(puerto, restante)
+        fragmento = puerto.read(n - len(datos))
+        if fragmento:
+            datos.extend(fragmento)
+    return bytes(datos)
+
+
+def leer_trama(puerto, timeout=5):
+    """Lee la siguiente trama válida desde un puerto tipo serial.Serial
+
+    Descarta bytes hasta encontrar la sincronía. Regresa
+    (tipo, secuencia, n, formato, datos) o None si vence el tiempo o el CRC falla.
+    """
+    limite = time.time() + timeout
+    timeout_original = puerto.timeout
+    try:
+        # Buscar sincronía A5 5A
+        previo = b''
+        while True:
+            byte = _leer_exacto(puerto, 1, limite)
+            if byte is None:
+                return None
+            if previo + byte == SINCRONIA:
+                break
+            previo = byte
+
+        cabecera = _leer_exacto(puerto, CABECERA.size, limite)
+        if cabecera is None:
+            return None
+        tipo, secuencia, n, formato = CABECERA.unpack(cabecera)
+
+        resto = _leer_exacto(puerto, longitud_datos(tipo, n, formato) + TAMAÑO_CRC, limite)
+        if resto is None:
+            return None
+    finally:
+        if puerto.timeout != timeout_original:
+            puerto.timeout = timeout_original
+    return analizar_trama(SINCRONIA + cabecera + resto)
+
+
+# ---------------------------------------------------------------------------
+# Códec ASCII original (para comparación y sketches antiguos)
+# ---------------------------------------------------------------------------
+
+def codificar_lote_ascii(muestras):
+    """Codifica un lote con el formato original DATA:<valor>"""
+    return b''.join(f"DATA:{int(m)}\n".encode() for m in muestras)
+
+
+def codificar_respuesta_ascii(entrada, salida):
+    """Genera la respuesta CSV original del Arduino"""
+    lineas = ["index,input,output"]
+    lineas += [f"{i},{e},{s}" for i, (e, s) in enumerate(zip(entrada, salida))]
+    lineas.append("FIN_DATOS")
+    return ("\n".join(lineas) + "\n").encode()
+
+
+def decodificar_respuesta_ascii(texto):
+    """Decodifica la respuesta CSV línea por línea (como el lector original)"""
+    entrada = []
+    salida = []
+    leyendo_datos = False
+    for linea in texto.decode().splitlines():
+        linea = linea.strip()
+        if linea == "index,input,output":
+            leyendo_datos = True
+            continue
+        elif "FIN_DATOS" in linea:
+            break
+        if leyendo_datos and "," in linea:
+            partes = linea.split(',')
+            if len(partes) >= 3:
+                entrada.append(int(partes[1]))
+                salida.append(int(partes[2]))
+    return entrada, salida
+
+
+CABECERA_CSV = b"index,input,output"
+FINALES_CSV = (b"FIN_DATOS", "ENVÍO COMPLETADO".encode())
+
+
+def _analizar_csv_lineas(bloque):
+    """Análisis línea por línea que ignora las líneas mal formadas"""
+    entrada = []
+    salida = []
+    for linea in bytes(bloque).decode(errors='replace').splitlines():
+        partes = linea.strip().split(',')
+        if len(partes) >= 3:
+            try:
+                e, s = int(partes[1]), int(partes[2])
+            except ValueError:
+                continue
+            entrada.append(e)
+            salida.append(s)
+    return np.array(entrada, dtype=np.int32), np.array(salida, dtype=np.int32)
+
+
+def analizar_csv(bloque, n=None):
+    """Convierte el bloque CSV 'index,input,output' en arreglos int16 de una pasada
+
+    bloque son las líneas de datos (sin cabecera ni FIN_DATOS). Si hay líneas
+    mal formadas se usa el análisis línea por línea como respaldo.
+    """
+    texto = bytes(bloque).replace(b'\r', b'').strip().replace(b'\n', b',')
+    valores = np.zeros(0, dtype=np.int32)
+    if texto:
+        try:
+            with warnings.catch_warnings():
+                # numpy solo advierte (y corta) cuando el texto no es numérico
+                warnings.simplefilter('error', DeprecationWarning)
+                valores = np.fromstring(texto, dtype=np.int32, sep=',')
+        except (ValueError, DeprecationWarning):
+            valores = None
+
+    if valores is None or len(valores) % 3:
+        # Líneas incompletas o con texto: respaldo tolerante
+        entrada_v, salida_v = _analizar_csv_lineas(bloque)
+    else:
+        valores = valores.reshape(-1, 3)
+        entrada_v, salida_v = valores[:, 1], valores[:, 2]
+
+    n = len(entrada_v) if n is None else min(n, len(entrada_v))
+    entrada = np.empty(n, dtype=np.int16)
+    salida = np.empty(n, dtype=np.int16)
+    entrada[:] = entrada_v[:n]
+    salida[:] = salida_v[:n]
+    return entrada, salida
+
+
+def leer_respuesta_ascii(puerto, n=None, timeout=5):
+    """Lee la respuesta CSV completa en bloques grandes y la analiza de una vez
+
+    Regresa (entrada, salida) como int16, o (None, None) si no llega la
+    cabecera antes del tiempo límite.
+    """
+    limite = time.time() + timeout
+    recibido = bytearray()
+    inicio_datos = None
+    fin_datos = None
+    busqueda = 0
+
+    timeout_original = puerto.timeout
+    try:
+        while fin_datos is None:
+            restante = limite - time.time()
+            if restante <= 0:
+                break
+            _ajustar_timeout(puerto, restante)
+            # read() bloquea hasta tener al menos un byte o vencer el timeout
+            fragmento = puerto.read(puerto.in_waiting or 1)
+            if not fragmento:
+                continue
+            recibido.extend(fragmento)
+
+            if inicio_datos is None:
+                posicion = recibido.find(CABECERA_CSV)
+                if posicion < 0:
+                    continue
+                inicio_datos = recibido.find(b'\n', posicion)
+                if inicio_datos < 0:
+                    inicio_datos = None
+                    continue
+                inicio_datos += 1
+                busqueda = inicio_datos
+
+            for final in FINALES_CSV:
+                posicion = recibido.find(final, busqueda)
+                if posicion >= 0:
+                    fin_datos = recibido.rfind(b'\n', inicio_datos, posicion) + 1 or inicio_datos
+                    break
+            else:
+                # Sin final todavía: la próxima búsqueda empieza cerca del borde
+                busqueda = max(inicio_datos, len(recibido) - 20)
+    finally:
+        if puerto.timeout != timeout_original:
+            puerto.timeout = timeout_original
+
+    if inicio_datos is None:
+        return None, None
+    # Sin final se aprovecha lo recibido (solo líneas completas)
+    if fin_datos is None:
+        fin_datos = recibido.rfind(b'\n', inicio_datos) + 1 or inicio_datos
+    return analizar_csv(recibido[inicio_datos:fin_datos], n)
+
+
+def benchmark_csv(tamaño_lote=600, repeticiones=200):
+    """Compara el análisis CSV línea por línea contra el análisis en bloque"""
+
+    print(f"\n{'='*60}")
+    print("BENCHMARK DE LECTURA CSV - LÍNEA POR LÍNEA vs BLOQUE")
+    print(f"{'='*60}")
+
+    rng = np.random.default_rng(0)
+    respuesta = codificar_respuesta_ascii(rng.integers(0, 1024, tamaño_lote),
+                                          rng.integers(0, 1024, tamaño_lote))
+    inicio_datos = respuesta.index(b'\n') + 1
+    fin_datos = respuesta.index(b'FIN_DATOS')
+
+    inicio = time.perf_counter()
+    for _ in range(repeticiones):
+        entrada, salida = decodificar_respuesta_ascii(respuesta)
+        entrada, salida = np.array(entrada), np.array(salida)
+    por_linea = (time.perf_counter() - inicio) / repeticiones
+
+    inicio = time.perf_counter()
+    for _ in range(repeticiones):
+        entrada_b, salida_b = analizar_csv(respuesta[inicio_datos:fin_datos], tamaño_lote)
+    en_bloque = (time.perf_counter() - inicio) / repeticiones
+
+    iguales = np.array_equal(entrada, entrada_b) and np.array_equal(salida, salida_b)
+    print(f"Respuesta grabada: {tamaño_lote} muestras, {len(respuesta)} bytes")
+    print(f"   Línea por línea: {por_linea*1e6:8.1f} µs/lote")
+    print(f"   En bloque:       {en_bloque*1e6:8.1f} µs/lote")
+    print(f"   Aceleración:     {por_linea/en_bloque:8.1f}x")
+    print(f"   Resultados idénticos: {'sí' if iguales else 'NO'}")
+    return por_linea, en_bloque
+
+
+def _lote_audio(n, semilla=0):
+    """Lote tipo audio en dominio ADC: tono con ruido y su versión suavizada"""
+    rng = np.random.default_rng(semilla)
+    t = np.arange(n) / 8000
+    entrada = 512 + 300 * np.sin(2 * np.pi * 440 * t) + rng.normal(0, 10, n)
+    entrada = np.clip(np.round(entrada), 0, 1023).astype(int)
+    salida = np.convolve(entrada, np.ones(8) / 8, mode='same').round().astype(int)
+    return entrada, salida
+
+
+def verificar_ida_vuelta(repeticiones=50):
+    """Verifica bit a bit codificar/decodificar en ambos sentidos y todos los formatos"""
+    rng = np.random.default_rng(1)
+    casos = [np.zeros(0, dtype=int), np.array([0]), np.array([1023]),
+             np.full(7, 512), np.array([0, 1023] * 9)]
+    for _ in range(repeticiones):
+        n = int(rng.integers(1, 700))
+        casos.append(rng.integers(0, 1024, n))
+        casos.append(_lote_audio(n, int(rng.integers(1000)))[0])
+
+    fallos = 0
+    for k, muestras in enumerate(casos):
+        otras = casos[(k + 1) % len(casos)]
+        otras = np.resize(otras, len(muestras)) if len(otras) else np.zeros(len(muestras), dtype=int)
+        for formato in (FORMATO_16BITS, FORMATO_10BITS, FORMATO_DELTA):
+            campos = analizar_trama(codificar_lote(muestras, k, formato))
+            ida = campos is not None and np.array_equal(
+                decodificar_lote(campos[3], campos[2], campos[4]), muestras)
+            campos = analizar_trama(codificar_respuesta(k, muestras, otras, formato))
+            vuelta = campos is not None and all(
+                np.array_equal(a, b) for a, b in
+                zip(decodificar_respuesta(campos[2], campos[4], campos[3]), (muestras, otras)))
+            if not (ida and vuelta):
+                fallos += 1
+                print(f" Ida y vuelta falló: caso {k}, formato {formato:#x}, n={len(muestras)}")
+
+    print(f"Ida y vuelta: {len(casos)} casos x 3 formatos, "
+          f"{'bit a bit idéntico' if not fallos else f'{fallos} fallos'}")
+    return fallos == 0
+
+
+def benchmark_codec(tamaño_lote=600, repeticiones=200, baudios=115200):
+    """Compara muestras/s del códec ASCII contra el binario (16, 10 bits y delta)"""
+
+    print(f"\n{'='*60}")
+    print("BENCHMARK DE CÓDEC - ASCII vs BINARIO")
+    print(f"{'='*60}")
+    print(f"Lote: {tamaño_lote} muestras, {repeticiones} repeticiones")
+
+    entrada, salida = _lote_audio(tamaño_lote)
+    total = tamaño_lote * repeticiones
+    resultados = {}
+
+    # ASCII
+    inicio = time.perf_counter()
+    for _ in range(repeticiones):
+        envio = codificar_lote_ascii(entrada)
+        respuesta = codificar_respuesta_ascii(entrada, salida)
+        decodificar_respuesta_ascii(respuesta)
+    duracion = time.perf_counter() - inicio
+    resultados['ASCII'] = (total / duracion, len(envio), len(respuesta))
+
+    # Binario
+    for nombre, formato in [('BIN-16', FORMATO_16BITS), ('BIN-10', FORMATO_10BITS),
+                            ('DELTA', FORMATO_DELTA)]:
+        inicio = time.perf_counter()
+        for secuencia in range(repeticiones):
+            envio = codificar_lote(entrada, secuencia, formato)
+            campos = analizar_trama(envio)
+            decodificar_lote(campos[3], campos[2], campos[4])
+            respuesta = codificar_respuesta(secuencia, entrada, salida, formato)
+            campos = analizar_trama(respuesta)
+            decodificar_respuesta(campos[2], campos[4], campos[3])
+        duracion = time.perf_counter() - inicio
+        resultados[nombre] = (total / duracion, len(envio), len(respuesta))
+
+    print(f"\n{'CÓDEC':^8} | {'MUESTRAS/S':^12} | {'BYTES TX':^9} | {'BYTES RX':^9} | {'LÍMITE ENLACE':^14}")
+    print("-" * 64)
+    for nombre, (tasa, bytes_tx, bytes_rx) in resultados.items():
+        # 10 bits por byte en el enlace serial (8N1)
+        limite = tamaño_lote * baudios / (10 * (bytes_tx + bytes_rx))
+        print(f"{nombre:^8} | {tasa:^12.0f} | {bytes_tx:^9} | {bytes_rx:^9} | {limite:^10.0f} m/s")
+    print("-" * 64)
+    print(f"Límite de enlace calculado a {baudios} baudios (8N1)")
+
+    return resultados
+
+
+def main():
+    """Verifica el códec y ejecuta los benchmarks"""
+    verificar_ida_vuelta()
+    benchmark_codec()
+    benchmark_csv()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,123 @@
+#!/usr/bin/env python3
+"""
+PUNTOS DE CONTROL PARA CORRIDAS LARGAS CON ARDUINO
+Guarda en disco, lote por lote, la entrada y salida ya procesadas para que
+una corrida interrumpida (placa desconectada, error, Ctrl+C) continúe desde
+el primer lote faltante en lugar de empezar de nuevo
+
+Cada punto de control se identifica por el hash del WAV, el tipo de filtro
+y el tamaño de lote:
+    <clave>.npy   arreglo int16 (2, n) en memoria mapeada: entrada y salida
+    <clave>.json  estado: muestras confirmadas desde el inicio y metadatos
+
+Los datos se vacían a disco antes de actualizar el estado, así el JSON
+nunca declara muestras que no estén escritas.
+"""
+
+import hashlib
+import json
+import os
+import time
+
+import numpy as np
+
+DIRECTORIO_PUNTOS_CONTROL = 'puntos_control'
+
+
+def hash_archivo(ruta, bloque=1 << 20):
+    """SHA-256 del contenido del archivo"""
+    h = hashlib.sha256()
+    with open(ruta, 'rb') as archivo:
+        for fragmento in iter(lambda: archivo.read(bloque), b''):
+            h.update(fragmento)
+    return h.hexdigest()
+
+
+class PuntoControl:
+    def __init__(self, archivo, tipo_filtro, tamaño_lote, num_muestras,
+                 directorio=DIRECTORIO_PUNTOS_CONTROL):
+        self.archivo = archivo
+        self.hash = hash_archivo(archivo)
+        self.tipo_filtro = tipo_filtro
+        self.tamaño_lote = tamaño_lote
+        self.num_muestras = num_muestras
+        self.clave = f"{self.hash[:16]}_filtro{tipo_filtro}_lote{tamaño_lote}"
+        self.ruta_datos = os.path.join(directorio, self.clave + '.npy')
+        self.ruta_estado = os.path.join(directorio, self.clave + '.json')
+        self.llenas = 0  # muestras confirmadas de forma contigua desde el inicio
+
+        os.makedirs(directorio, exist_ok=True)
+        self._datos = self._abrir()
+
+    def _abrir(self):
+        """Abre el punto de control existente o crea uno vacío"""
+        try:
+            with open(self.ruta_estado) as archivo:
+                estado = json.load(archivo)
+            datos = np.lib.format.open_memmap(self.ruta_datos, mode='r+')
+            if (estado['hash'] == self.hash and estado['num_muestras'] == self.num_muestras
+                    and datos.shape == (2, self.num_muestras)):
+                self.llenas = min(int(estado['llenas']), self.num_muestras)
+                return datos
+            del datos
+        except (OSError, ValueError, KeyError):
+            pass
+        self.llenas = 0
+        return np.lib.format.open_memmap(self.ruta_datos, mode='w+', dtype=np.int16,
+                                         shape=(2, self.num_muestras))
+
+    @property
+    def entrada(self):
+        return self._datos[0, :self.llenas]
+
+    @property
+    def salida(self):
+        return self._datos[1, :self.llenas]
+
+    def guardar(self, inicio, entrada, salida):
+        """Guarda un lote que empieza en la muestra 'inicio'
+
+        El estado solo avanza si el lote continúa la parte ya confirmada; un
+        lote posterior a un hueco se escribe pero no se declara.
+        """
+        n = min(len(entrada), self.num_muestras - inicio)
+        self._datos[0, inicio:inicio + n] = entrada[:n]
+        self._datos[1, inicio:inicio + n] = salida[:n]
+        if inicio <= self.llenas < inicio + n:
+            self.llenas = inicio + n
+            self._datos.flush()
+            self._escribir_estado()
+
+    def _escribir_estado(self):
+        estado = {
+            'archivo': os.path.basename(self.archivo),
+            'hash': self.hash,
+            'tipo_filtro': self.tipo_filtro,
+            'tamaño_lote': self.tamaño_lote,
+            'num_muestras': self.num_muestras,
+            'llenas': self.llenas,
+            'actualizado': time.strftime('%Y-%m-%d %H:%M:%S'),
+        }
+        temporal = self.ruta_estado + '.tmp'
+        with open(temporal, 'w') as archivo:
+            json.dump(estado, archivo, indent=2, ensure_ascii=False)
+        os.replace(temporal, self.ruta_estado)
+
+    @property
+    def completo(self):
+        return self.llenas >= self.num_muestras
+
+    def eliminar(self):
+        """Borra el punto de control (corrida terminada o resultados descartados)"""
+        self._datos = None  # libera el mapeo antes de borrar (necesario en Windows)
+        for ruta in (self.ruta_datos, self.ruta_estado):
+            try:
+                os.remove(ruta)
+            except OSError:
+                pass
+
+    def cerrar(self):
+        """Vacía a disco y conserva el punto de control para la próxima corrida"""
+        if self._datos is not None:
+            self._datos.flush()
+            self._datos = None
@@ -0,0 +1,263 @@
+#!/usr/bin/env python3
+"""
+REGISTRO DE DISEÑOS DE FILTROS
+Guarda los coeficientes de cada diseño y sus respuestas en frecuencia por su
+especificación, para que las demos y los barridos de parámetros no vuelvan a
+diseñar el mismo filtro dos veces
+
+Especificación (clave):
+    tipo      'fir' (ventana, signal.firwin) o un tipo IIR de TIPOS_IIR
+    orden     coeficientes para FIR (como firwin), orden para IIR
+    corte     Hz (par de valores para banda), con fs
+    btype     'low', 'high', 'band', 'stop'
+    ventana   solo FIR; rp / rs solo en los IIR que los usan
+
+Dos niveles:
+    memoria   LRU de los últimos CAPACIDAD_MEMORIA diseños
+    disco     un .npz por diseño en el directorio del registro (nombre =
+              hash de la clave), con coeficientes y respuestas calculadas;
+              sobrevive entre corridas y se comparte entre scripts
+
+Los IIR se guardan como secciones de segundo orden (k, 6); los FIR como h.
+"""
+
+import collections
+import hashlib
+import os
+import threading
+import time
+
+import numpy as np
+from scipy import signal
+
+TIPOS_IIR = ('butter', 'cheby1', 'cheby2', 'ellip', 'bessel')
+RIZADO_PASO = 1.0          # dB (cheby1, ellip)
+ATENUACION_RECHAZO = 40.0  # dB (cheby2, ellip)
+DIRECTORIO_REGISTRO = 'diseños_filtros'
+CAPACIDAD_MEMORIA = 256
+PUNTOS_RESPUESTA = 1024
+
+_PASS_ZERO = {'low': 'lowpass', 'high': 'highpass', 'band': 'bandpass', 'stop': 'bandstop'}
+
+
+def especificacion(tipo, orden, fc, fs=8000, btype='low', ventana='hamming',
+                   rp=RIZADO_PASO, rs=ATENUACION_RECHAZO, escalar=True):
+    """Clave normalizada: dos pedidos del mismo filtro dan la misma tupla"""
+    if tipo != 'fir' and tipo not in TIPOS_IIR:
+        raise ValueError(f"Tipo '{tipo}' no soportado (fir, {', '.join(TIPOS_IIR)})")
+    corte = tuple(float(f) for f in fc) if np.ndim(fc) else float(fc)
+    if tipo == 'fir':
+        ventana = tuple(ventana) if isinstance(ventana, (list, tuple)) else ventana
+        return ('fir', int(orden), corte, float(fs), btype, ventana, bool(escalar))
+    # Parámetros que el tipo no usa no deben separar diseños iguales
+    rp = float(rp) if tipo in ('cheby1', 'ellip') else None
+    rs = float(rs) if tipo in ('cheby2', 'ellip') else None
+    return (tipo, int(orden), corte, float(fs), btype, rp, rs)
+
+
+def calcular_diseño(clave):
+    """Coeficientes de una especificación (sin registro): h o sos"""
+    tipo, orden, corte, fs, btype = clave[:5]
+    if tipo == 'fir':
+        ventana, escalar = clave[5:]
+        return signal.firwin(orden, corte, window=ventana, pass_zero=_PASS_ZERO.get(btype, btype),
+                             scale=escalar, fs=fs)
+    rp, rs = clave[5:]
+    if tipo == 'butter':
+        return signal.butter(orden, corte, btype=btype, fs=fs, output='sos')
+    if tipo == 'cheby1':
+        return signal.cheby1(orden, rp, corte, btype=btype, fs=fs, output='sos')
+    if tipo == 'cheby2':
+        return signal.cheby2(orden, rs, corte, btype=btype, fs=fs, output='sos')
+    if tipo == 'ellip':
+        return signal.ellip(orden, rp, rs, corte, btype=btype, fs=fs, output='sos')
+    return signal.bessel(orden, corte, btype=btype, fs=fs, output='sos', norm='mag')
+
+
+def calcular_respuesta(clave, coeficientes, worN=PUNTOS_RESPUESTA):
+    """(w en Hz, H) de los coeficientes de una especificación"""
+    fs = clave[3]
+    if clave[0] == 'fir':
+        return signal.freqz(coeficientes, 1, worN=worN, fs=fs)
+    return signal.sosfreqz(coeficientes, worN=worN, fs=fs)
+
+
+class RegistroDiseños:
+    def __init__(self, directorio=DIRECTORIO_REGISTRO, capacidad=CAPACIDAD_MEMORIA):
+        # directorio None: solo el nivel en memoria
+        self.directorio = directorio
+        self.capacidad = capacidad
+        self.memoria = collections.OrderedDict()  # clave -> {'coeficientes', 'respuestas'}
+        self.candado = threading.Lock()
+        self.aciertos_memoria = 0
+        self.aciertos_disco = 0
+        self.calculados = 0
+
+    def ruta(self, clave):
+        nombre = hashlib.sha1(repr(clave).encode()).hexdigest()[:20]
+        return os.path.join(self.directorio, nombre + '.npz')
+
+    # ------------------------------------------------------------------
+    # Niveles
+    # ------------------------------------------------------------------
+
+    def _entrada(self, clave):
+        """(entrada, nueva): de memoria, luego de disco, luego se calcula
+
+        nueva indica que todavía no está en disco; quien la pidió la guarda
+        una sola vez, ya con la respuesta si también la calculó.
+        """
+        entrada = self.memoria.get(clave)
+        if entrada is not None:
+            self.memoria.move_to_end(clave)
+            self.aciertos_memoria += 1
+            return entrada, False
+        entrada = self._leer(clave)
+        nueva = entrada is None
+        if nueva:
+            entrada = {'coeficientes': np.asarray(calcular_diseño(clave), dtype=float), 'respuestas': {}}
+            self.calculados += 1
+        else:
+            self.aciertos_disco += 1
+        self.memoria[clave] = entrada
+        if len(self.memoria) > self.capacidad:
+            self.memoria.popitem(last=False)
+        return entrada, nueva
+
+    def _leer(self, clave):
+        if self.directorio is None:
+            return None
+        try:
+            with np.load(self.ruta(clave)) as datos:
+                if str(datos['clave']) != repr(clave):
+                    return None  # colisión de hash: se recalcula y se reemplaza
+                respuestas = {int(nombre[2:]): (datos[nombre], datos['H_' + nombre[2:]])
+                              for nombre in datos.files if nombre.startswith('w_')}
+                return {'coeficientes': datos['coeficientes'], 'respuestas': respuestas}
+        except (OSError, KeyError, ValueError):
+            return None
+
+    def _guardar(self, clave, entrada):
+        if self.directorio is None:
+            return
+        arreglos = {'clave': np.array(repr(clave)), 'coeficientes': entrada['coeficientes']}
+        for puntos, (w, H) in entrada['respuestas'].items():
+            arreglos[f'w_{puntos}'] = w
+            arreglos[f'H_{puntos}'] = H
+        ruta = self.ruta(clave)
+        temporal = ruta + '.tmp.npz'
+        try:
+            os.makedirs(self.directorio, exist_ok=True)
+            np.savez(temporal, **arreglos)
+            os.replace(temporal, ruta)
+        except OSError:
+            pass  # sin disco escribible el registro sigue en memoria
+
+    # ------------------------------------------------------------------
+    # Consultas
+    # ------------------------------------------------------------------
+
+    def diseño(self, tipo, orden, fc, fs=8000, **opciones):
+        """Coeficientes (h o sos) del diseño; copia que se puede modificar"""
+        clave = especificacion(tipo, orden, fc, fs, **opciones)
+        with self.candado:
+            entrada, nueva = self._entrada(clave)
+            if nueva:
+                self._guardar(clave, entrada)
+            return entrada['coeficientes'].copy()
+
+    def respuesta(self, tipo, orden, fc, fs=8000, worN=PUNTOS_RESPUESTA, **opciones):
+        """(w en Hz, H) del diseño, calculada una vez por número de puntos"""
+        clave = especificacion(tipo, orden, fc, fs, **opciones)
+        worN = int(worN)
+        with self.candado:
+            entrada, nueva = self._entrada(clave)
+            if worN not in entrada['respuestas']:
+                entrada['respuestas'][worN] = calcular_respuesta(clave, entrada['coeficientes'], worN)
+                nueva = True
+            if nueva:
+                self._guardar(clave, entrada)
+            w, H = entrada['respuestas'][worN]
+        return w.copy(), H.copy()
+
+    def limpiar(self, disco=False):
+        """Vacía la memoria (y con disco=True, los .npz del registro)"""
+        with self.candado:
+            self.memoria.clear()
+            if disco and self.directorio and os.path.isdir(self.directorio):
+                for nombre in os.listdir(self.directorio):
+                    if nombre.endswith('.npz'):
+                        os.remove(os.path.join(self.directorio, nombre))
+
+    def estadisticas(self):
+        return {'en_memoria': len(self.memoria), 'aciertos_memoria': self.aciertos_memoria,
+                'aciertos_disco': self.aciertos_disco, 'calculados': self.calculados}
+
+
+_registro = None
+
+
+def registro():
+    """Registro compartido por todo el proceso (se crea al primer uso)"""
+    global _registro
+    if _registro is None:
+        _registro = RegistroDiseños()
+    return _registro
+
+
+def diseñar_fir(taps, fc, fs=8000, ventana='hamming', btype='low', escalar=True):
+    """Igual que signal.firwin(taps, fc, window=ventana, fs=fs), desde el registro"""
+    return registro().diseño('fir', taps, fc, fs, btype=btype, ventana=ventana, escalar=escalar)
+
+
+def respuesta_diseño(tipo, orden, fc, fs=8000, worN=PUNTOS_RESPUESTA, **opciones):
+    """Respuesta en frecuencia de un diseño por su especificación, desde el registro"""
+    return registro().respuesta(tipo, orden, fc, fs, worN, **opciones)
+
+
+def benchmark_registro(fs=8000):
+    """Barrido de diseños: sin registro, registro vacío, desde disco y desde memoria"""
+    import tempfile
+
+    barrido = [('fir', taps, fc, {}) for taps in (21, 41, 81, 255) for fc in range(300, 3300, 300)]
+    barrido += [(tipo, orden, fc, {}) for tipo in TIPOS_IIR for orden in (4, 8)
+                for fc in range(300, 3300, 300)]
+
+    def recorrer(consultar):
+        inicio = time.perf_counter()
+        for tipo, orden, fc, opciones in barrido:
+            consultar(tipo, orden, fc, opciones)
+        return time.perf_counter() - inicio
+
+    def sin_registro(tipo, orden, fc, opciones):
+        clave = especificacion(tipo, orden, fc, fs, **opciones)
+        calcular_respuesta(clave, calcular_diseño(clave))
+
+    with tempfile.TemporaryDirectory() as directorio:
+        print(f"\nREGISTRO DE DISEÑOS ({len(barrido)} diseños + respuesta de {PUNTOS_RESPUESTA} puntos):")
+        print(f"{'CORRIDA':^22} | {'TIEMPO ms':^9} | {'CALCULADOS':^10} | {'DISCO':^5} | {'MEMORIA':^7}")
+        print("-" * 66)
+        print(f"{'sin registro':^22} | {recorrer(sin_registro)*1000:^9.1f} | {len(barrido):^10} | "
+              f"{'-':^5} | {'-':^7}")
+        for nombre, nuevo in (('registro vacío', True), ('nueva corrida (disco)', True),
+                              ('misma corrida', False)):
+            if nuevo:
+                reg = RegistroDiseños(directorio)
+            antes = reg.estadisticas()
+            t = recorrer(lambda tipo, orden, fc, opciones: reg.respuesta(tipo, orden, fc, fs, **opciones))
+            despues = reg.estadisticas()
+            print(f"{nombre:^22} | {t*1000:^9.1f} | "
+                  f"{despues['calculados'] - antes['calculados']:^10} | "
+                  f"{despues['aciertos_disco'] - antes['aciertos_disco']:^5} | "
+                  f"{despues['aciertos_memoria'] - antes['aciertos_memoria']:^7}")
+        archivos = os.listdir(directorio)
+        tamaño = sum(os.path.getsize(os.path.join(directorio, a)) for a in archivos)
+        print(f"   {len(archivos)} archivos .npz, {tamaño / 1024:.0f} KiB en disco")
+
+
+def main():
+    benchmark_registro()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,225 @@
+#!/usr/bin/env python3
+"""
+SESIÓN PERSISTENTE CON ARDUINO MEGA
+Abre la placa una sola vez, la mantiene viva con pings baratos ('p') y
+se reconecta de forma transparente si el USB se cae
+
+SesionArduino tiene la misma interfaz que serial.Serial, así que se usa
+directamente como self.arduino en SistemaCompletoClase.
+"""
+
+import threading
+import time
+from contextlib import contextmanager, nullcontext
+
+INTERVALO_PING = 5.0     # s de inactividad antes de enviar un ping
+TIMEOUT_PING = 1.0
+REINTENTOS_RECONEXION = 5
+ESPERA_RECONEXION = 0.5  # s, se duplica en cada reintento
+
+
+class SesionArduino:
+    def __init__(self, abrir, intervalo_ping=INTERVALO_PING, al_reconectar=None,
+                 reintentos=REINTENTOS_RECONEXION):
+        # abrir: función sin argumentos que regresa un puerto tipo serial.Serial
+        self._abrir = abrir
+        self.puerto = abrir()
+        self.intervalo_ping = intervalo_ping
+        self.al_reconectar = al_reconectar  # p. ej. esperar READY y restaurar filtro
+        self.reintentos = reintentos
+        self.soporta_ping = True
+
+        self._bloqueo = threading.RLock()
+        self._operaciones = 0         # operaciones marcadas + llamadas de E/S en curso
+        self._reconectando = False
+        self._cerrada = False
+        self.ultima_actividad = time.monotonic()
+        self.pings = 0
+        self.reconexiones = 0
+
+        # Contadores para telemetria_lotes.py (sin contar los pings)
+        self.bytes_enviados = 0
+        self.bytes_recibidos = 0
+        self.t_escritura = None       # última escritura
+        self.t_primer_byte = None     # primer byte recibido tras esa escritura
+        self.t_ultimo_byte = None
+
+        self._detener = threading.Event()
+        self._hilo = threading.Thread(target=self._mantener_viva, daemon=True)
+        self._hilo.start()
+
+    # ------------------------------------------------------------------
+    # Interfaz tipo serial.Serial
+    # ------------------------------------------------------------------
+
+    @property
+    def port(self):
+        return self.puerto.port
+
+    @property
+    def timeout(self):
+        return self.puerto.timeout
+
+    @timeout.setter
+    def timeout(self, valor):
+        self.puerto.timeout = valor
+
+    @property
+    def baudrate(self):
+        return self.puerto.baudrate
+
+    @baudrate.setter
+    def baudrate(self, valor):
+        self.puerto.baudrate = valor
+
+    @property
+    def is_open(self):
+        return not self._cerrada and self.puerto.is_open
+
+    @property
+    def in_waiting(self):
+        return self._llamar(lambda: self.puerto.in_waiting)
+
+    def write(self, datos):
+        enviados = self._llamar(lambda: self.puerto.write(datos))
+        self.bytes_enviados += len(datos)
+        self.t_escritura = time.perf_counter()
+        self.t_primer_byte = None
+        return enviados
+
+    def read(self, size=1):
+        return self._contar(self._llamar(lambda: self.puerto.read(size)))
+
+    def readline(self):
+        return self._contar(self._llamar(lambda: self.puerto.readline()))
+
+    def _contar(self, datos):
+        if datos:
+            ahora = time.perf_counter()
+            self.bytes_recibidos += len(datos)
+            if self.t_primer_byte is None:
+                self.t_primer_byte = ahora
+            self.t_ultimo_byte = ahora
+        return datos
+
+    def reset_input_buffer(self):
+        return self._llamar(lambda: self.puerto.reset_input_buffer())
+
+    def flush(self):
+        return self._llamar(lambda: self.puerto.flush())
+
+    def close(self):
+        """Cierra la sesión de verdad (fin del programa)"""
+        self._cerrada = True
+        self._detener.set()
+        try:
+            self.puerto.close()
+        except OSError:
+            pass
+
+    def _llamar(self, operacion):
+        """Ejecuta una operación de E/S; ante un fallo del USB reconecta y reintenta
+
+        La sesión queda ocupada (bajo _bloqueo) antes de tocar el puerto: si
+        hay un ping en curso se espera a que termine, y mientras dure la
+        llamada no sale ninguno. El candado no se sostiene durante la E/S
+        para que el escritor y el lector del pipeline sigan en paralelo.
+        """
+        with self._bloqueo:
+            self._operaciones += 1
+            self.ultima_actividad = time.monotonic()
+        try:
+            try:
+                resultado = operacion()
+            except OSError:  # serial.SerialException hereda de IOError
+                if self._cerrada or self._reconectando or not self.reconectar():
+                    raise
+                resultado = operacion()
+        finally:
+            with self._bloqueo:
+                self._operaciones -= 1
+                self.ultima_actividad = time.monotonic()
+        return resultado
+
+    # ------------------------------------------------------------------
+    # Keep-alive y reconexión
+    # ------------------------------------------------------------------
+
+    @contextmanager
+    def operacion(self):
+        """Marca una operación de varios comandos: no se intercalan pings"""
+        with self._bloqueo:
+            self._operaciones += 1
+        try:
+            yield self
+        finally:
+            with self._bloqueo:
+                self._operaciones -= 1
+                self.ultima_actividad = time.monotonic()
+
+    def _mantener_viva(self):
+        while not self._detener.wait(self.intervalo_ping / 2):
+            # Con el candado tomado ninguna llamada puede empezar entre la
+            # revisión y el ping
+            with self._bloqueo:
+                inactiva = time.monotonic() - self.ultima_actividad
+                if inactiva >= self.intervalo_ping:
+                    self.ping()
+
+    def ping(self):
+        """Envía 'p' y espera cualquier respuesta; si no llega, reconecta"""
+        with self._bloqueo:
+            if self._operaciones or self._cerrada:
+                return True
+            try:
+                if not self.soporta_ping:
+                    # Sketch sin ACK: solo se verifica que el puerto siga abierto
+                    return self.puerto.is_open or self.reconectar()
+                timeout_original = self.puerto.timeout
+                self.puerto.timeout = TIMEOUT_PING
+                # Con captura_serial activa el ping se graba aparte y no
+                # desalinea la reproducción
+                marcar = getattr(self.puerto, 'grabar_como_ping', None)
+                try:
+                    with marcar() if marcar else nullcontext():
+                        self.puerto.write(b'p\n')
+                        respuesta = self.puerto.readline()
+                finally:
+                    self.puerto.timeout = timeout_original
+                self.pings += 1
+                self.ultima_actividad = time.monotonic()
+                if respuesta:
+                    return True
+            except OSError:
+                pass
+            return self.reconectar()
+
+    def reconectar(self):
+        """Reabre el puerto con reintentos y espera creciente"""
+        with self._bloqueo:
+            self._reconectando = True
+            try:
+                try:
+                    self.puerto.close()
+                except OSError:
+                    pass
+
+                espera = ESPERA_RECONEXION
+                for intento in range(self.reintentos):
+                    if self._cerrada:
+                        return False
+                    try:
+                        self.puerto = self._abrir()
+                        self.reconexiones += 1
+                        print(f"\n Arduino reconectado en {self.puerto.port} (intento {intento + 1})")
+                        if self.al_reconectar:
+                            self.al_reconectar()
+                        self.ultima_actividad = time.monotonic()
+                        return True
+                    except OSError:
+                        time.sleep(espera)
+                        espera *= 2
+                print(f"\n No se pudo reconectar el Arduino")
+                return False
+            finally:
+                self._reconectando = False
@@ -13,6 +13,29 @@ import sounddevice as sd
 import serial
 import time
 import os
+import sys
+import copy
+import threading
+
+import protocolo_binario
+from transmision_pipeline import TransmisorPipeline
+from emulador_arduino import EmuladorArduino
+from capa_comandos import CapaComandos
+from lote_adaptativo import ControladorLote
+from procesamiento_multiplaca import ProcesadorMultiplaca, calentamiento_filtro
+from cliente_asincrono import ClienteArduinoAsync, GestorTrabajos
+from sesion_arduino import SesionArduino, INTERVALO_PING
+from negociacion_baudios import NegociadorBaudios, BAUDIOS_BASE
+from verificacion_referencia import VerificadorReferencia
+from telemetria_lotes import TelemetriaLotes
+from punto_control import PuntoControl
+from carga_coeficientes import CargadorCoeficientes, cuantizar_diseño, huella_coeficientes
+from filtros_punto_fijo import FILTRO_CARGADO, FILTRO_IIR
+from filtros_sos import diseñar_iir
+from registro_diseños import diseñar_fir
+from captura_serial import GrabadorCaptura, PuertoGrabador, ReproductorCaptura
+from descubrimiento_puertos import DescubridorPuertos
+from medicion_enlace import MedidorEnlace, guardar_reportes
 
 # Importar módulos del sistema
 try:
@@ -21,11 +44,50 @@ except ImportError:
     print("Ejecuta primero grabador_voz_clase.py para crear grabaciones")
 
 class SistemaCompletoClase:
-    def __init__(self, puerto='COM4', fs=8000):
+    def __init__(self, puerto='COM4', fs=8000, protocolo='ascii', pipeline=False,
+                 lote_adaptativo=False, puertos_adicionales=None, sesion_persistente=True,
+                 formato_binario=protocolo_binario.FORMATO_10BITS, negociar_baudios=False,
+                 verificar_referencia=False, ruta_telemetria=None, puntos_control=True,
+                 ruta_captura=None, conexiones=None):
+        if lote_adaptativo and pipeline and protocolo == 'binario':
+            # En pipeline los lotes en vuelo tienen tamaño fijo
+            raise ValueError("El lote adaptativo solo funciona en modo secuencial (sin pipeline)")
         self.puerto = puerto
         self.fs = fs
         self.arduino = None
+        self.comandos = None  # CapaComandos sobre self.arduino
         self.conectado = False
+        self.protocolo = protocolo  # 'ascii' (sketch original) o 'binario'
+        self.formato_binario = formato_binario  # 16, 10 bits o delta (ambos sentidos)
+        self.negociar_baudios = negociar_baudios  # Subir la velocidad del enlace al conectar
+        # Comparar cada lote con el modelo del sketch; opcional hasta contrastar
+        # filtros_punto_fijo con el sketch real en una placa
+        self.verificar_referencia = verificar_referencia
+        self.verificador = None
+        self.ruta_telemetria = ruta_telemetria  # Carpeta para la traza JSON/CSV (None = solo resumen)
+        self.telemetria = None  # TelemetriaLotes de la última corrida
+        self.fallos_analisis = 0  # Respuestas recibidas que no se pudieron decodificar
+        self.puntos_control = puntos_control  # Guardar cada lote en disco para reanudar corridas
+        self.tamaño_lote = 600  # Muestras por lote (inicial si el lote es adaptativo)
+        self.ruta_captura = ruta_captura  # Carpeta donde grabar el tráfico serial (None = no grabar)
+        self.grabador_captura = None
+        self.conexiones = dict(conexiones or {})  # Puertos ya abiertos y listos (DescubridorPuertos)
+        self.baudios = BAUDIOS_BASE
+        self.secuencia = 0
+        self.pipeline = pipeline  # Escritor/lector concurrentes (solo binario)
+        self.lote_adaptativo = lote_adaptativo  # Tamaño de lote según throughput y fallos
+        self.puertos_adicionales = list(puertos_adicionales or [])  # Placas extra en paralelo
+        self.placas_adicionales = []
+        self.sesion_persistente = sesion_persistente  # Reusar la conexión entre acciones del menú
+        self.filtro_actual = None  # Se restaura tras una reconexión
+        self.coeficientes_cargados = None  # (es_fir, bits, valores) del filtro subido (tipo 3)
+        self.reintentos_lote = 3  # Retransmisiones por lote fallido o incompleto
+        self.presupuesto_reintentos = self.reintentos_lote  # Retransmisiones restantes (por archivo)
+        self.retransmisiones = 0
+        self.trabajos = None  # GestorTrabajos (se crea al lanzar el primer trabajo)
+        self.cliente_async = None
+        self.al_progresar = None  # función(fracción) tras cada lote (trabajos en segundo plano)
+        self.cancelacion = None  # threading.Event del trabajo en curso; se atiende entre lotes
         self.grabador = GrabadorVozClase(fs)
         
         print("=" * 60)
@@ -33,7 +95,10 @@ class SistemaCompletoClase:
         print("Grabación en vivo + Arduino Mega + Análisis completo")
         print("=" * 60)
         print(f"Puerto Arduino: {puerto}")
+        if self.puertos_adicionales:
+            print(f"Placas adicionales: {', '.join(self.puertos_adicionales)}")
         print(f"Frecuencia: {fs} Hz")
+        print(f"Protocolo: {protocolo}{' (pipeline)' if pipeline else ''}")
         print("=" * 60)
     
     def menu_principal_clase(self):
@@ -57,9 +122,20 @@ class SistemaCompletoClase:
             print("7. Mostrar espectros de grabaciones")
             print("8. Reproducir archivos existentes")
             print("9. Salir")
+            print("")
+            print("SEGUNDO PLANO:")
+            print("10. Procesar archivo en segundo plano")
+            print("11. Ver trabajos en segundo plano")
+            print("")
+            print("FILTROS:")
+            print("12. Cargar filtro personalizado (sin regrabar el Arduino)")
             
             try:
-                opcion = input(f"\nSelecciona opción (1-9): ").strip()
+                opcion = input(f"\nSelecciona opción (1-12): ").strip()
+                
+                if opcion in ('1', '3', '4', '5', '6', '12') and self.arduino_ocupado():
+                    print("Arduino ocupado por un trabajo en segundo plano (opción 11)")
+                    continue
                 
                 if opcion == '1':
                     self.verificar_sistema_completo()
@@ -86,9 +162,21 @@ class SistemaCompletoClase:
                     self.reproducir_archivos()
                     
                 elif opcion == '9':
+                    if self.trabajos:
+                        self.trabajos.cerrar()
+                    self.desconectar_arduino(forzar=True)
                     print("👋 ¡Clase completada exitosamente!")
                     break
                     
+                elif opcion == '10':
+                    self.procesar_en_segundo_plano()
+                    
+                elif opcion == '11':
+                    self.revisar_trabajos()
+                    
+                elif opcion == '12':
+                    self.cargar_filtro_personalizado()
+                    
                 else:
                     print("Opción no válida")
                     
@@ -113,10 +201,8 @@ class SistemaCompletoClase:
         print("\n2. COMUNICACIÓN ARDUINO:")
         arduino_ok = self.conectar_arduino()
         if arduino_ok:
-            self.arduino.write(b't\n')
-            time.sleep(2)
-            self.arduino.close()
-            self.conectado = False
+            self.comandos.enviar('t')
+            self.desconectar_arduino()
         
         # 3. Verificar archivos existentes
         print("\n3. ARCHIVOS DE AUDIO:")
@@ -186,29 +272,68 @@ class SistemaCompletoClase:
         
         return archivos
     
+    def abrir_puerto(self, baudios=115200, timeout=3):
+        """Abre el puerto serial real, el emulador si puerto='EMULADOR...' o una
+        captura grabada si puerto='CAPTURA:<archivo>'"""
+        if self.puerto.startswith('CAPTURA:'):
+            return ReproductorCaptura(self.puerto[len('CAPTURA:'):], baudrate=baudios, timeout=timeout)
+        if self.puerto in self.conexiones:
+            # Abierto por el descubrimiento: la placa ya pasó el reinicio
+            puerto = self.conexiones.pop(self.puerto)
+        elif self.puerto.startswith('EMULADOR'):
+            puerto = EmuladorArduino(self.puerto, baudrate=baudios, timeout=timeout)
+        else:
+            puerto = serial.Serial(self.puerto, baudios, timeout=timeout)
+        if self.ruta_captura:
+            # Un solo archivo por sesión, también a través de las reconexiones
+            if self.grabador_captura is None:
+                nombre = f"sesion_{os.path.basename(self.puerto)}_{time.strftime('%Y%m%d_%H%M%S')}.cap"
+                self.grabador_captura = GrabadorCaptura(os.path.join(self.ruta_captura, nombre))
+                print(f"   Grabando tráfico serial en {self.grabador_captura.ruta}")
+            puerto = PuertoGrabador(puerto, self.grabador_captura)
+        return puerto
+    
     def conectar_arduino(self):
-        """Conecta con Arduino Mega"""
+        """Conecta con Arduino Mega (y con las placas adicionales, si hay)"""
+        if self.sesion_persistente and self.conectado and self.arduino and self.arduino.is_open:
+            print(f" Reutilizando conexión Arduino en {self.puerto} (sesión activa)")
+            return True
+        if not self.conectar_placa():
+            return False
+        if self.puertos_adicionales:
+            self.conectar_placas_adicionales()
+        return True
+    
+    def conectar_placa(self):
+        """Conecta con la placa de self.puerto"""
         try:
             print(f"Conectando Arduino en {self.puerto}...")
-            self.arduino = serial.Serial(self.puerto, 115200, timeout=3)
-            time.sleep(3)
+            # La reproducción omite los pings grabados y no contesta pings
+            # nuevos: sin keep-alive al reproducir una captura
+            intervalo_ping = 1e6 if self.puerto.startswith('CAPTURA:') else INTERVALO_PING
+            recien_abierto = self.puerto not in self.conexiones
+            self.arduino = SesionArduino(self.abrir_puerto, intervalo_ping=intervalo_ping,
+                                         al_reconectar=self.restaurar_sesion)
+            self.comandos = CapaComandos(self.arduino)
+            
+            # Esperar fin del arranque (READY) en lugar de una pausa fija
+            if recien_abierto and self.comandos.esperar_listo():
+                print(f"   Arduino listo en {self.comandos.latencias['READY'][-1]:.2f}s")
             
             self.arduino.reset_input_buffer()
-            self.arduino.write(b't\n')
-            time.sleep(2)
+            ok, respuestas = self.comandos.enviar('t')
+            self.arduino.soporta_ping = bool(self.comandos.soporta_ack)
             
             # Leer respuesta
-            respuestas = []
-            for _ in range(10):
-                if self.arduino.in_waiting:
-                    respuesta = self.arduino.readline().decode().strip()
-                    respuestas.append(respuesta)
-                    print(f"   Arduino: {respuesta}")
-                    if "COMUNICACIÓN OK" in respuesta:
-                        self.conectado = True
-                        print(" Arduino conectado exitosamente")
-                        return True
-                time.sleep(0.3)
+            for respuesta in respuestas:
+                print(f"   Arduino: {respuesta}")
+                if "COMUNICACIÓN OK" in respuesta:
+                    self.conectado = True
+                    print(" Arduino conectado exitosamente")
+                    if self.negociar_baudios:
+                        self.baudios = NegociadorBaudios(self.arduino, self.comandos).negociar()
+                        print(f"   Enlace a {self.baudios} baudios")
+                    return True
             
             # Si llegamos aquí, hay comunicación básica
             self.conectado = True
@@ -221,7 +346,122 @@ class SistemaCompletoClase:
             print("   • ¿Arduino conectado al puerto COM4?")
             print("   • ¿Código cargado en Arduino?")
             print("   • ¿Cable USB funcionando?")
+            print("   • ¿Placa cambiada de puerto? Ejecuta con --redescubrir")
+            return False
+    
+    def conectar_placas_adicionales(self):
+        """Conecta en paralelo las placas extra para procesamiento multiplaca"""
+        placas = []
+        for puerto in self.puertos_adicionales:
+            placa = copy.copy(self)
+            placa.puerto = puerto
+            placa.arduino = None
+            placa.comandos = None
+            placa.conectado = False
+            placa.filtro_actual = None
+            placa.coeficientes_cargados = None
+            placa.grabador_captura = None
+            placa.puertos_adicionales = []
+            placa.placas_adicionales = []
+            placas.append(placa)
+        
+        hilos = [threading.Thread(target=placa.conectar_placa, daemon=True) for placa in placas]
+        for hilo in hilos:
+            hilo.start()
+        for hilo in hilos:
+            hilo.join()
+        
+        self.placas_adicionales = [placa for placa in placas if placa.conectado]
+        print(f" Placas en paralelo: {1 + len(self.placas_adicionales)}")
+        return self.placas_adicionales
+    
+    def restaurar_sesion(self):
+        """Tras una reconexión: espera el arranque y vuelve a seleccionar el filtro"""
+        self.comandos.esperar_listo()
+        self.arduino.reset_input_buffer()
+        # La placa reinicia a la velocidad base: se vuelve a la negociada
+        if self.baudios != self.arduino.baudrate:
+            if not NegociadorBaudios(self.arduino, self.comandos).probar(self.baudios):
+                self.baudios = self.arduino.baudrate
+        if self.filtro_actual == FILTRO_CARGADO:
+            # La RAM de la placa se perdió: se vuelve a subir el filtro
+            CargadorCoeficientes(self.arduino).cargar_cuantizados(self.coeficientes_cargados)
+        elif self.filtro_actual is not None:
+            self.comandos.enviar(str(self.filtro_actual))
+    
+    def cargar_coeficientes(self, diseño):
+        """Sube un diseño (h, (b, a) o sos) a la placa y lo deja como filtro tipo 3
+        
+        Regresa True si la placa confirmó la carga.
+        """
+        return self.subir_coeficientes(cuantizar_diseño(diseño))
+    
+    def subir_coeficientes(self, coeficientes):
+        """Sube coeficientes ya cuantizados (es_fir, bits, valores)"""
+        cargador = CargadorCoeficientes(self.arduino)
+        with self.arduino.operacion():
+            confirmado = cargador.cargar_cuantizados(coeficientes)
+        if not confirmado:
+            print(f" La placa en {self.puerto} no confirmó los coeficientes (¿sketch sin carga por trama?)")
+            return False
+        self.coeficientes_cargados = coeficientes
+        self.filtro_actual = FILTRO_CARGADO
+        es_fir, bits, valores = coeficientes
+        print(f" Filtro cargado: {'FIR' if es_fir else 'IIR'} de "
+              f"{len(valores) if es_fir else len(valores) // 5} "
+              f"{'coeficientes' if es_fir else 'secciones'} Q{bits} "
+              f"en {cargador.latencias[-1]*1000:.1f} ms")
+        return True
+    
+    def cargar_filtro_personalizado(self):
+        """Diseña un filtro desde el menú y lo sube a la placa"""
+        print(f"\nDiseños disponibles:")
+        print("1. FIR ventana Hamming (firwin)")
+        print("2. IIR Butterworth (secciones bicuadráticas)")
+        print("3. Diseños de la demo (procesador_demo_mejorado.py)")
+        try:
+            opcion = input("Selecciona diseño (1-3): ").strip()
+            if opcion == '1':
+                taps = int(input("Número de coeficientes (máx. 128): "))
+                fc = float(input("Frecuencia de corte (Hz): "))
+                diseño = diseñar_fir(taps, fc, self.fs)
+            elif opcion == '2':
+                orden = int(input("Orden (máx. 16): "))
+                fc = float(input("Frecuencia de corte (Hz): "))
+                tipo = 'high' if input("¿Pasaaltas? (s/n): ").strip().lower() == 's' else 'low'
+                diseño = diseñar_iir(orden, fc, self.fs, btype=tipo)
+            elif opcion == '3':
+                from procesador_demo_mejorado import DemoFiltrosSimple
+                h_fir, iir = DemoFiltrosSimple(self.fs).diseñar_filtros()
+                diseño = h_fir if input("¿FIR o IIR? (f/i): ").strip().lower() == 'f' else iir
+            else:
+                print("Opción no válida")
+                return
+            if self.conectar_arduino():
+                self.cargar_coeficientes(diseño)
+                print("   Usa el filtro 3 al procesar un archivo")
+        except ValueError as e:
+            print(f" Diseño inválido: {e}")
+    
+    def desconectar_arduino(self, forzar=False):
+        """Cierra la placa principal y las adicionales
+
+        Con sesión persistente la conexión se conserva (salvo forzar=True) para
+        que la siguiente acción no pague otra vez el reinicio de la placa.
+        Regresa True si el puerto se cerró.
+        """
+        if self.sesion_persistente and not forzar:
             return False
+        for placa in self.placas_adicionales:
+            placa.desconectar_arduino(forzar=True)
+        self.placas_adicionales = []
+        if self.arduino and self.arduino.is_open:
+            self.arduino.close()
+        if self.grabador_captura:
+            self.grabador_captura.cerrar()
+            self.grabador_captura = None
+        self.conectado = False
+        return True
     
     def test_arduino(self):
         """Test específico de comunicación Arduino"""
@@ -233,36 +473,45 @@ class SistemaCompletoClase:
         if self.conectar_arduino():
             try:
                 # Test completo
-                self.arduino.write(b't\n')
-                time.sleep(2)
+                ok, respuestas = self.comandos.enviar('t')
                 
                 print("\nRespuestas del Arduino:")
-                for _ in range(15):
-                    if self.arduino.in_waiting:
-                        respuesta = self.arduino.readline().decode().strip()
-                        if respuesta:
-                            print(f"   {respuesta}")
-                    time.sleep(0.2)
+                for respuesta in respuestas:
+                    print(f"   {respuesta}")
                 
                 # Test de filtros
                 print(f"\nProbando configuración de filtros...")
                 for filtro in [0, 1, 2]:
-                    self.arduino.write(f"{filtro}\n".encode())
-                    time.sleep(1)
+                    ok, resp = self.comandos.enviar(str(filtro))
                     
                     # Leer respuesta
-                    if self.arduino.in_waiting:
-                        resp = self.arduino.readline().decode().strip()
-                        print(f"   Filtro {filtro}: {resp}")
+                    if resp:
+                        print(f"   Filtro {filtro}: {resp[0]}")
+                    elif not ok:
+                        print(f"   Filtro {filtro}: sin confirmación")
+                
+                self.comandos.reporte_latencias()
                 
+                # Velocidad del enlace: bytes/s y errores por baudios
+                if self.comandos.soporta_ack:
+                    negociador = NegociadorBaudios(self.arduino, self.comandos)
+                    self.baudios = negociador.negociar()
+                    negociador.reporte()
+                
+                # Latencia, jitter y carga máxima sin pérdida del protocolo en uso
+                medidor = MedidorEnlace(self.arduino, self.comandos, self.protocolo, self.formato_binario)
+                with self.arduino.operacion():
+                    medidor.reporte(medidor.medir(etiqueta=f"(lote de {self.tamaño_lote})"))
+                if self.ruta_telemetria:
+                    nombre = f"enlace_{self.protocolo}_{self.baudios}_{time.strftime('%Y%m%d_%H%M%S')}.json"
+                    guardar_reportes([medidor.reporte_actual], os.path.join(self.ruta_telemetria, nombre))
                 print(" Test completo exitoso")
                 
             except Exception as e:
                 print(f" Error en test: {e}")
             finally:
                 if self.arduino:
-                    self.arduino.close()
-                    self.conectado = False
+                    self.desconectar_arduino()
         else:
             print(" No se pudo conectar para el test")
     
@@ -349,9 +598,8 @@ class SistemaCompletoClase:
         finally:
             # 7. Cerrar conexión
             if self.arduino and self.arduino.is_open:
-                self.arduino.close()
-                self.conectado = False
-                print("\nConexión Arduino cerrada")
+                if self.desconectar_arduino():
+                    print("\nConexión Arduino cerrada")
         
         print(f"\n🎉 DEMOSTRACIÓN COMPLETA EXITOSA")
     
@@ -359,126 +607,507 @@ class SistemaCompletoClase:
         """Procesa archivo completo usando Arduino por lotes"""
         
         try:
-            # Cargar audio
-            fs_orig, audio = wavfile.read(archivo)
             print(f"Procesando {archivo} con filtro tipo {tipo_filtro}")
+            audio_adc = self.preparar_audio_adc(archivo)
             
-            # Preparar audio
-            if audio.ndim > 1:
-                audio = np.mean(audio, axis=1)
-            if audio.dtype == np.int16:
-                audio = audio.astype(np.float32) / 32768.0
+            duracion_total = len(audio_adc) / self.fs
+            print(f"Duración: {duracion_total:.1f}s, Muestras: {len(audio_adc)}")
             
-            if fs_orig != self.fs:
-                num_samples = int(len(audio) * self.fs / fs_orig)
-                audio = signal.resample(audio, num_samples)
+            # Repartir entre varias placas si están conectadas
+            if self.placas_adicionales:
+                procesador = ProcesadorMultiplaca([self] + self.placas_adicionales)
+                return procesador.procesar(audio_adc, tipo_filtro)
             
-            # Convertir a ADC
-            audio_normalizado = np.clip(audio, -1, 1)
-            audio_adc = ((audio_normalizado + 1) * 511.5).astype(int)
+            # Punto de control en disco: una corrida interrumpida continúa donde quedó
+            punto_control = None
+            if self.puntos_control:
+                clave_filtro = tipo_filtro
+                if tipo_filtro == FILTRO_CARGADO:
+                    # Distintos filtros cargados no comparten punto de control
+                    clave_filtro = f"{tipo_filtro}-{huella_coeficientes(self.coeficientes_cargados)}"
+                punto_control = PuntoControl(archivo, clave_filtro, self.tamaño_lote, len(audio_adc))
+            try:
+                return self.procesar_muestras_adc(audio_adc, tipo_filtro, punto_control)
+            finally:
+                if punto_control:
+                    self.cerrar_punto_control(punto_control)
+                
+        except Exception as e:
+            print(f" Error en procesamiento: {e}")
+            return None, None
+    
+    def preparar_audio_adc(self, archivo):
+        """Carga un WAV y lo convierte a muestras ADC de 10 bits (0-1023)"""
+        
+        # Cargar audio
+        fs_orig, audio = wavfile.read(archivo)
+        
+        # Preparar audio
+        if audio.ndim > 1:
+            audio = np.mean(audio, axis=1)
+        if audio.dtype == np.int16:
+            audio = audio.astype(np.float32) / 32768.0
+        
+        if fs_orig != self.fs:
+            num_samples = int(len(audio) * self.fs / fs_orig)
+            audio = signal.resample(audio, num_samples)
+        
+        # Convertir a ADC
+        audio_normalizado = np.clip(audio, -1, 1)
+        return ((audio_normalizado + 1) * 511.5).astype(int)
+    
+    def procesar_muestras_adc(self, audio_adc, tipo_filtro, punto_control=None, desplazamiento=0):
+        """Procesa muestras ADC en la placa conectada, por lotes
+        
+        Con 'punto_control' (PuntoControl) se guarda cada lote y se reanuda
+        desde el primer lote que falte. 'desplazamiento' es la muestra del
+        audio completo donde empieza audio_adc (solo para los reportes).
+        """
+        
+        # Sin pings de keep-alive intercalados durante el procesamiento
+        with self.arduino.operacion():
+            self.verificador = None
+            if self.verificar_referencia:
+                self.verificador = VerificadorReferencia(tipo_filtro, coeficientes=self.coeficientes_cargados,
+                                                         desplazamiento=desplazamiento)
+            self.iniciar_telemetria()
+            try:
+                return self._procesar_muestras_adc(audio_adc, tipo_filtro, punto_control)
+            finally:
+                if self.verificador:
+                    self.verificador.terminar()
+                self.cerrar_telemetria(tipo_filtro)
+    
+    def iniciar_telemetria(self):
+        """Empieza la telemetría por lote de una corrida"""
+        protocolo = self.protocolo + (' pipeline' if self.pipeline and self.protocolo == 'binario' else '')
+        self.telemetria = TelemetriaLotes(protocolo, self.arduino.baudrate)
+        return self.telemetria
+    
+    def cerrar_telemetria(self, tipo_filtro):
+        """Reporta la telemetría y guarda la traza si hay ruta configurada"""
+        if self.telemetria is None or not self.telemetria.lotes:
+            return None
+        self.telemetria.terminar()
+        resumen = self.telemetria.reporte()
+        if self.ruta_telemetria:
+            puerto = os.path.basename(str(self.arduino.port))
+            self.telemetria.guardar(os.path.join(
+                self.ruta_telemetria,
+                f"telemetria_{puerto}_filtro{tipo_filtro}_{time.strftime('%Y%m%d_%H%M%S')}"))
+        return resumen
+    
+    def registrar_telemetria(self, muestras, inicio, previos, exito):
+        """Registra un lote a partir de los contadores de la sesión serial"""
+        if self.telemetria is None:
+            return
+        bytes_tx, bytes_rx, reintentos, fallos, cpu = previos
+        sesion = self.arduino
+        envio = proceso = lectura = None
+        if sesion.t_escritura is not None and sesion.t_escritura >= inicio:
+            envio = sesion.t_escritura - inicio
+            if sesion.t_primer_byte is not None:
+                proceso = sesion.t_primer_byte - sesion.t_escritura
+                lectura = sesion.t_ultimo_byte - sesion.t_primer_byte
+        self.telemetria.registrar(
+            muestras, inicio, time.perf_counter() - inicio, envio, proceso, lectura,
+            bytes_tx=sesion.bytes_enviados - bytes_tx, bytes_rx=sesion.bytes_recibidos - bytes_rx,
+            reintentos=self.retransmisiones - reintentos,
+            fallos_analisis=self.fallos_analisis - fallos, exito=exito,
+            cpu=time.thread_time() - cpu)
+    
+    def filtro_es_iir(self, tipo_filtro):
+        """True para el IIR del sketch o un IIR cargado con carga_coeficientes.py"""
+        if tipo_filtro == FILTRO_CARGADO and self.coeficientes_cargados is not None:
+            return not self.coeficientes_cargados[0]
+        return tipo_filtro == FILTRO_IIR
+    
+    def reporte_lotes(self, procesados, reanudadas, total):
+        """Lotes de esta corrida y, por separado, lo recuperado del punto de control"""
+        print(f"   Lotes procesados en esta corrida: {procesados}")
+        if reanudadas:
+            print(f"   Reanudadas del punto de control: {reanudadas}/{total} muestras (no se reenviaron)")
+    
+    def cerrar_punto_control(self, punto_control):
+        """Borra el punto de control si la corrida terminó; si no, lo conserva para reanudar"""
+        if punto_control.completo or (self.verificador and self.verificador.abortar.is_set()):
+            punto_control.eliminar()
+            return
+        punto_control.cerrar()
+        if punto_control.llenas:
+            print(f"   Punto de control: {punto_control.llenas}/{punto_control.num_muestras} muestras "
+                  f"guardadas; la próxima corrida con este archivo continúa desde ahí")
+    
+    def calentar_filtro(self, muestras, inicio_muestras=0):
+        """Reconstruye el estado del filtro al reanudar
+        
+        Envía las muestras previas al punto de reanudación (que empiezan en
+        'inicio_muestras') y descarta su salida; el modelo de referencia
+        recibe las mismas muestras.
+        """
+        for inicio in range(0, len(muestras), self.tamaño_lote):
+            lote = muestras[inicio:inicio + self.tamaño_lote]
+            entrada, salida = self.procesar_lote_confiable(lote)
+            if entrada is None or salida is None or len(entrada) < len(lote):
+                return False
+        if self.verificador:
+            self.verificador.preparar(muestras, inicio_muestras)
+        return True
+    
+    def restablecer_filtro(self, audio_adc, tipo_filtro, inicio):
+        """Deja el filtro como si acabara de procesar audio_adc[:inicio]
+        
+        Un lote sin respuesta pudo haberse filtrado en la placa: se reinicia
+        el estado y se calienta con las muestras previas a 'inicio'.
+        """
+        self.comandos.enviar('r')
+        self.secuencia = 0
+        calentamiento = calentamiento_filtro(tipo_filtro, coeficientes=self.coeficientes_cargados)
+        return self.calentar_filtro(audio_adc[max(0, inicio - calentamiento):inicio],
+                                    max(0, inicio - calentamiento))
+    
+    def avance_lote(self, procesadas, total):
+        """Informa el avance tras un lote; False si el trabajo pidió cancelar"""
+        if self.al_progresar is not None:
+            self.al_progresar(procesadas / total)
+        return self.cancelacion is None or not self.cancelacion.is_set()
+    
+    def lote_verificado(self, lote, entrada_lote, salida_lote, inicio):
+        """Pasa el lote al verificador; False si la corrida debe abortarse
+        
+        Un lote incompleto no se puede alinear con el modelo, pero la placa
+        sí lo filtró: el modelo avanza con la entrada real sin comparar (en
+        ASCII la placa recibió todo el lote; en binario, lo que reflejó).
+        """
+        if self.verificador is None:
+            return True
+        if len(entrada_lote) < len(lote):
+            self.verificador.preparar(lote if self.protocolo == 'ascii' else entrada_lote, inicio)
+            return not self.verificador.abortar.is_set()
+        return self.verificador.enviar(entrada_lote, salida_lote, inicio)
+    
+    def cerrar_verificacion(self):
+        """Espera la verificación pendiente y la reporta; False si divergió"""
+        if self.verificador is None:
+            return True
+        self.verificador.terminar()
+        self.verificador.reporte()
+        return not self.verificador.abortar.is_set()
+    
+    def _procesar_muestras_adc(self, audio_adc, tipo_filtro, punto_control=None):
+        try:
+            # Salida preasignada; 'llenas' marca hasta dónde hay datos
+            entrada_completa = np.zeros(len(audio_adc), dtype=np.int16)
+            salida_completa = np.zeros(len(audio_adc), dtype=np.int16)
+            llenas = 0
+            lotes_exitosos = 0  # procesados en esta corrida (sin los reanudados)
+            self.secuencia = 0
             
-            duracion_total = len(audio_adc) / self.fs
-            print(f"Duración: {duracion_total:.1f}s, Muestras: {len(audio_adc)}")
+            # Configurar filtro (espera ACK en lugar de pausas fijas)
+            self.comandos.enviar('r')  # Reset
+            self.comandos.enviar(str(tipo_filtro))
+            self.filtro_actual = tipo_filtro
+            self.iniciar_reintentos(len(audio_adc))
             
             # Procesar por lotes
-            tamaño_lote = 600
-            num_lotes = (len(audio_adc) + tamaño_lote - 1) // tamaño_lote
+            tamaño_lote = self.tamaño_lote
             
-            print(f"Procesando en {num_lotes} lotes...")
+            # Reanudar: se recuperan los lotes guardados y se calienta el filtro
+            # con las muestras previas (mismo solapamiento que en multiplaca)
+            desde = punto_control.llenas if punto_control else 0
+            if desde:
+                entrada_completa[:desde] = punto_control.entrada
+                salida_completa[:desde] = punto_control.salida
+                llenas = desde
+                calentamiento = calentamiento_filtro(tipo_filtro, coeficientes=self.coeficientes_cargados)
+                print(f"Reanudando desde la muestra {desde} ({desde / len(audio_adc) * 100:.0f}% "
+                      f"ya procesado, calentamiento de {min(calentamiento, desde)} muestras)")
+                if self.filtro_es_iir(tipo_filtro):
+                    # La cola del IIR en punto fijo no se reconstruye igual:
+                    # las primeras muestras pueden diferir unos LSB
+                    print("   Reanudación aproximada (IIR): justo después del corte la salida puede "
+                          "diferir unos pocos LSB de una corrida sin interrupción")
+                else:
+                    print("   Reanudación exacta (FIR): el calentamiento llena toda la línea de retardo")
+                if not self.calentar_filtro(audio_adc[max(0, desde - calentamiento):desde],
+                                            max(0, desde - calentamiento)):
+                    print(" No se pudo reconstruir el estado del filtro; se conserva el punto de control")
+                    return None, None
+            controlador = None
+            if self.lote_adaptativo:
+                controlador = ControladorLote(self.comandos, tamaño_lote)
+                tamaño_lote = controlador.sondear_capacidad()
+                print(f"Procesando en lotes adaptativos (inicial: {tamaño_lote})...")
+            else:
+                num_lotes = (len(audio_adc) + tamaño_lote - 1) // tamaño_lote
+                print(f"Procesando en {num_lotes} lotes...")
             
-            entrada_completa = []
-            salida_completa = []
-            lotes_exitosos = 0
+            if self.pipeline and self.protocolo == 'binario':
+                return self.procesar_lotes_pipeline(audio_adc, tamaño_lote, desde, punto_control)
             
-            # Configurar filtro
-            self.arduino.write(b"r\n")  # Reset
-            time.sleep(2)
-            self.arduino.write(f"{tipo_filtro}\n".encode())
-            time.sleep(1)
-            
-            for i in range(num_lotes):
+            i = desde // tamaño_lote
+            inicio = desde
+            while inicio < len(audio_adc):
                 # Extraer lote
-                inicio = i * tamaño_lote
+                if controlador:
+                    tamaño_lote = controlador.tamaño
                 fin = min(inicio + tamaño_lote, len(audio_adc))
                 lote = audio_adc[inicio:fin]
+                etiqueta = f"{i+1}/{num_lotes}" if not controlador else f"{i+1} ({len(lote)} muestras)"
                 
                 # Procesar lote
-                entrada_lote, salida_lote = self.procesar_lote_individual(lote)
+                t_lote = time.perf_counter()
+                entrada_lote, salida_lote = self.procesar_lote_confiable(lote)
+                exito = entrada_lote is not None and salida_lote is not None
+                if controlador:
+                    controlador.registrar(len(lote), time.perf_counter() - t_lote, exito)
                 
-                if entrada_lote is not None and salida_lote is not None:
-                    entrada_completa.extend(entrada_lote)
-                    salida_completa.extend(salida_lote)
+                if exito:
+                    entrada_completa[llenas:llenas + len(entrada_lote)] = entrada_lote
+                    salida_completa[llenas:llenas + len(salida_lote)] = salida_lote
+                    llenas += len(entrada_lote)
                     lotes_exitosos += 1
                     
-                    progreso = (i + 1) / num_lotes * 100
-                    print(f"   Lote {i+1}/{num_lotes}: {progreso:.1f}% ")
+                    progreso = fin / len(audio_adc) * 100
+                    print(f"   Lote {etiqueta}: {progreso:.1f}% ")
+                    
+                    if not self.lote_verificado(lote, entrada_lote, salida_lote, inicio):
+                        self.cerrar_verificacion()
+                        print(" Corrida abortada: la salida diverge del modelo de referencia")
+                        return None, None
+                    if punto_control:
+                        punto_control.guardar(inicio, entrada_lote, salida_lote)
+                    if not self.avance_lote(fin, len(audio_adc)):
+                        self.cerrar_verificacion()
+                        print(f" Corrida cancelada en la muestra {fin} de {len(audio_adc)}")
+                        return None, None
+                elif controlador and controlador.tamaño < len(lote):
+                    # El controlador ya redujo el lote: se repite el mismo
+                    # tramo con el tamaño nuevo antes de dar la corrida por perdida
+                    print(f"   Lote {etiqueta}: sin respuesta, se repite con "
+                          f"{controlador.tamaño} muestras")
+                    if self.restablecer_filtro(audio_adc, tipo_filtro, inicio):
+                        continue
+                    print(" No se pudo reconstruir el estado del filtro")
+                    self.reporte_retransmisiones()
+                    print(f" Corrida abortada en la muestra {inicio} de {len(audio_adc)}")
+                    return None, None
                 else:
-                    print(f"   Lote {i+1}/{num_lotes}: ")
-                    # Rellenar con interpolación si falla
-                    if entrada_completa:
-                        entrada_completa.extend([entrada_completa[-1]] * len(lote))
-                        salida_completa.extend([salida_completa[-1]] * len(lote))
-            
-            if lotes_exitosos > 0:
-                print(f"\n Procesamiento exitoso:")
-                print(f"   Lotes exitosos: {lotes_exitosos}/{num_lotes}")
-                print(f"   Muestras totales: {len(entrada_completa)}")
+                    # Sin reintentos disponibles: un lote inventado corrompería
+                    # la salida; se aborta y el punto de control se conserva
+                    print(f"   Lote {etiqueta}: sin respuesta tras los reintentos")
+                    self.reporte_retransmisiones()
+                    print(f" Corrida abortada en la muestra {inicio} de {len(audio_adc)}")
+                    return None, None
                 
-                return np.array(entrada_completa), np.array(salida_completa)
-            else:
+                i += 1
+                inicio = fin
+            
+            print(f"\n Procesamiento exitoso:")
+            self.reporte_lotes(lotes_exitosos, desde, len(audio_adc))
+            print(f"   Muestras totales: {llenas}")
+            self.reporte_retransmisiones()
+            self.comandos.reporte_latencias()
+            if controlador:
+                controlador.reporte()
+            if not self.cerrar_verificacion():
+                print(" Corrida abortada: la salida diverge del modelo de referencia")
                 return None, None
+            
+            return entrada_completa[:llenas].astype(int), salida_completa[:llenas].astype(int)
                 
         except Exception as e:
             print(f" Error en procesamiento: {e}")
             return None, None
     
+    def procesar_lotes_pipeline(self, audio_adc, tamaño_lote, desde=0, punto_control=None):
+        """Procesa en pipeline (envío y lectura concurrentes) las muestras desde 'desde'"""
+        
+        transmisor = TransmisorPipeline(self.arduino, self.formato_binario,
+                                        reintentos=self.reintentos_lote,
+                                        presupuesto=self.presupuesto_reintentos)
+        transmisor.secuencia_inicial = self.secuencia
+        
+        def al_recibir(inicio, entrada_lote, salida_lote):
+            lote = audio_adc[desde + inicio:desde + inicio + tamaño_lote]
+            if not self.lote_verificado(lote, entrada_lote, salida_lote, desde + inicio):
+                return False
+            if punto_control:
+                punto_control.guardar(desde + inicio, entrada_lote, salida_lote)
+            return self.avance_lote(desde + inicio + len(entrada_lote), len(audio_adc))
+        transmisor.al_recibir = al_recibir
+        
+        inicio = time.time()
+        entrada, salida, lotes_fallidos = transmisor.procesar(audio_adc[desde:], tamaño_lote)
+        duracion = time.time() - inicio
+        if desde:
+            entrada = np.concatenate([punto_control.entrada[:desde], entrada])
+            salida = np.concatenate([punto_control.salida[:desde], salida])
+        self.secuencia = transmisor.secuencia_inicial
+        self.presupuesto_reintentos = transmisor.presupuesto
+        self.retransmisiones += transmisor.retransmisiones
+        if self.telemetria is not None:
+            for registro in transmisor.registros:
+                self.telemetria.registrar(**registro)
+        
+        num_lotes = (len(audio_adc) - desde + tamaño_lote - 1) // tamaño_lote
+        
+        # El transmisor se detiene en el primer lote sin respuesta tras los
+        # reintentos: igual que en modo secuencial, no se rellena nada
+        if lotes_fallidos:
+            i = lotes_fallidos[0]
+            print(f"   Lote {i+1}/{num_lotes}: sin respuesta tras los reintentos")
+            self.reporte_retransmisiones()
+            print(f" Corrida abortada en la muestra {desde + i * tamaño_lote} de {len(audio_adc)}")
+            return None, None
+        if self.cancelacion is not None and self.cancelacion.is_set():
+            self.cerrar_verificacion()
+            print(f" Corrida cancelada tras {len(transmisor.registros)} lotes")
+            return None, None
+        
+        print(f"\n Procesamiento exitoso (pipeline):")
+        self.reporte_lotes(num_lotes, desde, len(audio_adc))
+        print(f"   Muestras totales: {len(entrada)}")
+        print(f"   Tiempo: {duracion:.2f}s ({len(entrada)/duracion:.0f} muestras/s)")
+        self.reporte_retransmisiones()
+        self.comandos.reporte_latencias()
+        if not self.cerrar_verificacion():
+            print(" Corrida abortada: la salida diverge del modelo de referencia")
+            return None, None
+        
+        return entrada.astype(int), salida.astype(int)
+    
     def procesar_lote_individual(self, lote_data):
         """Procesa un lote individual en Arduino"""
+        if self.protocolo == 'binario':
+            return self.procesar_lote_binario(lote_data)
+        return self.procesar_lote_ascii(lote_data)
+    
+    def iniciar_reintentos(self, num_muestras):
+        """Presupuesto de retransmisiones para un archivo: 3 + 1 por cada 600 muestras"""
+        self.presupuesto_reintentos = self.reintentos_lote + num_muestras // 600
+        self.retransmisiones = 0
+        self.fallos_analisis = 0
+    
+    def procesar_lote_confiable(self, lote_data):
+        """Procesa un lote y retransmite solo ese lote si falla o llega incompleto"""
+        inicio = time.perf_counter()
+        previos = (self.arduino.bytes_enviados, self.arduino.bytes_recibidos,
+                   self.retransmisiones, self.fallos_analisis, time.thread_time())
+        entrada, salida = self.procesar_lote_individual(lote_data)
+        if entrada is None or salida is None:
+            entrada, salida = self.reintentar_lote(lote_data, (self.secuencia - 1) & 0xFFFF)
+        self.registrar_telemetria(len(lote_data), inicio, previos,
+                                  entrada is not None and salida is not None)
+        return entrada, salida
+    
+    def contar_fallo_analisis(self):
+        """Cuenta una respuesta que llegó (hubo bytes tras la escritura) pero no se pudo usar"""
+        if self.arduino.t_primer_byte is not None:
+            self.fallos_analisis += 1
+    
+    def reintentar_lote(self, lote_data, secuencia):
+        """Retransmite un lote dentro del presupuesto de reintentos
+        
+        Binario: se reenvía la trama con el mismo número de secuencia; si la
+        placa ya la filtró contesta con la respuesta guardada. ASCII: se vuelve
+        a pedir el volcado 's' de la captura, sin reenviar las muestras.
+        """
+        for _ in range(self.reintentos_lote):
+            if self.presupuesto_reintentos <= 0:
+                break
+            self.presupuesto_reintentos -= 1
+            self.retransmisiones += 1
+            if self.protocolo == 'binario':
+                entrada, salida = self.procesar_lote_binario(lote_data, secuencia)
+            else:
+                entrada, salida = self.releer_lote_ascii(lote_data)
+            if entrada is not None and salida is not None:
+                return entrada, salida
+        return None, None
+    
+    def reporte_retransmisiones(self):
+        """Imprime las retransmisiones del último archivo"""
+        print(f"   Retransmisiones: {self.retransmisiones} "
+              f"(presupuesto restante: {self.presupuesto_reintentos})")
+    
+    def procesar_lote_binario(self, lote_data, secuencia=None):
+        """Procesa un lote usando tramas binarias con CRC
+        
+        Con 'secuencia' se retransmite un lote ya enviado con ese número.
+        """
+        try:
+            if secuencia is None:
+                secuencia = self.secuencia
+                self.secuencia = (self.secuencia + 1) & 0xFFFF
+            
+            trama = protocolo_binario.codificar_lote(lote_data, secuencia, self.formato_binario)
+            self.arduino.write(trama)
+            
+            # Se descartan respuestas atrasadas de otros lotes
+            limite = time.time() + 5
+            while True:
+                respuesta = protocolo_binario.leer_trama(self.arduino, timeout=limite - time.time())
+                if respuesta is None:
+                    self.contar_fallo_analisis()
+                    return None, None
+                tipo, sec_resp, n, formato, datos = respuesta
+                if sec_resp == secuencia:
+                    break
+            if tipo != protocolo_binario.TIPO_RESPUESTA:
+                self.fallos_analisis += 1  # la placa rechazó la trama
+                return None, None
+            
+            entrada, salida = protocolo_binario.decodificar_respuesta(n, datos, formato)
+            if len(entrada) >= len(lote_data) * 0.8:
+                return entrada[:len(lote_data)], salida[:len(lote_data)]
+            else:
+                return None, None
+                
+        except Exception as e:
+            return None, None
+    
+    def releer_lote_ascii(self, lote_data):
+        """Vuelve a pedir el volcado CSV de la última captura"""
+        try:
+            self.arduino.reset_input_buffer()
+            self.arduino.write(b"s\n")
+            entrada, salida = protocolo_binario.leer_respuesta_ascii(
+                self.arduino, len(lote_data), timeout=5)
+            if entrada is not None and len(entrada) >= len(lote_data) * 0.8:
+                return entrada, salida
+            self.contar_fallo_analisis()
+            return None, None
+        except Exception as e:
+            return None, None
+    
+    def procesar_lote_ascii(self, lote_data):
+        """Procesa un lote con el protocolo ASCII original (DATA:<valor>)"""
         try:
             # Iniciar captura
-            self.arduino.write(b"c\n")
-            time.sleep(0.5)
+            self.comandos.enviar('c')
             
             # Enviar datos
             for muestra in lote_data:
                 self.arduino.write(f"DATA:{int(muestra)}\n".encode())
                 time.sleep(0.003)
             
-            # Esperar procesamiento
-            time.sleep(1)
+            # Esperar procesamiento (los sketches con ACK atienden 's' en orden)
+            if not self.comandos.soporta_ack:
+                time.sleep(1)
             
             # Solicitar datos
             self.arduino.write(b"s\n")
             
-            # Leer datos
-            entrada = []
-            salida = []
-            leyendo_datos = False
-            
-            tiempo_inicio = time.time()
-            while (time.time() - tiempo_inicio) < 5:
-                if self.arduino.in_waiting:
-                    linea = self.arduino.readline().decode().strip()
-                    
-                    if linea == "index,input,output":
-                        leyendo_datos = True
-                        continue
-                    elif "FIN_DATOS" in linea or "ENVÍO COMPLETADO" in linea:
-                        break
-                    
-                    if leyendo_datos and "," in linea:
-                        try:
-                            partes = linea.split(',')
-                            if len(partes) >= 3:
-                                entrada.append(int(partes[1]))
-                                salida.append(int(partes[2]))
-                        except:
-                            continue
+            # Leer la respuesta CSV completa en bloque (int16 vectorizado)
+            entrada, salida = protocolo_binario.leer_respuesta_ascii(
+                self.arduino, len(lote_data), timeout=5)
             
             # Verificar datos suficientes
-            if len(entrada) >= len(lote_data) * 0.8:
-                return entrada[:len(lote_data)], salida[:len(lote_data)]
+            if entrada is not None and len(entrada) >= len(lote_data) * 0.8:
+                return entrada, salida
             else:
+                self.contar_fallo_analisis()
                 return None, None
                 
         except Exception as e:
@@ -577,8 +1206,8 @@ RESULTADO: {' Exitoso' if mejora_snr > 0 else '️ Sin mejora'}
     def calcular_snr(self, señal):
         """Calcula SNR de la señal"""
         try:
-            b, a = signal.butter(2, 0.1)
-            señal_suave = signal.filtfilt(b, a, señal)
+            sos = diseñar_iir(2, 0.05 * self.fs, self.fs)  # 0.1 de Nyquist
+            señal_suave = signal.sosfiltfilt(sos, señal)
             ruido = señal - señal_suave
             
             potencia_señal = np.var(señal_suave)
@@ -736,10 +1365,12 @@ RESULTADO: {' Exitoso' if mejora_snr > 0 else '️ Sin mejora'}
             print(f"\nFiltros disponibles:")
             print("1. FIR (preserva fase)")
             print("2. IIR (más eficiente)")
+            if self.coeficientes_cargados is not None:
+                print("3. Filtro cargado (opción 12 del menú)")
             
-            filtro_sel = int(input("Selecciona filtro (1/2): "))
-            tipo_filtro = filtro_sel  # 1=FIR, 2=IIR
-            nombre_filtro = "FIR" if tipo_filtro == 1 else "IIR"
+            filtro_sel = int(input(f"Selecciona filtro (1/2{'/3' if self.coeficientes_cargados is not None else ''}): "))
+            tipo_filtro = filtro_sel  # 1=FIR, 2=IIR, 3=cargado
+            nombre_filtro = {1: "FIR", 2: "IIR", FILTRO_CARGADO: "CARGADO"}[tipo_filtro]
             
             if self.conectar_arduino():
                 entrada, salida = self.procesar_con_arduino_optimizado(archivo, tipo_filtro)
@@ -750,8 +1381,7 @@ RESULTADO: {' Exitoso' if mejora_snr > 0 else '️ Sin mejora'}
                 else:
                     print(" Error en procesamiento")
                 
-                self.arduino.close()
-                self.conectado = False
+                self.desconectar_arduino()
             
         except (ValueError, IndexError):
             print(" Selección inválida")
@@ -808,12 +1438,83 @@ RESULTADO: {' Exitoso' if mejora_snr > 0 else '️ Sin mejora'}
                 if len(resultados) >= 2:
                     self.mostrar_comparacion_final(archivo, resultados)
                 
-                self.arduino.close()
-                self.conectado = False
+                self.desconectar_arduino()
             
         except Exception as e:
             print(f" Error: {e}")
     
+    def arduino_ocupado(self):
+        """True si un trabajo en segundo plano está usando la placa"""
+        return self.trabajos is not None and self.trabajos.ocupado()
+    
+    def procesar_en_segundo_plano(self):
+        """Lanza el procesamiento de un archivo sin bloquear el menú"""
+        
+        if self.arduino_ocupado():
+            print("Ya hay un trabajo usando el Arduino")
+            return
+        
+        archivos_wav = [f for f in os.listdir('.') if f.endswith('.wav')]
+        if not archivos_wav:
+            print("No hay archivos WAV disponibles")
+            return
+        
+        print(f"\nArchivos disponibles:")
+        for i, archivo in enumerate(archivos_wav):
+            print(f"   {i+1}. {archivo}")
+        
+        try:
+            seleccion = int(input(f"\nSelecciona archivo (1-{len(archivos_wav)}): ")) - 1
+            archivo = archivos_wav[seleccion]
+            tipo_filtro = int(input("Selecciona filtro (1=FIR / 2=IIR): "))
+        except (ValueError, IndexError):
+            print(" Selección inválida")
+            return
+        
+        if self.trabajos is None:
+            self.trabajos = GestorTrabajos()
+            self.cliente_async = ClienteArduinoAsync(self)
+        
+        nombre = f"{archivo} - {'FIR' if tipo_filtro == 1 else 'IIR'}"
+        id_trabajo = self.trabajos.enviar(
+            nombre, lambda progreso: self.cliente_async.procesar_archivo(archivo, tipo_filtro, progreso))
+        self.trabajos.trabajos[id_trabajo].update(archivo=archivo, tipo_filtro=tipo_filtro)
+        print(f" Trabajo {id_trabajo} lanzado: {nombre}")
+        print("   El menú sigue disponible; revisa el avance con la opción 11")
+    
+    def revisar_trabajos(self):
+        """Muestra el estado de los trabajos y analiza los terminados"""
+        
+        if self.trabajos is None:
+            print("No hay trabajos en segundo plano")
+            return
+        
+        self.trabajos.mostrar()
+        
+        respuesta = input("\nID a analizar, 'c<ID>' para cancelar o Enter para volver: ").strip()
+        if not respuesta:
+            return
+        try:
+            if respuesta.startswith('c'):
+                id_trabajo = int(respuesta[1:])
+                cancelado = self.trabajos.cancelar(id_trabajo)
+                print(f" Trabajo {id_trabajo} {'cancelado' if cancelado else 'ya había terminado'}")
+                return
+            
+            id_trabajo = int(respuesta)
+            if self.trabajos.estado(id_trabajo) != 'terminado':
+                print(f" Trabajo {id_trabajo}: {self.trabajos.estado(id_trabajo)}")
+                return
+            
+            trabajo = self.trabajos.trabajos[id_trabajo]
+            entrada, salida = self.trabajos.resultado(id_trabajo)
+            nombre_filtro = "FIR" if trabajo['tipo_filtro'] == 1 else "IIR"
+            self.generar_analisis_completo(trabajo['archivo'], entrada, salida,
+                                           trabajo['tipo_filtro'], nombre_filtro)
+            self.reproducir_comparacion_completa(entrada, salida, nombre_filtro)
+        except (ValueError, KeyError):
+            print(" Selección inválida")
+    
     def mostrar_analisis_grabaciones(self):
         """Muestra análisis espectral de las grabaciones"""
         
@@ -866,22 +1567,75 @@ def main():
     print("Integra: Grabación + Arduino + Procesamiento + Análisis")
     print("=" * 65)
     
+    # Antes de abrir puertos: el pipeline mantiene lotes de tamaño fijo en vuelo
+    if '--lote-adaptativo' in sys.argv and '--pipeline' in sys.argv:
+        print(" --lote-adaptativo no se puede combinar con --pipeline")
+        return
+    
     # Detectar puerto Arduino
-    puertos = ['COM3', 'COM4', 'COM5', 'COM6']
+    descubrir = True
     puerto_detectado = 'COM4'  # Por defecto
     
-    for puerto in puertos:
+    if '--emulador' in sys.argv:
+        descubrir = False
+        puerto_detectado = 'EMULADOR'
+        print(" Usando emulador de Arduino (sin placa)")
+    
+    # Reproducir una sesión grabada con --capturar en lugar de la placa
+    captura = next((a.split('=', 1)[1] for a in sys.argv if a.startswith('--reproducir=')), None)
+    if captura:
+        descubrir = False
+        puerto_detectado = f"CAPTURA:{captura}"
+        print(f" Reproduciendo la captura {captura} (sin placa)")
+    
+    # Todos los puertos a la vez; las placas ya conocidas no se vuelven a abrir
+    puertos_libres = []
+    conexiones = {}
+    if descubrir:
+        descubridor = DescubridorPuertos()
+        if '--redescubrir' in sys.argv:
+            descubridor.olvidar()
         try:
-            test_serial = serial.Serial(puerto, 115200, timeout=1)
-            test_serial.close()
-            puerto_detectado = puerto
-            print(f" Puerto Arduino detectado: {puerto}")
-            break
-        except:
-            continue
+            dispositivos = descubridor.descubrir(todas='--multiplaca' in sys.argv)
+        except (ImportError, OSError) as e:
+            print(f" No se pudieron listar los puertos: {e}")
+            dispositivos = []
+        for dispositivo in dispositivos:
+            origen = 'caché' if dispositivo.desde_cache else 'detectado'
+            print(f" Puerto Arduino {origen}: {dispositivo.puerto} ({dispositivo.version})")
+            puertos_libres.append(dispositivo.puerto)
+            if dispositivo.conexion:
+                conexiones[dispositivo.puerto] = dispositivo.conexion
+        if puertos_libres:
+            puerto_detectado = puertos_libres[0]
+        print(f"   Búsqueda: {descubridor.probados} puertos probados en {descubridor.duracion:.2f}s")
+    
+    # Protocolo: binario solo con sketches que lo soporten
+    pipeline = '--pipeline' in sys.argv
+    delta = '--delta' in sys.argv
+    protocolo = 'binario' if '--binario' in sys.argv or pipeline or delta else 'ascii'
+    formato = protocolo_binario.FORMATO_DELTA if delta else protocolo_binario.FORMATO_10BITS
+    lote_adaptativo = '--lote-adaptativo' in sys.argv
+    negociar_baudios = '--baudios-auto' in sys.argv
+    
+    # Varias placas: las demás detectadas procesan segmentos en paralelo
+    puertos_adicionales = []
+    if '--multiplaca' in sys.argv:
+        if puerto_detectado == 'EMULADOR':
+            puertos_adicionales = ['EMULADOR-2', 'EMULADOR-3']
+        else:
+            puertos_adicionales = [p for p in puertos_libres if p != puerto_detectado]
     
     # Crear sistema
-    sistema = SistemaCompletoClase(puerto_detectado)
+    sistema = SistemaCompletoClase(puerto_detectado, protocolo=protocolo, pipeline=pipeline,
+                                   lote_adaptativo=lote_adaptativo,
+                                   puertos_adicionales=puertos_adicionales,
+                                   formato_binario=formato, negociar_baudios=negociar_baudios,
+                                   verificar_referencia='--verificar' in sys.argv,
+                                   ruta_telemetria='telemetria' if '--telemetria' in sys.argv else None,
+                                   puntos_control='--sin-puntos-control' not in sys.argv,
+                                   ruta_captura='capturas' if '--capturar' in sys.argv else None,
+                                   conexiones=conexiones)
     
     try:
         sistema.menu_principal_clase()
@@ -891,7 +1645,7 @@ def main():
         print(f" Error en sistema: {e}")
     finally:
         if sistema.arduino and sistema.arduino.is_open:
-            sistema.arduino.close()
+            sistema.desconectar_arduino(forzar=True)
 
 if __name__ == "__main__":
     main()
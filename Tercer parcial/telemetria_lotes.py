@@ -0,0 +1,115 @@
+#!/usr/bin/env python3
+"""
+TELEMETRÍA POR LOTE DEL ENLACE SERIAL
+Registra por cada lote los tiempos de envío, proceso en la placa y lectura,
+los bytes en cada sentido, reintentos y fallos de análisis; genera una traza
+JSON/CSV y un resumen (muestras/s, latencia p50/p95, uso del enlace)
+
+Tiempos de un lote (medidos en el host):
+    envio     inicio del lote -> última escritura
+    proceso   última escritura -> primer byte de respuesta (incluye el vuelo
+              de ese byte; en pipeline no se separa y queda vacío)
+    lectura   primer byte -> último byte de respuesta
+    latencia  inicio del lote -> respuesta completa
+    cpu       tiempo de CPU del host dedicado al lote (hilos que lo atienden);
+              con lecturas bloqueantes debe ser una fracción mínima de la latencia
+"""
+
+import csv
+import json
+import os
+import time
+
+import numpy as np
+
+BITS_POR_BYTE = 10  # 8N1
+
+CAMPOS = ['lote', 'muestras', 'inicio', 'envio', 'proceso', 'lectura', 'latencia', 'cpu',
+          'bytes_tx', 'bytes_rx', 'reintentos', 'fallos_analisis', 'exito']
+
+
+class TelemetriaLotes:
+    def __init__(self, protocolo='', baudios=115200):
+        self.protocolo = protocolo
+        self.baudios = baudios
+        self.lotes = []
+        self.inicio = time.perf_counter()
+        self.fin = None
+
+    def registrar(self, muestras, inicio, latencia, envio=None, proceso=None, lectura=None,
+                  bytes_tx=0, bytes_rx=0, reintentos=0, fallos_analisis=0, exito=True, cpu=None):
+        """Agrega el registro de un lote (tiempos en segundos)"""
+        self.lotes.append({
+            'lote': len(self.lotes) + 1, 'muestras': int(muestras),
+            'inicio': inicio - self.inicio, 'envio': envio, 'proceso': proceso,
+            'lectura': lectura, 'latencia': latencia, 'cpu': cpu,
+            'bytes_tx': int(bytes_tx), 'bytes_rx': int(bytes_rx),
+            'reintentos': int(reintentos), 'fallos_analisis': int(fallos_analisis),
+            'exito': bool(exito),
+        })
+
+    def terminar(self):
+        self.fin = time.perf_counter()
+
+    def resumen(self):
+        """Muestras/s, latencia p50/p95 por lote y uso del enlace en cada sentido"""
+        duracion = (self.fin or time.perf_counter()) - self.inicio
+        exitosos = [l for l in self.lotes if l['exito']]
+        latencias = np.array([l['latencia'] for l in exitosos]) * 1000
+        bytes_tx = sum(l['bytes_tx'] for l in self.lotes)
+        bytes_rx = sum(l['bytes_rx'] for l in self.lotes)
+        capacidad = self.baudios / BITS_POR_BYTE * duracion if duracion > 0 else 0
+        medidos = [l for l in self.lotes if l['cpu'] is not None]
+        cpu = sum(l['cpu'] for l in medidos)
+        espera = sum(l['latencia'] for l in medidos)
+        return {
+            'protocolo': self.protocolo,
+            'baudios': self.baudios,
+            'lotes': len(self.lotes),
+            'lotes_fallidos': len(self.lotes) - len(exitosos),
+            'muestras': sum(l['muestras'] for l in exitosos),
+            'duracion_s': duracion,
+            'muestras_s': sum(l['muestras'] for l in exitosos) / duracion if duracion > 0 else 0.0,
+            'latencia_p50_ms': float(np.percentile(latencias, 50)) if len(latencias) else None,
+            'latencia_p95_ms': float(np.percentile(latencias, 95)) if len(latencias) else None,
+            'bytes_tx': bytes_tx,
+            'bytes_rx': bytes_rx,
+            'uso_tx': bytes_tx / capacidad if capacidad else 0.0,
+            'uso_rx': bytes_rx / capacidad if capacidad else 0.0,
+            'reintentos': sum(l['reintentos'] for l in self.lotes),
+            'fallos_analisis': sum(l['fallos_analisis'] for l in self.lotes),
+            'cpu_s': cpu,
+            'cpu_por_lote_ms': cpu / len(medidos) * 1000 if medidos else None,
+            'cpu_fraccion': cpu / espera if espera > 0 else None,
+        }
+
+    def reporte(self):
+        """Imprime el resumen de la corrida"""
+        r = self.resumen()
+        print(f"\nTELEMETRÍA DEL ENLACE ({r['protocolo']}, {r['baudios']} baudios):")
+        print(f"   Lotes: {r['lotes']} ({r['lotes_fallidos']} fallidos), "
+              f"reintentos: {r['reintentos']}, fallos de análisis: {r['fallos_analisis']}")
+        print(f"   Throughput: {r['muestras_s']:.0f} muestras/s en {r['duracion_s']:.2f}s")
+        if r['latencia_p50_ms'] is not None:
+            print(f"   Latencia por lote: p50 {r['latencia_p50_ms']:.1f} ms, "
+                  f"p95 {r['latencia_p95_ms']:.1f} ms")
+        print(f"   Uso del enlace: TX {r['uso_tx']*100:.0f}% ({r['bytes_tx']} bytes), "
+              f"RX {r['uso_rx']*100:.0f}% ({r['bytes_rx']} bytes)")
+        if r['cpu_por_lote_ms'] is not None:
+            print(f"   CPU del host: {r['cpu_por_lote_ms']:.1f} ms por lote "
+                  f"({r['cpu_fraccion']*100:.1f}% del tiempo de lote)")
+        return r
+
+    def guardar(self, ruta_base):
+        """Escribe <ruta_base>.json (resumen + lotes) y <ruta_base>.csv (lotes)"""
+        directorio = os.path.dirname(ruta_base)
+        if directorio:
+            os.makedirs(directorio, exist_ok=True)
+        with open(ruta_base + '.json', 'w') as archivo:
+            json.dump({'resumen': self.resumen(), 'lotes': self.lotes}, archivo, indent=2)
+        with open(ruta_base + '.csv', 'w', newline='') as archivo:
+            escritor = csv.DictWriter(archivo, fieldnames=CAMPOS)
+            escritor.writeheader()
+            escritor.writerows(self.lotes)
+        print(f"   Telemetría guardada: {ruta_base}.json / .csv")
+        return ruta_base
@@ -0,0 +1,40 @@
+#!/usr/bin/env python3
+"""
+PRUEBAS DE LA CARGA DE COEFICIENTES
+La huella de un filtro cargado (clave de su punto de control) distingue
+diseños distintos aunque compartan los primeros coeficientes
+
+Corre sola (python test_carga_coeficientes.py) o con pytest.
+"""
+
+from carga_coeficientes import cuantizar_diseño, huella_coeficientes
+from filtros_sos import diseñar_iir
+from registro_diseños import diseñar_fir
+
+
+def test_huella_fir_por_corte():
+    huellas = {huella_coeficientes(cuantizar_diseño(diseñar_fir(41, fc, 8000)))
+               for fc in (600, 800, 1000)}
+    assert len(huellas) == 3
+
+
+def test_huella_iir_por_orden_y_corte():
+    diseños = [diseñar_iir(4, 300, 8000), diseñar_iir(6, 300, 8000), diseñar_iir(4, 800, 8000)]
+    huellas = {huella_coeficientes(cuantizar_diseño(sos)) for sos in diseños}
+    assert len(huellas) == 3
+
+
+def test_huella_estable():
+    coeficientes = cuantizar_diseño(diseñar_fir(41, 800, 8000))
+    assert huella_coeficientes(coeficientes) == huella_coeficientes(cuantizar_diseño(diseñar_fir(41, 800, 8000)))
+
+
+def main():
+    for nombre, prueba in list(globals().items()):
+        if nombre.startswith('test_') and callable(prueba):
+            prueba()
+            print(f"   {nombre}: ok")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,71 @@
+#!/usr/bin/env python3
+"""
+PRUEBAS DEL PROTOCOLO BINARIO
+Ida y vuelta bit a bit del códec y validación de tramas (CRC, sincronía)
+
+Corre sola (python test_protocolo_binario.py) o con pytest.
+"""
+
+import numpy as np
+
+import protocolo_binario
+from protocolo_binario import (FORMATO_10BITS, FORMATO_16BITS, FORMATO_DELTA, TIPO_DATOS,
+                               analizar_trama, codificar_lote, decodificar_lote, leer_trama)
+
+FORMATOS = (FORMATO_16BITS, FORMATO_10BITS, FORMATO_DELTA)
+
+
+class PuertoMemoria:
+    """Puerto tipo serial.Serial que entrega bytes fijos"""
+
+    def __init__(self, datos):
+        self.datos = bytearray(datos)
+        self.timeout = 0.1
+
+    def read(self, size=1):
+        fragmento = bytes(self.datos[:size])
+        del self.datos[:size]
+        return fragmento
+
+
+def test_ida_vuelta():
+    assert protocolo_binario.verificar_ida_vuelta(repeticiones=20)
+
+
+def test_lote_vacio_y_extremos():
+    for formato in FORMATOS:
+        for muestras in (np.zeros(0, dtype=int), np.array([0, 1023, 0, 1023])):
+            campos = analizar_trama(codificar_lote(muestras, 7, formato))
+            assert campos is not None
+            tipo, secuencia, n, formato_trama, datos = campos
+            assert (tipo, secuencia, n) == (TIPO_DATOS, 7, len(muestras))
+            assert np.array_equal(decodificar_lote(formato_trama, n, datos), muestras)
+
+
+def test_crc_invalido():
+    trama = bytearray(codificar_lote(np.arange(0, 1000, 7), 3, FORMATO_10BITS))
+    for posicion in (2, len(trama) // 2, len(trama) - 1):
+        corrupta = bytearray(trama)
+        corrupta[posicion] ^= 0x01
+        assert analizar_trama(bytes(corrupta)) is None
+    assert analizar_trama(bytes(trama[:-1])) is None
+
+
+def test_leer_trama_tras_basura():
+    muestras = np.arange(100) * 10
+    trama = codificar_lote(muestras, 42, FORMATO_DELTA)
+    campos = leer_trama(PuertoMemoria(b'\x00\xA5\x13' + trama), timeout=1)
+    assert campos is not None and campos[1] == 42
+    assert np.array_equal(decodificar_lote(campos[3], campos[2], campos[4]), muestras)
+    assert leer_trama(PuertoMemoria(trama[:-3]), timeout=0.2) is None
+
+
+def main():
+    for nombre, prueba in list(globals().items()):
+        if nombre.startswith('test_') and callable(prueba):
+            prueba()
+            print(f"   {nombre}: ok")
+
+
+if __name__ == "__main__":
+    main()
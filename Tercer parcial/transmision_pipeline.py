@@ -0,0 +1,188 @@
+#!/usr/bin/env python3
+"""
+TRANSMISIÓN EN PIPELINE PARA ARDUINO MEGA
+Un hilo escritor envía el lote i+1 mientras un hilo lector decodifica el lote i
+Requiere el protocolo binario (protocolo_binario.py)
+
+Un lote fallido (sin respuesta o rechazado por la placa) lo retransmite el
+lector en orden, con su número de secuencia original, dentro de un
+presupuesto de reintentos (go-back-N). Si aun así falla, la transmisión se
+detiene ahí: los lotes siguientes no se esperan ni se entregan.
+"""
+
+import queue
+import threading
+import time
+
+import numpy as np
+
+import protocolo_binario
+
+
+class TransmisorPipeline:
+    def __init__(self, puerto, formato=protocolo_binario.FORMATO_10BITS,
+                 profundidad=2, timeout=5, reintentos=3, presupuesto=None):
+        self.puerto = puerto
+        self.formato = formato
+        self.profundidad = profundidad  # lotes en vuelo (2 = doble buffer)
+        self.timeout = timeout
+        self.reintentos = reintentos    # retransmisiones por lote
+        self.presupuesto = presupuesto  # retransmisiones totales (None = sin límite)
+        self.retransmisiones = 0
+        self.secuencia_inicial = 0
+        self.al_recibir = None  # función(inicio, entrada, salida) por lote; False detiene el envío
+        self.registros = []     # telemetría por lote (campos de TelemetriaLotes.registrar)
+        self._escritura = threading.Lock()
+
+    def procesar(self, audio_adc, tamaño_lote):
+        """Envía audio_adc por lotes en pipeline y reensambla en orden
+
+        Regresa (entrada, salida, lotes_fallidos). El primer lote que agota
+        los reintentos detiene la transmisión y es el único en lotes_fallidos;
+        desde él la entrada y la salida quedan en cero (no son válidas).
+        secuencia_inicial avanza solo por las tramas que se llegaron a escribir.
+        """
+        num_muestras = len(audio_adc)
+        num_lotes = (num_muestras + tamaño_lote - 1) // tamaño_lote
+
+        entrada = np.zeros(num_muestras, dtype=np.int16)
+        salida = np.zeros(num_muestras, dtype=np.int16)
+        lotes_fallidos = []
+        self.registros = []
+        registros = {}  # i -> registro del lote en vuelo
+
+        # Cola acotada: el escritor se bloquea cuando hay 'profundidad' lotes sin respuesta
+        en_vuelo = queue.Queue(maxsize=self.profundidad)
+        detener = threading.Event()
+        errores = []
+        enviados = [0]  # tramas escritas: la placa solo avanzó su secuencia con estas
+
+        def poner(item):
+            # put con espera acotada para no bloquearse si el lector se detuvo
+            while not detener.is_set():
+                try:
+                    en_vuelo.put(item, timeout=0.1)
+                    return True
+                except queue.Full:
+                    continue
+            return False
+
+        def escritor():
+            try:
+                for i in range(num_lotes):
+                    if detener.is_set():
+                        break
+                    inicio = i * tamaño_lote
+                    fin = min(inicio + tamaño_lote, num_muestras)
+                    secuencia = (self.secuencia_inicial + i) & 0xFFFF
+                    cpu = time.thread_time()
+                    registro = registros[i] = {
+                        'muestras': fin - inicio, 'inicio': time.perf_counter(),
+                        'reintentos': 0, 'fallos_analisis': 0}
+                    trama = protocolo_binario.codificar_lote(
+                        audio_adc[inicio:fin], secuencia, self.formato)
+                    if not poner((i, secuencia, inicio, fin, trama)):
+                        break
+                    with self._escritura:
+                        self.puerto.write(trama)
+                    enviados[0] += 1
+                    registro['envio'] = time.perf_counter() - registro['inicio']
+                    registro['cpu'] = registro.get('cpu', 0.0) + time.thread_time() - cpu
+            except Exception as e:
+                errores.append(e)
+                detener.set()
+            finally:
+                poner(None)
+
+        # Tramas que llegaron antes de ser esperadas (respuestas o rechazos)
+        adelantadas = {}
+
+        def esperar(secuencia, registro):
+            """Respuesta del lote 'secuencia', o None si falta o fue rechazado"""
+            trama = adelantadas.pop(secuencia, None)
+            limite = time.time() + self.timeout
+            while trama is None and time.time() < limite:
+                trama = protocolo_binario.leer_trama(
+                    self.puerto, timeout=limite - time.time())
+                if trama is None:
+                    if time.time() < limite:
+                        registro['fallos_analisis'] += 1  # CRC inválido
+                    break
+                if trama[0] not in (protocolo_binario.TIPO_RESPUESTA, protocolo_binario.TIPO_ERROR):
+                    trama = None
+                elif trama[1] != secuencia:
+                    adelantadas[trama[1]] = trama
+                    trama = None
+            if trama is None:
+                return None
+            if trama[0] != protocolo_binario.TIPO_RESPUESTA:
+                registro['fallos_analisis'] += 1  # la placa rechazó la trama
+                return None
+            return trama
+
+        def lector():
+            try:
+                while True:
+                    try:
+                        item = en_vuelo.get(timeout=0.1)
+                    except queue.Empty:
+                        if detener.is_set():
+                            break
+                        continue
+                    if item is None:
+                        break
+                    i, secuencia, inicio, fin, trama = item
+                    cpu = time.thread_time()
+                    registro = registros.pop(i)
+                    recibidos = getattr(self.puerto, 'bytes_recibidos', 0)
+
+                    respuesta = esperar(secuencia, registro)
+                    intentos = 0
+                    while ((respuesta is None or respuesta[2] < fin - inicio) and
+                           intentos < self.reintentos and self.presupuesto != 0):
+                        # Misma secuencia: si la placa ya lo filtró reenvía la respuesta guardada
+                        intentos += 1
+                        registro['reintentos'] += 1
+                        self.retransmisiones += 1
+                        if self.presupuesto is not None:
+                            self.presupuesto -= 1
+                        with self._escritura:
+                            self.puerto.write(trama)
+                        respuesta = esperar(secuencia, registro)
+
+                    registro['latencia'] = time.perf_counter() - registro['inicio']
+                    registro['bytes_tx'] = len(trama) * (1 + intentos)
+                    registro['bytes_rx'] = getattr(self.puerto, 'bytes_recibidos', 0) - recibidos
+                    registro['exito'] = respuesta is not None and respuesta[2] >= fin - inicio
+                    self.registros.append(registro)
+                    if not registro['exito']:
+                        registro['cpu'] = registro.get('cpu', 0.0) + time.thread_time() - cpu
+                        lotes_fallidos.append(i)
+                        detener.set()
+                        break
+
+                    e, s = protocolo_binario.decodificar_respuesta(
+                        respuesta[2], respuesta[4], respuesta[3])
+                    registro['cpu'] = registro.get('cpu', 0.0) + time.thread_time() - cpu
+                    entrada[inicio:fin] = e[:fin - inicio]
+                    salida[inicio:fin] = s[:fin - inicio]
+                    print(f"   Lote {i+1}/{num_lotes}: {(i + 1) / num_lotes * 100:.1f}% ")
+                    if self.al_recibir and not self.al_recibir(inicio, e[:fin - inicio], s[:fin - inicio]):
+                        detener.set()
+                        break
+            except Exception as e:
+                errores.append(e)
+                detener.set()
+
+        hilo_escritor = threading.Thread(target=escritor, daemon=True)
+        hilo_lector = threading.Thread(target=lector, daemon=True)
+        hilo_escritor.start()
+        hilo_lector.start()
+        hilo_escritor.join()
+        hilo_lector.join()
+
+        if errores:
+            raise errores[0]
+
+        self.secuencia_inicial = (self.secuencia_inicial + enviados[0]) & 0xFFFF
+        return entrada, salida, sorted(lotes_fallidos)
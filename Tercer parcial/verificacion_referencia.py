@@ -0,0 +1,122 @@
+#!/usr/bin/env python3
+"""
+VERIFICACIÓN CONTRA EL MODELO DE REFERENCIA
+Calcula en un hilo aparte la salida esperada de cada lote con la réplica
+bit a bit del sketch (filtros_punto_fijo.py) y la compara con la que
+regresa la placa mientras se sigue transmitiendo
+
+La primera discrepancia se reporta en cuanto aparece; si la fracción de
+muestras distintas supera el umbral, la corrida se marca para abortar.
+
+El modelo debe ver exactamente la entrada que filtró la placa: lo que no se
+compara (calentamiento al reanudar, lotes sin respuesta usable) se le pasa
+con preparar(). Los índices reportados son absolutos dentro del audio.
+
+Es opcional (--verificar): filtros_punto_fijo reproduce el sketch a partir
+del código, pero aún no se ha contrastado con una placa real, y con
+tolerancia 0 una diferencia de redondeo abortaría corridas correctas.
+"""
+
+import queue
+import threading
+
+import numpy as np
+
+from filtros_punto_fijo import crear_filtro, NOMBRES_FILTRO
+
+UMBRAL_DIVERGENCIA = 0.01  # fracción de muestras distintas que aborta la corrida
+TOLERANCIA_LSB = 0         # diferencia aceptada por muestra (0 = bit a bit)
+
+
+class VerificadorReferencia:
+    def __init__(self, tipo_filtro, umbral=UMBRAL_DIVERGENCIA, tolerancia=TOLERANCIA_LSB,
+                 coeficientes=None, desplazamiento=0):
+        # coeficientes: los del filtro cargado en la placa (tipo 3)
+        # desplazamiento: muestra del audio completo donde empieza este tramo (multiplaca)
+        self.tipo_filtro = tipo_filtro
+        self.modelo = crear_filtro(tipo_filtro, coeficientes)
+        self.umbral = umbral
+        self.tolerancia = tolerancia
+
+        self.desplazamiento = desplazamiento
+        self.posicion = 0    # índice de la siguiente muestra que verá el modelo
+        self.muestras = 0    # muestras comparadas
+        self.discrepancias = 0
+        self.error_maximo = 0
+        self.primera = None  # índice de muestra de la primera discrepancia
+        self.abortar = threading.Event()
+
+        self._cola = queue.Queue()
+        self._hilo = threading.Thread(target=self._trabajar, daemon=True)
+        self._hilo.start()
+
+    def enviar(self, entrada, salida, inicio=None):
+        """Encola un lote recibido que empieza en la muestra 'inicio'
+
+        Regresa False si ya hay que abortar.
+        """
+        self._cola.put((np.array(entrada), np.array(salida), inicio))
+        return not self.abortar.is_set()
+
+    def preparar(self, entrada, inicio=None):
+        """Pasa por el modelo muestras que la placa filtró pero no se comparan
+
+        Calentamiento al reanudar, o un lote que la placa filtró sin que
+        llegara una respuesta usable: sin esto el estado del modelo se
+        desfasa del de la placa y todos los lotes siguientes divergen.
+        """
+        self._cola.put((np.array(entrada), None, inicio))
+
+    def _trabajar(self):
+        while True:
+            lote = self._cola.get()
+            if lote is None:
+                break
+            entrada, salida, inicio = lote
+            if inicio is not None:
+                self.posicion = inicio
+            if salida is None:
+                self.modelo.procesar_lote(entrada)
+                self.posicion += len(entrada)
+            else:
+                self.verificar(entrada, salida)
+
+    def verificar(self, entrada, salida):
+        """Compara un lote con el modelo (en orden: el modelo guarda el estado)"""
+        esperada = self.modelo.procesar_lote(entrada)
+        diferencia = np.abs(np.asarray(salida, dtype=np.int32) - esperada)
+        malas = np.flatnonzero(diferencia > self.tolerancia)
+
+        if len(malas):
+            if self.primera is None:
+                self.primera = self.desplazamiento + self.posicion + int(malas[0])
+                print(f"   Salida distinta al modelo de referencia en la muestra {self.primera} "
+                      f"(placa {int(salida[malas[0]])}, esperado {int(esperada[malas[0]])})")
+            self.discrepancias += len(malas)
+            self.error_maximo = max(self.error_maximo, int(diferencia.max()))
+        self.muestras += len(entrada)
+        self.posicion += len(entrada)
+
+        if self.discrepancias > self.umbral * self.muestras and not self.abortar.is_set():
+            print(f"   Divergencia {self.discrepancias / self.muestras * 100:.1f}% > "
+                  f"{self.umbral * 100:.1f}%: se aborta la corrida")
+            self.abortar.set()
+
+    def terminar(self):
+        """Espera a que se verifiquen los lotes pendientes"""
+        if self._hilo.is_alive():
+            self._cola.put(None)
+            self._hilo.join()
+        return self.discrepancias == 0
+
+    def reporte(self):
+        """Imprime el resultado de la verificación"""
+        print(f"\nVERIFICACIÓN CONTRA MODELO ({NOMBRES_FILTRO.get(self.tipo_filtro, self.tipo_filtro)}):")
+        print(f"   Muestras verificadas: {self.muestras}")
+        if self.discrepancias:
+            print(f"   Discrepancias: {self.discrepancias} "
+                  f"({self.discrepancias / max(self.muestras, 1) * 100:.2f}%), "
+                  f"error máximo {self.error_maximo} LSB")
+        else:
+            print(f"   Salida idéntica bit a bit")
+        return self.discrepancias == 0